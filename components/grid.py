@@ -0,0 +1,49 @@
+"""Paginated, selectable data grids shared by the Streamlit pages.
+
+A page of rows is sent to the browser as one DataFrame widget instead of a
+row of st.columns and buttons per record, so render cost depends on the
+page size rather than on the size of the table. Actions work on the rows
+ticked in the Select column.
+"""
+
+import pandas as pd
+import streamlit as st
+
+from components.pagination import keyset_page
+from db.queries import PAGE_SIZE
+
+
+def data_grid(key, rows, columns, column_config=None, selectable=True):
+    """Render `rows` as a read-only grid and return the selected rows.
+
+    `columns` names the fields of each row tuple. With `selectable`, a
+    leading Select checkbox column is added and the ticked rows are
+    returned as the original tuples.
+    """
+    frame = pd.DataFrame(list(rows), columns=columns)
+    if not selectable:
+        st.dataframe(frame, hide_index=True, use_container_width=True, column_config=column_config)
+        return []
+
+    frame.insert(0, "Select", False)
+    # A new page or filter gets a fresh widget, so stale ticks do not carry over
+    token = hash(tuple(row[0] for row in rows))
+    edited = st.data_editor(
+        frame,
+        key=f"{key}_grid_{token}",
+        hide_index=True,
+        use_container_width=True,
+        disabled=list(columns),
+        column_config={"Select": st.column_config.CheckboxColumn("Select", width="small"),
+                       **(column_config or {})},
+    )
+    return [row for row, ticked in zip(rows, edited["Select"]) if ticked]
+
+
+def paged_grid(key, fetch_page, columns, filters=None, page_size=PAGE_SIZE,
+               column_config=None, selectable=True):
+    """Show one keyset page of rows in a grid; return (rows, selected_rows)."""
+    rows = keyset_page(key, fetch_page, filters=filters, page_size=page_size)
+    if not rows:
+        return [], []
+    return rows, data_grid(key, rows, columns, column_config=column_config, selectable=selectable)
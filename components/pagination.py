@@ -0,0 +1,32 @@
+"""Keyset pagination controls shared by the Streamlit pages."""
+
+import streamlit as st
+
+from db.queries import PAGE_SIZE
+
+
+def keyset_page(key, fetch_page, filters=None, page_size=PAGE_SIZE):
+    """Fetch and return the current page of rows, with Newer/Older buttons.
+
+    `fetch_page(before_id=..., limit=...)` must return (rows, next_cursor).
+    The cursor stack lives in session state under `key` and is reset whenever
+    `filters` changes.
+    """
+    cursors_key = f"{key}_cursors"
+    filters_key = f"{key}_filters"
+    if st.session_state.get(filters_key) != filters or cursors_key not in st.session_state:
+        st.session_state[filters_key] = filters
+        st.session_state[cursors_key] = [None]
+    cursors = st.session_state[cursors_key]
+
+    rows, next_cursor = fetch_page(before_id=cursors[-1], limit=page_size)
+
+    prev_col, page_col, next_col = st.columns([1, 2, 1])
+    if prev_col.button("⬅️ Newer", key=f"{key}_prev", disabled=len(cursors) == 1):
+        cursors.pop()
+        st.rerun()
+    page_col.caption(f"Page {len(cursors)}")
+    if next_col.button("Older ➡️", key=f"{key}_next", disabled=next_cursor is None):
+        cursors.append(next_cursor)
+        st.rerun()
+    return rows
@@ -0,0 +1,193 @@
+"""Streaming bulk import of products and inventory from CSV or JSONL.
+
+Expected fields: sku, name, description, threshold, location, quantity.
+Rows without a location only upsert the product.
+
+    python -m db.bulk_import catalog.csv [--format csv|jsonl] [--chunk-size 1000]
+"""
+
+import argparse
+import csv
+import io
+import json
+import time
+
+from db.cache import invalidate
+from db.connection import transaction
+from db.counters import LowStockTracker
+from db.ledger import LedgerTracker
+from db.queries import write_log
+
+CHUNK_SIZE = 1000
+
+
+def _open_text(source):
+    """Return (text stream, should_close) for a path or a text/binary file object."""
+    if isinstance(source, str):
+        return open(source, newline="", encoding="utf-8"), True
+    if isinstance(source, io.TextIOBase):
+        return source, False
+    return io.TextIOWrapper(source, encoding="utf-8", newline=""), False
+
+
+def _detect_format(source, fmt):
+    if fmt:
+        return fmt
+    name = source if isinstance(source, str) else getattr(source, "name", "")
+    return "jsonl" if str(name).lower().endswith((".jsonl", ".ndjson", ".json")) else "csv"
+
+
+def _read_records(stream, fmt):
+    """Yield (line_no, record or None, error) without loading the whole file."""
+    if fmt == "jsonl":
+        for line_no, line in enumerate(stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                yield line_no, json.loads(line), None
+            except ValueError as e:
+                yield line_no, None, f"invalid JSON: {e}"
+    else:
+        reader = csv.DictReader(stream)
+        for record in reader:
+            yield reader.line_num, record, None
+
+
+def _as_int(value, field, default=None):
+    if value is None or str(value).strip() == "":
+        if default is None:
+            raise ValueError(f"{field} is required")
+        return default
+    number = int(str(value).strip())
+    if number < 0:
+        raise ValueError(f"{field} must be >= 0")
+    return number
+
+
+def _clean(record):
+    """Validate one record; return (product row, inventory row or None)."""
+    sku = str(record.get("sku") or "").strip().upper()
+    name = str(record.get("name") or "").strip()
+    if not sku or len(sku) > 20:
+        raise ValueError("sku must be 1-20 characters")
+    if not name or len(name) > 100:
+        raise ValueError("name must be 1-100 characters")
+    description = str(record.get("description") or "").strip()
+    threshold = _as_int(record.get("threshold"), "threshold", default=10)
+    product = (sku, name, description, threshold)
+
+    location = str(record.get("location") or "").strip()
+    if not location:
+        return product, None
+    if len(location) > 100:
+        raise ValueError("location must be at most 100 characters")
+    quantity = _as_int(record.get("quantity"), "quantity")
+    return product, (sku, location, quantity)
+
+
+def _upsert_chunk(products, inventory, tx):
+    """Upsert a chunk with one multi-row statement per table."""
+    cursor = tx.cursor()
+    low_stock = LowStockTracker(cursor, *(row[0] for row in products)).before()
+    ledger = LedgerTracker(cursor, "import", *(row[0] for row in inventory)).before()
+    if products:
+        cursor.execute(
+            "INSERT INTO Products (sku, name, description, threshold) VALUES "
+            + ", ".join(["(%s, %s, %s, %s)"] * len(products))
+            + " ON DUPLICATE KEY UPDATE name = VALUES(name), "
+              "description = VALUES(description), threshold = VALUES(threshold)",
+            [value for row in products for value in row],
+        )
+    if inventory:
+        cursor.execute(
+            "INSERT INTO Inventory (sku, location, quantity) VALUES "
+            + ", ".join(["(%s, %s, %s)"] * len(inventory))
+            + " ON DUPLICATE KEY UPDATE quantity = VALUES(quantity)",
+            [value for row in inventory for value in row],
+        )
+    ledger.after()
+    low_stock.after()
+    cursor.close()
+
+
+def import_catalog(source, fmt=None, chunk_size=CHUNK_SIZE, user_id=None):
+    """Stream `source` into Products/Inventory, one transaction per chunk.
+
+    Returns a report with row counts, throughput and per-row rejects
+    as (line_no, reason) pairs.
+    """
+    fmt = _detect_format(source, fmt)
+    stream, should_close = _open_text(source)
+    report = {"rows": 0, "products": 0, "inventory": 0, "chunks": 0, "rejects": []}
+    started = time.perf_counter()
+
+    # Later rows for the same key win, as they would row by row
+    products, inventory, lines = {}, {}, []
+
+    def flush():
+        if not lines:
+            return
+        try:
+            with transaction() as tx:
+                _upsert_chunk(list(products.values()), list(inventory.values()), tx)
+                write_log(
+                    user_id,
+                    f"Bulk import: {len(products)} products, {len(inventory)} inventory rows",
+                    tx=tx,
+                    action_type="import.catalog",
+                )
+                invalidate("Products", "Inventory", tx=tx)
+            report["products"] += len(products)
+            report["inventory"] += len(inventory)
+            report["chunks"] += 1
+        except Exception as e:  # noqa: W0703
+            report["rejects"].extend((line_no, f"chunk failed: {e}") for line_no in lines)
+        products.clear()
+        inventory.clear()
+        lines.clear()
+
+    try:
+        for line_no, record, error in _read_records(stream, fmt):
+            report["rows"] += 1
+            if error is None:
+                try:
+                    product, stock = _clean(record)
+                except (ValueError, TypeError, AttributeError) as e:
+                    error = str(e)
+            if error is not None:
+                report["rejects"].append((line_no, error))
+                continue
+            products[product[0]] = product
+            if stock:
+                inventory[(stock[0], stock[1])] = stock
+            lines.append(line_no)
+            if len(lines) >= chunk_size:
+                flush()
+        flush()
+    finally:
+        if should_close:
+            stream.close()
+
+    elapsed = time.perf_counter() - started
+    report["seconds"] = elapsed
+    report["rows_per_sec"] = report["rows"] / elapsed if elapsed > 0 else 0.0
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk import products and inventory.")
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=["csv", "jsonl"])
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    args = parser.parse_args(argv)
+
+    report = import_catalog(args.path, fmt=args.format, chunk_size=args.chunk_size)
+    print(f"{report['rows']} rows in {report['seconds']:.2f}s ({report['rows_per_sec']:.0f} rows/s)")
+    print(f"{report['products']} products, {report['inventory']} inventory rows, "
+          f"{len(report['rejects'])} rejects")
+    for line_no, reason in report["rejects"]:
+        print(f"  line {line_no}: {reason}")
+
+
+if __name__ == "__main__":
+    main()
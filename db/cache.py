@@ -0,0 +1,125 @@
+"""Read-through cache for reference data, invalidated by table on writes."""
+
+import copy
+import functools
+import os
+import threading
+import time
+from collections import OrderedDict
+
+CACHE_TTL = float(os.getenv("SCMS_CACHE_TTL", "300"))
+CACHE_SIZE = int(os.getenv("SCMS_CACHE_SIZE", "1024"))
+
+
+class TTLCache:
+    """LRU cache whose entries expire after `ttl` seconds and carry table tags."""
+
+    def __init__(self, maxsize=CACHE_SIZE, ttl=CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (value, expires_at, tables)
+        self._generations = {}  # table -> number of invalidations so far
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+
+    def get(self, key):
+        """Return (True, value) on a live hit, else (False, None)."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] > time.monotonic():
+                self._entries.move_to_end(key)
+                self._stats["hits"] += 1
+                return True, entry[0]
+            if entry is not None:
+                del self._entries[key]
+            self._stats["misses"] += 1
+            return False, None
+
+    def generation(self, tables):
+        """Return a token that changes whenever any of `tables` is invalidated."""
+        with self._lock:
+            return tuple(self._generations.get(table, 0) for table in tables)
+
+    def put(self, key, value, tables, generation=None):
+        """Store `value` unless `tables` were invalidated since `generation`."""
+        with self._lock:
+            current = tuple(self._generations.get(table, 0) for table in tables)
+            if generation is not None and generation != current:
+                return
+            self._entries[key] = (value, time.monotonic() + self.ttl, frozenset(tables))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def invalidate(self, tables):
+        """Drop every entry that depends on any of `tables`."""
+        tables = set(tables)
+        with self._lock:
+            for table in tables:
+                self._generations[table] = self._generations.get(table, 0) + 1
+            stale = [key for key, entry in self._entries.items() if entry[2] & tables]
+            for key in stale:
+                del self._entries[key]
+            self._stats["invalidations"] += len(stale)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["size"] = len(self._entries)
+            stats["maxsize"] = self.maxsize
+        return stats
+
+
+_cache = TTLCache()
+
+
+def cached(*tables):
+    """Cache a query function's result until TTL expiry or a write to `tables`.
+
+    Calls made inside a transaction bypass the cache, since they may see
+    uncommitted writes.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, tx=None, **kwargs):
+            if tx is not None:
+                return func(*args, tx=tx, **kwargs)
+            key = (func.__name__, args, tuple(sorted(kwargs.items())))
+            hit, value = _cache.get(key)
+            if not hit:
+                # A write committed while we query must not leave a stale entry
+                generation = _cache.generation(tables)
+                value = func(*args, **kwargs)
+                _cache.put(key, value, tables, generation)
+            # Callers get their own copy so they cannot mutate the cached value
+            return copy.deepcopy(value)
+        return wrapper
+    return decorator
+
+
+def invalidate(*tables, tx=None):
+    """Invalidate cached reads of `tables`, after `tx` commits if one is given."""
+    if tx is not None:
+        tx.on_commit(lambda: _cache.invalidate(tables))
+    else:
+        _cache.invalidate(tables)
+
+
+def table_generation(*tables):
+    """Return a token that changes whenever any of `tables` is invalidated."""
+    return _cache.generation(tables)
+
+
+def clear_cache():
+    """Drop every cached entry."""
+    _cache.clear()
+
+
+def get_cache_stats():
+    """Return hit, miss, eviction and invalidation counters."""
+    return _cache.stats()
@@ -1,23 +1,332 @@
 import mysql.connector
+from mysql.connector.errors import PoolError
+from contextlib import contextmanager
 import os
+import threading
+import time
 
-def get_connection():
+# Pool tuning (overridable through the environment or configure_pool)
+POOL_SIZE = int(os.getenv("SCMS_POOL_SIZE", "8"))
+POOL_TIMEOUT = float(os.getenv("SCMS_POOL_TIMEOUT", "10"))
+POOL_RECYCLE = float(os.getenv("SCMS_POOL_RECYCLE", "1800"))
+POOL_PING_AFTER = float(os.getenv("SCMS_POOL_PING_AFTER", "30"))
+
+
+def _connect_args():
     # Detect if running in GitHub Actions CI
     is_ci = os.getenv("CI") == "true"
 
     if is_ci:
         # CI/CD environment (matches ci.yml)
-        return mysql.connector.connect(
-            host="127.0.0.1",
-            user="root",
-            password="root",
-            database="scms"
+        return {
+            "host": "127.0.0.1",
+            "user": "root",
+            "password": "root",
+            "database": "scms",
+        }
+    # Local development
+    return {
+        "host": "localhost",
+        "user": "root",
+        "password": "REPLACE_WITH_YOUR_LOCAL_SQL_PASSWORD",
+        "database": "scms",
+    }
+
+
+_thread_stats = threading.local()
+
+
+def thread_checkouts():
+    """Return how many pooled connections the current thread has checked out."""
+    return getattr(_thread_stats, "checkouts", 0)
+
+
+class PooledConnection:
+    """Proxy around a pooled MySQL connection; close() hands it back to the pool."""
+
+    def __init__(self, pool, raw, created_at):
+        self._pool = pool
+        self._raw = raw
+        self._created_at = created_at
+
+    def __getattr__(self, name):
+        raw = self.__dict__.get("_raw")
+        if raw is None:
+            raise AttributeError(name)
+        return getattr(raw, name)
+
+    def close(self):
+        """Return the underlying connection to the pool."""
+        raw, self._raw = self._raw, None
+        if raw is not None:
+            self._pool._release(raw, self._created_at)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def __del__(self):
+        # Callers that forget close() must not leak a pool slot
+        try:
+            self.close()
+        except Exception:  # noqa: W0703
+            pass
+
+
+class ConnectionPool:
+    """Thread-safe, bounded pool of MySQL connections."""
+
+    def __init__(self, size=POOL_SIZE, timeout=POOL_TIMEOUT,
+                 recycle=POOL_RECYCLE, ping_after=POOL_PING_AFTER):
+        self.size = size
+        self.timeout = timeout
+        self.recycle = recycle
+        self.ping_after = ping_after
+        self._idle = []  # (raw, created_at, last_used), most recently used last
+        self._total = 0
+        self._cond = threading.Condition()
+        self._closed = False
+        self._stats = {
+            "checkouts": 0,
+            "waits": 0,
+            "timeouts": 0,
+            "created": 0,
+            "recycled": 0,
+            "health_failures": 0,
+        }
+
+    def _connect(self):
+        raw = mysql.connector.connect(**_connect_args())
+        with self._cond:
+            self._stats["created"] += 1
+        return raw
+
+    def _discard(self, raw):
+        try:
+            raw.close()
+        except Exception:  # noqa: W0703
+            pass
+        with self._cond:
+            self._total -= 1
+            self._cond.notify()
+
+    def get(self):
+        """Check out a healthy connection, waiting up to `timeout` seconds."""
+        deadline = time.monotonic() + self.timeout
+        waited = False
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise PoolError("Connection pool is closed")
+                if self._idle:
+                    raw, created_at, last_used = self._idle.pop()
+                    break
+                if self._total < self.size:
+                    self._total += 1
+                    raw = None
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._stats["timeouts"] += 1
+                    raise PoolError(f"No connection available within {self.timeout:.1f}s")
+                if not waited:
+                    self._stats["waits"] += 1
+                    waited = True
+                self._cond.wait(remaining)
+            self._stats["checkouts"] += 1
+        _thread_stats.checkouts = thread_checkouts() + 1
+
+        now = time.monotonic()
+        try:
+            if raw is None:
+                raw, created_at = self._connect(), now
+            elif now - created_at > self.recycle:
+                raw.close()
+                raw, created_at = self._connect(), now
+                with self._cond:
+                    self._stats["recycled"] += 1
+            elif now - last_used > self.ping_after:
+                try:
+                    raw.ping(reconnect=False)
+                except Exception:  # noqa: W0703
+                    with self._cond:
+                        self._stats["health_failures"] += 1
+                    try:
+                        raw.close()
+                    except Exception:  # noqa: W0703
+                        pass
+                    raw, created_at = self._connect(), now
+        except Exception:
+            with self._cond:
+                self._total -= 1
+                self._cond.notify()
+            raise
+        return PooledConnection(self, raw, created_at)
+
+    def _release(self, raw, created_at):
+        try:
+            # A half-read unbuffered result makes the connection unusable
+            if getattr(raw, "unread_result", False):
+                raise PoolError("Connection returned with an unread result")
+            # Never hand out a connection holding an open transaction/snapshot
+            if raw.in_transaction:
+                raw.rollback()
+        except Exception:  # noqa: W0703
+            self._discard(raw)
+            return
+        with self._cond:
+            if self._closed:
+                self._total -= 1
+                raw.close()
+                return
+            self._idle.append((raw, created_at, time.monotonic()))
+            self._cond.notify()
+
+    def close(self):
+        """Close all idle connections and refuse further checkouts."""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._total -= len(idle)
+            self._cond.notify_all()
+        for raw, _, _ in idle:
+            try:
+                raw.close()
+            except Exception:  # noqa: W0703
+                pass
+
+    def stats(self):
+        """Return a snapshot of pool counters."""
+        with self._cond:
+            stats = dict(self._stats)
+            stats["size"] = self.size
+            stats["open"] = self._total
+            stats["idle"] = len(self._idle)
+            stats["in_use"] = self._total - len(self._idle)
+        return stats
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool()
+    return _pool
+
+
+def configure_pool(size=None, timeout=None, recycle=None, ping_after=None):
+    """Replace the process-wide pool with one using the given settings."""
+    global _pool
+    with _pool_lock:
+        old = _pool
+        _pool = ConnectionPool(
+            size=size if size is not None else POOL_SIZE,
+            timeout=timeout if timeout is not None else POOL_TIMEOUT,
+            recycle=recycle if recycle is not None else POOL_RECYCLE,
+            ping_after=ping_after if ping_after is not None else POOL_PING_AFTER,
         )
-    else:
-        # Local development
-        return mysql.connector.connect(
-            host="localhost",
-            user="root",
-            password="REPLACE_WITH_YOUR_LOCAL_SQL_PASSWORD",
-            database="scms"
-        )
\ No newline at end of file
+    if old is not None:
+        old.close()
+
+
+def close_pool():
+    """Close the process-wide pool (a new one is created on next use)."""
+    global _pool
+    with _pool_lock:
+        old, _pool = _pool, None
+    if old is not None:
+        old.close()
+
+
+def get_pool_stats():
+    """Return checkout, wait, timeout and size counters for the pool."""
+    return _get_pool().stats()
+
+
+def connect_unpooled():
+    """Open a connection outside the pool; the caller must close it."""
+    return mysql.connector.connect(**_connect_args())
+
+
+class _TransactionConnection:
+    """Connection handle given to queries inside a transaction.
+
+    commit(), rollback() and close() are deferred to the owning Transaction,
+    so query functions written for standalone use compose without changes.
+    """
+
+    def __init__(self, conn):
+        self._conn = conn
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class Transaction:
+    """Unit of work: several queries on one pooled connection with one commit."""
+
+    def __init__(self):
+        self._conn = get_connection()
+        self.connection = _TransactionConnection(self._conn)
+        self._on_commit = []
+
+    def cursor(self, *args, **kwargs):
+        """Open a cursor on the shared connection."""
+        return self._conn.cursor(*args, **kwargs)
+
+    def on_commit(self, callback):
+        """Run `callback` once the transaction has committed successfully."""
+        self._on_commit.append(callback)
+
+    def commit(self):
+        """Commit all work and run the on-commit callbacks."""
+        self._conn.commit()
+        callbacks, self._on_commit = self._on_commit, []
+        for callback in callbacks:
+            callback()
+
+    def rollback(self):
+        """Discard all work done in the transaction."""
+        self._on_commit = []
+        self._conn.rollback()
+
+    def close(self):
+        """Return the connection to the pool."""
+        self._conn.close()
+
+
+@contextmanager
+def transaction():
+    """Yield a Transaction committed on success and rolled back on error."""
+    tx = Transaction()
+    try:
+        yield tx
+        tx.commit()
+    except BaseException:
+        tx.rollback()
+        raise
+    finally:
+        tx.close()
+
+
+def get_connection(tx=None):
+    """Check out a pooled connection, or the shared one of `tx` if given."""
+    if tx is not None:
+        return tx.connection
+    return _get_pool().get()
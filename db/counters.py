@@ -0,0 +1,246 @@
+"""Incrementally maintained counters and low-stock set.
+
+Writers adjust the SummaryCounters rows and the LowStock table in the same
+transaction as the change they make, so the report reads four rows and
+low-stock alerts cost time proportional to the number of alerts instead of
+scanning Orders, Inventory and Logistics.
+
+    python -m db.counters --verify
+    python -m db.counters --rebuild
+"""
+
+import argparse
+from decimal import Decimal
+
+from db.connection import transaction
+
+COUNTERS = ("total_orders", "processed_orders", "low_stock_items", "total_logistics_cost")
+
+_ACTUAL = {
+    "total_orders": "SELECT COUNT(*) FROM Orders",
+    "processed_orders": "SELECT COUNT(*) FROM Orders WHERE status = 'Processed'",
+    "low_stock_items": """
+        SELECT COUNT(DISTINCT i.sku)
+        FROM Inventory i
+        JOIN Products p ON i.sku = p.sku
+        WHERE i.quantity < p.threshold AND i.location_type = 'Warehouse'
+    """,
+    "total_logistics_cost": "SELECT COALESCE(SUM(transport_cost), 0) FROM Logistics",
+}
+
+
+def bump_counter(cursor, name, delta):
+    """Add `delta` to counter `name` on the caller's connection."""
+    if delta:
+        cursor.execute(
+            "UPDATE SummaryCounters SET value = value + %s WHERE name = %s",
+            (delta, name),
+        )
+
+
+def count_low_skus(cursor, skus):
+    """Count which of `skus` have a warehouse row below threshold.
+
+    The locking read serializes concurrent writers to the same SKUs, so
+    before/after counts taken in one transaction stay consistent.
+    """
+    if not skus:
+        return 0
+    cursor.execute(f"""
+        SELECT COUNT(DISTINCT i.sku)
+        FROM Inventory i
+        JOIN Products p ON i.sku = p.sku
+        WHERE i.sku IN ({", ".join(["%s"] * len(skus))})
+          AND i.quantity < p.threshold AND i.location_type = 'Warehouse'
+        FOR UPDATE
+    """, tuple(skus))
+    return cursor.fetchone()[0]
+
+
+def sync_low_stock(cursor, skus):
+    """Refresh the LowStock rows of `skus` from Inventory and Products."""
+    if not skus:
+        return
+    placeholders = ", ".join(["%s"] * len(skus))
+    cursor.execute(f"DELETE FROM LowStock WHERE sku IN ({placeholders})", tuple(skus))
+    cursor.execute(f"""
+        INSERT INTO LowStock (sku, location)
+        SELECT i.sku, i.location
+        FROM Inventory i
+        JOIN Products p ON i.sku = p.sku
+        WHERE i.sku IN ({placeholders})
+          AND i.quantity < p.threshold AND i.location_type = 'Warehouse'
+    """, tuple(skus))
+
+
+def rebuild_low_stock_on(cursor):
+    """Recompute the whole LowStock table on the caller's connection."""
+    cursor.execute("DELETE FROM LowStock")
+    cursor.execute("""
+        INSERT INTO LowStock (sku, location)
+        SELECT i.sku, i.location
+        FROM Inventory i
+        JOIN Products p ON i.sku = p.sku
+        WHERE i.quantity < p.threshold AND i.location_type = 'Warehouse'
+    """)
+
+
+class LowStockTracker:
+    """Maintain LowStock and low_stock_items around a write to the given SKUs.
+
+    Call before() ahead of the write and after() once it is done, both on
+    the writer's cursor.
+    """
+
+    def __init__(self, cursor, *skus):
+        self.cursor = cursor
+        self.skus = sorted(set(skus))
+        self._before = 0
+
+    def before(self):
+        self._before = count_low_skus(self.cursor, self.skus)
+        return self
+
+    def after(self):
+        sync_low_stock(self.cursor, self.skus)
+        bump_counter(self.cursor, "low_stock_items",
+                     count_low_skus(self.cursor, self.skus) - self._before)
+
+
+def apply_low_stock_changes(cursor, sku, deltas, created=()):
+    """Maintain LowStock and low_stock_items after known changes to rows of one SKU.
+
+    For writers that know what they changed, such as a move. `deltas` maps
+    each changed location of `sku` to its change in quantity, and
+    `created` holds the locations whose rows the write inserted. Only those
+    rows are read; the product row is locked, which serializes writers of
+    the SKU. LowStock is only written when a row crosses the threshold.
+    """
+    locations = sorted(deltas)
+    placeholders = ", ".join(["%s"] * len(locations))
+    cursor.execute(f"""
+        SELECT i.location, i.quantity, p.threshold, i.location_type = 'Warehouse'
+        FROM Inventory i
+        JOIN Products p ON i.sku = p.sku
+        WHERE i.sku = %s AND i.location IN ({placeholders})
+        FOR UPDATE
+    """, (sku, *locations))
+    became_low, cleared = [], []
+    was_low = is_low = False
+    for location, quantity, threshold, warehouse in cursor.fetchall():
+        # LowStock holds exactly the low rows, so the old state follows from the old quantity
+        before = bool(warehouse) and location not in created and quantity - deltas[location] < threshold
+        after = bool(warehouse) and quantity < threshold
+        was_low, is_low = was_low or before, is_low or after
+        if after and not before:
+            became_low.append(location)
+        elif before and not after:
+            cleared.append(location)
+    if not became_low and not cleared:
+        return
+    if cleared:
+        cursor.execute(f"DELETE FROM LowStock WHERE sku = %s AND location IN ({', '.join(['%s'] * len(cleared))})",
+                       (sku, *cleared))
+    if became_low:
+        cursor.executemany("INSERT IGNORE INTO LowStock (sku, location) VALUES (%s, %s)",
+                           [(sku, location) for location in became_low])
+    if was_low != is_low:
+        # The SKU only enters or leaves the count if no other location keeps it low
+        cursor.execute(f"SELECT COUNT(*) FROM LowStock WHERE sku = %s AND location NOT IN ({placeholders}) "
+                       "FOR SHARE", (sku, *locations))
+        if not cursor.fetchone()[0]:
+            bump_counter(cursor, "low_stock_items", 1 if is_low else -1)
+
+
+def _actual_values(cursor):
+    values = {}
+    for name, sql in _ACTUAL.items():
+        cursor.execute(sql)
+        values[name] = Decimal(cursor.fetchone()[0] or 0)
+    return values
+
+
+def read_counters(cursor):
+    """Return {name: value} for all counters."""
+    cursor.execute("SELECT name, value FROM SummaryCounters")
+    values = {name: Decimal(0) for name in COUNTERS}
+    values.update({name: value for name, value in cursor.fetchall()})
+    return values
+
+
+def rebuild_counters_on(cursor):
+    """Recompute LowStock and every counter from the base tables on the caller's connection."""
+    rebuild_low_stock_on(cursor)
+    values = _actual_values(cursor)
+    cursor.executemany(
+        "INSERT INTO SummaryCounters (name, value) VALUES (%s, %s) "
+        "ON DUPLICATE KEY UPDATE value = VALUES(value)",
+        list(values.items()),
+    )
+    return values
+
+
+def rebuild_summary_counters():
+    """Recompute every counter from the base tables and store the result."""
+    with transaction() as tx:
+        cursor = tx.cursor()
+        values = rebuild_counters_on(cursor)
+        cursor.close()
+    return values
+
+
+def verify_summary_counters():
+    """Return {name: (stored, actual)} for every counter that has drifted.
+
+    A drifted LowStock table is reported as "low_stock_rows" with the
+    number of missing and stale rows.
+    """
+    with transaction() as tx:
+        cursor = tx.cursor()
+        stored = read_counters(cursor)
+        actual = _actual_values(cursor)
+        cursor.execute("""
+            SELECT
+              (SELECT COUNT(*) FROM Inventory i JOIN Products p ON i.sku = p.sku
+               LEFT JOIN LowStock ls ON ls.sku = i.sku AND ls.location = i.location
+               WHERE i.quantity < p.threshold AND i.location_type = 'Warehouse'
+                 AND ls.sku IS NULL),
+              (SELECT COUNT(*) FROM LowStock ls
+               LEFT JOIN Inventory i ON ls.sku = i.sku AND ls.location = i.location
+               LEFT JOIN Products p ON p.sku = ls.sku
+               WHERE i.sku IS NULL OR NOT (i.quantity < p.threshold))
+        """)
+        missing, stale = cursor.fetchone()
+        cursor.close()
+    drift = {
+        name: (stored[name], actual[name])
+        for name in COUNTERS
+        if Decimal(stored[name]) != actual[name]
+    }
+    if missing or stale:
+        drift["low_stock_rows"] = (f"{stale} stale", f"{missing} missing")
+    return drift
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Verify or rebuild summary counters.")
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument("--verify", action="store_true")
+    group.add_argument("--rebuild", action="store_true")
+    args = parser.parse_args(argv)
+
+    if args.rebuild:
+        for name, value in rebuild_summary_counters().items():
+            print(f"{name} = {value}")
+        return
+    drift = verify_summary_counters()
+    if not drift:
+        print("All counters match")
+        return
+    for name, (stored, actual) in drift.items():
+        print(f"{name}: stored {stored}, actual {actual}")
+    raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
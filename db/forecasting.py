@@ -0,0 +1,232 @@
+"""Demand forecasts for the whole catalog from Orders history.
+
+Order quantities are loaded with one grouped query into a SKU × period
+matrix. Moving-average and simple exponential smoothing models are then
+fitted for every SKU at once with NumPy. With method "best", each SKU
+uses whichever model had the lower one-step-ahead mean absolute error on
+its own history. Results replace the generated DemandForecast rows for
+the forecast horizon in one executemany; forecasts entered by hand
+(source 'manual') are kept.
+
+    python -m db.forecasting --period week --horizon 4
+    python -m db.forecasting --period month --horizon 3 --method ses --alpha 0.5
+"""
+
+import argparse
+import time
+from datetime import date, timedelta
+
+import numpy as np
+
+from db.connection import get_connection, transaction
+from db.queries import write_log
+
+PERIODS = ("day", "week", "month")
+
+DELETE_GENERATED_SQL = "DELETE FROM DemandForecast WHERE source = 'generated' AND forecast_date BETWEEN %s AND %s"
+METHODS = ("best", "moving_average", "ses")
+
+_BUCKET_SQL = {
+    "day": "DATE(created_at)",
+    "week": "DATE_SUB(DATE(created_at), INTERVAL WEEKDAY(created_at) DAY)",
+    "month": "DATE_SUB(DATE(created_at), INTERVAL DAYOFMONTH(created_at) - 1 DAY)",
+}
+
+
+def period_start(day, period):
+    """Return the first day of the period containing `day`."""
+    if period == "week":
+        return day - timedelta(days=day.weekday())
+    if period == "month":
+        return day.replace(day=1)
+    return day
+
+
+def next_period(day, period):
+    """Return the first day of the period after the one starting on `day`."""
+    if period == "week":
+        return day + timedelta(days=7)
+    if period == "month":
+        return (day.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return day + timedelta(days=1)
+
+
+def load_demand_matrix(period="week", since=None, until=None, tx=None):
+    """Return (skus, period_starts, matrix) of ordered quantities.
+
+    Every product gets a row, including SKUs with no orders. Columns run
+    from the first period with orders (or `since`) up to the period that
+    contains `until` (default today), with zeros for quiet periods.
+    """
+    if period not in PERIODS:
+        raise ValueError(f"period must be one of {PERIODS}")
+    clauses, params = [], []
+    if since is not None:
+        clauses.append("created_at >= %s")
+        params.append(since)
+    if until is not None:
+        clauses.append("created_at < %s")
+        params.append(until + timedelta(days=1))
+    where = ("WHERE " + " AND ".join(clauses)) if clauses else ""
+
+    conn = get_connection(tx)
+    cursor = conn.cursor()
+    cursor.execute("SELECT sku FROM Products ORDER BY sku")
+    skus = [row[0] for row in cursor.fetchall()]
+    cursor.execute(f"""
+        SELECT sku, {_BUCKET_SQL[period]} AS bucket, SUM(quantity)
+        FROM Orders
+        {where}
+        GROUP BY sku, bucket
+    """, tuple(params))
+    rows = cursor.fetchall()
+    cursor.close()
+    conn.close()
+
+    first = period_start(since, period) if since else min((b for _, b, _ in rows), default=None)
+    last = period_start(until or date.today(), period)
+    periods = []
+    day = first or last
+    while day <= last:
+        periods.append(day)
+        day = next_period(day, period)
+
+    sku_index = {sku: i for i, sku in enumerate(skus)}
+    period_index = {p: i for i, p in enumerate(periods)}
+    matrix = np.zeros((len(skus), len(periods)))
+    for sku, bucket, qty in rows:
+        if sku in sku_index and bucket in period_index:
+            matrix[sku_index[sku], period_index[bucket]] = float(qty)
+    return skus, periods, matrix
+
+
+def moving_average(matrix, window=4):
+    """Return (forecast, one-step-ahead predictions) for every row.
+
+    Prediction t is the mean of the `window` periods before t (fewer at
+    the start); it is NaN for the first period.
+    """
+    n = matrix.shape[1]
+    cumulative = np.concatenate([np.zeros((matrix.shape[0], 1)), np.cumsum(matrix, axis=1)], axis=1)
+    ends = np.arange(n + 1)
+    starts = np.maximum(ends - window, 0)
+    counts = np.maximum(ends - starts, 1)
+    means = (cumulative[:, ends] - cumulative[:, starts]) / counts
+    means[:, 0] = np.nan
+    return means[:, -1], means[:, :-1]
+
+
+def exponential_smoothing(matrix, alpha=0.3):
+    """Return (forecast, one-step-ahead predictions) of simple exponential smoothing."""
+    rows, n = matrix.shape
+    predictions = np.full((rows, n), np.nan)
+    if n == 0:
+        return np.zeros(rows), predictions
+    level = matrix[:, 0].copy()
+    for t in range(1, n):
+        predictions[:, t] = level
+        level = alpha * matrix[:, t] + (1 - alpha) * level
+    return level, predictions
+
+
+def _mae(matrix, predictions):
+    errors = np.abs(matrix - predictions)
+    counted = np.isfinite(errors).sum(axis=1)
+    return np.where(counted > 0, np.nansum(errors, axis=1) / np.maximum(counted, 1), np.inf)
+
+
+def forecast_demand(period="week", horizon=4, method="best", window=4, alpha=0.3,
+                    since=None, until=None, tx=None):
+    """Forecast demand for every SKU over the next `horizon` periods.
+
+    Returns {"skus", "dates", "values" (SKUs × horizon ints), "methods"
+    (model used per SKU)}. Both models give a flat forecast, so every
+    future period gets the same value.
+    """
+    if method not in METHODS:
+        raise ValueError(f"method must be one of {METHODS}")
+    skus, periods, matrix = load_demand_matrix(period, since, until, tx=tx)
+    # The current period is still filling up, so fit on completed periods only
+    history = matrix[:, :-1]
+    ma, ma_predictions = moving_average(history, window)
+    ses, ses_predictions = exponential_smoothing(history, alpha)
+
+    if method == "moving_average":
+        chosen = np.zeros(len(skus), dtype=bool)
+    elif method == "ses":
+        chosen = np.ones(len(skus), dtype=bool)
+    else:
+        chosen = _mae(history, ses_predictions) < _mae(history, ma_predictions)
+    level = np.where(chosen, ses, ma)
+    level = np.nan_to_num(level)
+
+    dates = []
+    day = periods[-1]
+    for _ in range(horizon):
+        day = next_period(day, period)
+        dates.append(day)
+    values = np.repeat(np.rint(level).astype(int)[:, None], horizon, axis=1)
+    return {
+        "skus": skus,
+        "dates": dates,
+        "values": values,
+        "methods": ["ses" if c else "moving_average" for c in chosen],
+    }
+
+
+def refresh_forecasts(period="week", horizon=4, method="best", window=4, alpha=0.3,
+                      include_zero=False, user_id=None):
+    """Replace the generated DemandForecast rows of the next `horizon` periods.
+
+    Forecasts are computed for the whole catalog and written with one
+    executemany in one transaction. Zero forecasts are skipped unless
+    `include_zero`. Returns a report with row count and timing.
+    """
+    started = time.perf_counter()
+    result = forecast_demand(period, horizon, method, window, alpha)
+    rows = [
+        (sku, int(value), day)
+        for sku, values in zip(result["skus"], result["values"])
+        for value, day in zip(values, result["dates"])
+        if include_zero or value > 0
+    ]
+    with transaction() as tx:
+        cursor = tx.cursor()
+        if result["dates"]:
+            cursor.execute(DELETE_GENERATED_SQL, (result["dates"][0], result["dates"][-1]))
+        cursor.executemany(
+            "INSERT INTO DemandForecast (sku, forecast_value, forecast_date, source) "
+            "VALUES (%s, %s, %s, 'generated')",
+            rows,
+        )
+        cursor.close()
+        write_log(user_id, f"Refreshed {len(rows)} forecasts for {len(result['skus'])} "
+                           f"SKUs ({period}, {method})", tx=tx, action_type="forecast.refresh")
+    return {
+        "rows": len(rows),
+        "skus": len(result["skus"]),
+        "dates": result["dates"],
+        "methods": {m: result["methods"].count(m) for m in set(result["methods"])},
+        "seconds": time.perf_counter() - started,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Refresh demand forecasts from order history.")
+    parser.add_argument("--period", choices=PERIODS, default="week")
+    parser.add_argument("--horizon", type=int, default=4, help="number of future periods")
+    parser.add_argument("--method", choices=METHODS, default="best")
+    parser.add_argument("--window", type=int, default=4, help="moving-average window")
+    parser.add_argument("--alpha", type=float, default=0.3, help="smoothing factor")
+    parser.add_argument("--include-zero", action="store_true")
+    args = parser.parse_args(argv)
+
+    report = refresh_forecasts(args.period, args.horizon, args.method, args.window,
+                               args.alpha, args.include_zero)
+    print(f"Wrote {report['rows']} forecasts for {report['skus']} SKUs in {report['seconds']:.2f}s")
+    if report["dates"]:
+        print(f"Periods {report['dates'][0]} to {report['dates'][-1]}; models: {report['methods']}")
+
+
+if __name__ == "__main__":
+    main()
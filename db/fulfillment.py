@@ -0,0 +1,133 @@
+"""Joint fulfillment planning for all pending orders.
+
+Every pending order is assigned to one warehouse at once, rather than
+order by order. Orders ship whole, so the problem is a transportation
+problem with unsplittable demand, which has no efficient exact solution
+(it is a generalized assignment problem). It is solved approximately with
+Vogel's method: the order that would lose the most by missing its cheapest
+warehouse is assigned first. The plan is usually close to the minimum
+total cost but not guaranteed to reach it. Costs and feasibility are NumPy
+arrays over orders × warehouses.
+"""
+
+from decimal import Decimal
+
+import numpy as np
+
+from db.connection import get_connection, transaction
+from db.queries import get_orders, move_order_to_customer
+from db.routing import get_route_graph
+
+
+def _warehouse_stock(tx=None):
+    """Return {(sku, location): quantity} for every non-retail stock row."""
+    conn = get_connection(tx)
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT sku, location, quantity FROM Inventory
+        WHERE quantity > 0 AND location_type = 'Warehouse'
+    """)
+    rows = cursor.fetchall()
+    cursor.close()
+    conn.close()
+    return {(sku, location): quantity for sku, location, quantity in rows}
+
+
+def plan_fulfillment(orders=None, stock=None, graph=None):
+    """Assign pending orders to warehouses at approximately minimum total transport cost.
+
+    Returns {"assignments": [...], "unassigned": [...], "total_cost": Decimal}.
+    Each assignment holds order_id, sku, quantity, origin, destination,
+    unit_cost, cost and path.
+    """
+    orders = orders if orders is not None else get_orders(status="Pending")
+    stock = stock if stock is not None else _warehouse_stock()
+    graph = graph or get_route_graph()
+
+    plan = {"assignments": [], "unassigned": [], "total_cost": Decimal("0.00")}
+    if not orders:
+        return plan
+
+    warehouses = sorted({location for _, location in stock})
+    skus = sorted({o[1] for o in orders} | {sku for sku, _ in stock})
+    sku_index = {sku: i for i, sku in enumerate(skus)}
+    warehouse_index = {w: i for i, w in enumerate(warehouses)}
+
+    available = np.zeros((len(skus), len(warehouses)))
+    for (sku, location), quantity in stock.items():
+        available[sku_index[sku], warehouse_index[location]] = quantity
+
+    # Per-unit cost from every warehouse to every order's destination
+    unit = graph.cost_matrix(warehouses, [order[4] for order in orders]).T
+
+    order_sku = np.array([sku_index[o[1]] for o in orders])
+    quantity = np.array([o[2] for o in orders], dtype=float)
+    total = unit * quantity[:, None]
+    open_orders = np.ones(len(orders), dtype=bool)
+    assigned_to = np.full(len(orders), -1)
+
+    def regrets(rows):
+        """Return (best warehouse, regret) for the given order rows."""
+        cost = np.where(available[order_sku[rows]] >= quantity[rows, None], total[rows], np.inf)
+        if cost.shape[1] > 1:
+            two = np.partition(cost, 1, axis=1)[:, :2]
+        else:
+            two = np.hstack([cost, np.full((len(rows), 1), np.inf)])
+        best = np.argmin(cost, axis=1)
+        feasible = np.isfinite(two[:, 0])
+        # An order with a single option must be served before it loses it
+        with np.errstate(invalid="ignore"):
+            regret = np.where(np.isfinite(two[:, 1]), two[:, 1] - two[:, 0], np.finfo(float).max)
+        return np.where(feasible, best, -1), np.where(feasible, regret, -np.inf)
+
+    # With no stocked warehouse every order stays unassigned
+    if warehouses:
+        best_w, regret = regrets(np.arange(len(orders)))
+    while warehouses and open_orders.any():
+        candidates = np.where(open_orders, regret, -np.inf)
+        o = int(np.argmax(candidates))
+        if candidates[o] == -np.inf:
+            break
+        w = int(best_w[o])
+        assigned_to[o] = w
+        open_orders[o] = False
+        available[order_sku[o], w] -= quantity[o]
+        # Only orders for the same SKU are affected by the stock change
+        same = np.flatnonzero(open_orders & (order_sku == order_sku[o]))
+        if same.size:
+            best_w[same], regret[same] = regrets(same)
+
+    for o, order in enumerate(orders):
+        order_id, sku, qty, _, destination = order[:5]
+        w = assigned_to[o]
+        if w < 0:
+            reason = "no route" if warehouses and not np.isfinite(unit[o]).any() else "insufficient stock"
+            plan["unassigned"].append({"order_id": order_id, "sku": sku, "quantity": qty,
+                                       "destination": destination, "reason": reason})
+            continue
+        route = graph.shortest(warehouses[w], destination)
+        cost = route["cost"] * qty
+        plan["assignments"].append({
+            "order_id": order_id,
+            "sku": sku,
+            "quantity": qty,
+            "origin": warehouses[w],
+            "destination": destination,
+            "unit_cost": route["cost"],
+            "cost": cost,
+            "path": route["path"],
+        })
+        plan["total_cost"] += cost
+    return plan
+
+
+def apply_fulfillment_plan(plan):
+    """Execute every assignment of `plan` in a single transaction.
+
+    If stock changed since planning, the failing move rolls everything back.
+    """
+    with transaction() as tx:
+        for a in plan["assignments"]:
+            move_order_to_customer(a["order_id"], a["sku"], a["quantity"],
+                                   a["origin"], a["destination"], tx=tx)
+    return len(plan["assignments"])
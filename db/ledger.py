@@ -0,0 +1,241 @@
+"""Append-only inventory ledger with periodic snapshots.
+
+Every inventory writer appends one InventoryLedger row per (sku, location)
+it changes, holding the signed change in quantity, in the same transaction
+as the change. Stock at any past moment is the nearest earlier snapshot
+plus the ledger entries after it. Current stock can be checked against, or
+rebuilt from, the ledger.
+
+    python -m db.ledger --snapshot
+    python -m db.ledger --at "2025-11-10 12:00:00"
+    python -m db.ledger --verify
+    python -m db.ledger --rebuild
+"""
+
+import argparse
+from datetime import datetime
+
+from db.connection import get_connection, transaction
+from db.counters import rebuild_counters_on
+
+INSERT_ENTRY = """
+    INSERT INTO InventoryLedger (sku, location, delta, reason)
+    VALUES (%s, %s, %s, %s)
+"""
+
+
+def record_entries(cursor, entries, reason):
+    """Append (sku, location, delta) entries on the caller's cursor; zero deltas are skipped."""
+    rows = [(sku, location, delta, reason) for sku, location, delta in entries if delta]
+    if rows:
+        cursor.executemany(INSERT_ENTRY, rows)
+
+
+def _stock_of(cursor, skus):
+    """Return {(sku, location): quantity} for every row of `skus`, locking them."""
+    if not skus:
+        return {}
+    cursor.execute(f"""
+        SELECT sku, location, quantity FROM Inventory
+        WHERE sku IN ({", ".join(["%s"] * len(skus))})
+        FOR UPDATE
+    """, tuple(skus))
+    return {(sku, location): quantity for sku, location, quantity in cursor.fetchall()}
+
+
+class LedgerTracker:
+    """Record the net change a write makes to the Inventory rows of the given SKUs.
+
+    For writers that set quantities or delete rows, where the change is not
+    known up front. Call before() ahead of the write and after() once it is
+    done, both on the writer's cursor.
+    """
+
+    def __init__(self, cursor, reason, *skus):
+        self.cursor = cursor
+        self.reason = reason
+        self.skus = sorted(set(skus))
+        self._before = {}
+
+    def before(self):
+        self._before = _stock_of(self.cursor, self.skus)
+        return self
+
+    def after(self):
+        after = _stock_of(self.cursor, self.skus)
+        record_entries(self.cursor, [
+            (sku, location, after.get((sku, location), 0) - self._before.get((sku, location), 0))
+            for sku, location in sorted(set(self._before) | set(after))
+        ], self.reason)
+
+
+def rebuild_ledger_on(cursor, reason="reset"):
+    """Restart the ledger from the current Inventory on the caller's connection."""
+    cursor.execute("DELETE FROM InventorySnapshotRows")
+    cursor.execute("DELETE FROM InventorySnapshots")
+    cursor.execute("DELETE FROM InventoryLedger")
+    cursor.execute("""
+        INSERT INTO InventoryLedger (sku, location, delta, reason)
+        SELECT sku, location, quantity, %s FROM Inventory WHERE quantity <> 0
+    """, (reason,))
+
+
+def take_snapshot():
+    """Store the current stock and the last ledger entry it includes; return the snapshot id.
+
+    The locking reads wait for in-flight inventory writers, so every ledger
+    entry up to last_entry_id is reflected in the snapshot and none after it.
+    """
+    with transaction() as tx:
+        cursor = tx.cursor()
+        cursor.execute("SELECT sku, location, quantity FROM Inventory WHERE quantity <> 0 FOR SHARE")
+        rows = cursor.fetchall()
+        cursor.execute("SELECT COALESCE(MAX(entry_id), 0) FROM InventoryLedger FOR SHARE")
+        last_entry_id = cursor.fetchone()[0]
+        cursor.execute("INSERT INTO InventorySnapshots (last_entry_id) VALUES (%s)", (last_entry_id,))
+        snapshot_id = cursor.lastrowid
+        cursor.executemany(
+            "INSERT INTO InventorySnapshotRows (snapshot_id, sku, location, quantity) VALUES (%s, %s, %s, %s)",
+            [(snapshot_id, sku, location, quantity) for sku, location, quantity in rows],
+        )
+        cursor.close()
+    return snapshot_id
+
+
+def prune_snapshots(keep=10):
+    """Delete all but the newest `keep` snapshots; return how many were removed."""
+    with transaction() as tx:
+        cursor = tx.cursor()
+        cursor.execute(
+            "SELECT snapshot_id FROM InventorySnapshots ORDER BY snapshot_id DESC LIMIT 18446744073709551615 OFFSET %s",
+            (keep,),
+        )
+        old = [row[0] for row in cursor.fetchall()]
+        if old:
+            placeholders = ", ".join(["%s"] * len(old))
+            cursor.execute(f"DELETE FROM InventorySnapshotRows WHERE snapshot_id IN ({placeholders})", old)
+            cursor.execute(f"DELETE FROM InventorySnapshots WHERE snapshot_id IN ({placeholders})", old)
+        cursor.close()
+    return len(old)
+
+
+def inventory_at(moment=None, use_snapshots=True, tx=None):
+    """Return {(sku, location): quantity} as of `moment` (default now).
+
+    Starts from the newest snapshot taken at or before `moment` and replays
+    only the ledger entries after it. Rows with zero stock are omitted.
+    """
+    conn = get_connection(tx)
+    cursor = conn.cursor()
+    stock, last_entry_id = {}, 0
+    if use_snapshots:
+        if moment is None:
+            cursor.execute("SELECT snapshot_id, last_entry_id FROM InventorySnapshots "
+                           "ORDER BY snapshot_id DESC LIMIT 1")
+        else:
+            cursor.execute("SELECT snapshot_id, last_entry_id FROM InventorySnapshots "
+                           "WHERE taken_at <= %s ORDER BY snapshot_id DESC LIMIT 1", (moment,))
+        snapshot = cursor.fetchone()
+        if snapshot:
+            snapshot_id, last_entry_id = snapshot
+            cursor.execute("SELECT sku, location, quantity FROM InventorySnapshotRows WHERE snapshot_id = %s",
+                           (snapshot_id,))
+            stock = {(sku, location): quantity for sku, location, quantity in cursor.fetchall()}
+
+    sql = """
+        SELECT sku, location, SUM(delta) FROM InventoryLedger
+        WHERE entry_id > %s {moment}
+        GROUP BY sku, location
+    """.format(moment="" if moment is None else "AND created_at <= %s")
+    cursor.execute(sql, (last_entry_id,) if moment is None else (last_entry_id, moment))
+    for sku, location, delta in cursor.fetchall():
+        stock[(sku, location)] = stock.get((sku, location), 0) + int(delta)
+    cursor.close()
+    conn.close()
+    return {key: quantity for key, quantity in stock.items() if quantity != 0}
+
+
+def verify_ledger():
+    """Return {(sku, location): (inventory, ledger)} for every row that disagrees.
+
+    The ledger side is replayed from the first entry, so snapshots are
+    checked too: compare with inventory_at() for the snapshot path.
+    """
+    with transaction() as tx:
+        cursor = tx.cursor()
+        cursor.execute("SELECT sku, location, quantity FROM Inventory WHERE quantity <> 0")
+        current = {(sku, location): quantity for sku, location, quantity in cursor.fetchall()}
+        cursor.close()
+        replayed = inventory_at(use_snapshots=False, tx=tx)
+        from_snapshot = inventory_at(tx=tx)
+    drift = {
+        key: (current.get(key, 0), replayed.get(key, 0))
+        for key in set(current) | set(replayed)
+        if current.get(key, 0) != replayed.get(key, 0)
+    }
+    drift.update({
+        ("snapshot",) + key: (replayed.get(key, 0), from_snapshot.get(key, 0))
+        for key in set(replayed) | set(from_snapshot)
+        if replayed.get(key, 0) != from_snapshot.get(key, 0)
+    })
+    return drift
+
+
+def rebuild_inventory_from_ledger():
+    """Overwrite Inventory quantities with the full ledger replay; return rows changed.
+
+    Rows the ledger does not know are set to zero. LowStock and the summary
+    counters are recomputed. No ledger entries are written, since the
+    ledger is the source of truth here.
+    """
+    with transaction() as tx:
+        cursor = tx.cursor()
+        cursor.execute("SELECT sku, location, quantity FROM Inventory FOR UPDATE")
+        current = {(sku, location): quantity for sku, location, quantity in cursor.fetchall()}
+        replayed = inventory_at(use_snapshots=False, tx=tx)
+        changes = [
+            (sku, location, replayed.get((sku, location), 0))
+            for sku, location in set(current) | set(replayed)
+            if current.get((sku, location)) != replayed.get((sku, location), 0)
+        ]
+        cursor.executemany(
+            "INSERT INTO Inventory (sku, location, quantity) VALUES (%s, %s, %s) "
+            "ON DUPLICATE KEY UPDATE quantity = VALUES(quantity)",
+            changes,
+        )
+        rebuild_counters_on(cursor)
+        cursor.close()
+    return len(changes)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inventory ledger snapshots and checks.")
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument("--snapshot", action="store_true", help="take a snapshot")
+    group.add_argument("--at", help="print stock as of a timestamp (YYYY-MM-DD HH:MM:SS)")
+    group.add_argument("--verify", action="store_true")
+    group.add_argument("--rebuild", action="store_true", help="rewrite Inventory from the ledger")
+    parser.add_argument("--keep", type=int, help="with --snapshot, prune to this many snapshots")
+    args = parser.parse_args(argv)
+
+    if args.snapshot:
+        print(f"Snapshot {take_snapshot()} taken")
+        if args.keep:
+            print(f"Pruned {prune_snapshots(args.keep)} old snapshots")
+    elif args.at:
+        for (sku, location), quantity in sorted(inventory_at(datetime.fromisoformat(args.at)).items()):
+            print(f"{sku} @ {location}: {quantity}")
+    elif args.rebuild:
+        print(f"Rebuilt {rebuild_inventory_from_ledger()} inventory rows from the ledger")
+    else:
+        drift = verify_ledger()
+        if not drift:
+            print("Inventory matches the ledger")
+            return
+        for key, (expected, actual) in sorted(drift.items()):
+            print(f"{' @ '.join(key)}: {expected} vs {actual}")
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
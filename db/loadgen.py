@@ -0,0 +1,289 @@
+"""Load generator that drives the real db.queries functions.
+
+Workers (threads or processes) pick operations from a weighted mix for a
+fixed duration and time every call. The report gives throughput, error
+counts and p50/p95/p99 latency per function, the pool counters, and the
+peak number of server connections seen while the run was going.
+
+Run it against a local or test database only: it places orders for
+customers named "loadgen-<worker>" and moves real stock. With --cleanup
+the state is saved as a scenario before the run and restored after it,
+which undoes the orders, stock moves, logs and counters of the run.
+
+    python -m db.loadgen --duration 30 --concurrency 16
+    python -m db.loadgen --workers processes --mix place_order=5,get_inventory=1
+"""
+
+import argparse
+import multiprocessing
+import random
+import threading
+import time
+
+from db.connection import connect_unpooled, get_connection, get_pool_stats
+from db.queries import (
+    generate_summary_report, get_customer_locations, get_inventory, get_orders,
+    get_orders_page, move_order_to_customer, place_order, suggest_cheapest_origin
+)
+from db.scenarios import SCENARIO_DIR, delete_scenario, restore_scenario, save_scenario
+
+CUSTOMER_PREFIX = "loadgen-"
+SNAPSHOT_SCENARIO = "loadgen-before"
+
+DEFAULT_MIX = {
+    "place_order": 40,
+    "get_orders": 25,
+    "get_inventory": 20,
+    "move_order_to_customer": 10,
+    "generate_summary_report": 5,
+}
+
+# Business-rule failures are expected under load and reported separately
+_REJECTIONS = ("Insufficient stock", "No route")
+
+
+class _Worker:
+    """One simulated user: its own customer name and random stream."""
+
+    def __init__(self, worker_id, skus, destinations, seed=None):
+        self.customer = f"{CUSTOMER_PREFIX}{worker_id}"
+        self.skus = skus
+        self.destinations = destinations
+        self.random = random.Random(seed)
+
+    def place_order(self):
+        place_order(self.random.choice(self.skus), self.random.randint(1, 3),
+                    self.customer, self.random.choice(self.destinations))
+
+    def get_orders(self):
+        get_orders(self.customer, "User")
+
+    def get_inventory(self):
+        get_inventory()
+
+    def generate_summary_report(self):
+        generate_summary_report()
+
+    def move_order_to_customer(self):
+        orders, _ = get_orders_page(status="Pending", customer=self.customer, limit=1)
+        if not orders:
+            self.place_order()
+            return
+        order_id, sku, quantity, _, destination, _ = orders[0]
+        suggestion = suggest_cheapest_origin(sku, destination)
+        if not suggestion:
+            raise Exception("Insufficient stock for loadgen order")  # noqa: W0719
+        move_order_to_customer(order_id, sku, quantity, suggestion["origin"], destination)
+
+
+def _reference_data():
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute("SELECT sku FROM Products")
+    skus = [row[0] for row in cursor.fetchall()]
+    cursor.close()
+    conn.close()
+    destinations = get_customer_locations()
+    if not skus or not destinations:
+        raise Exception("Load generation needs products and retail hub routes")  # noqa: W0719
+    return skus, destinations
+
+
+def _run_worker(worker_id, mix, duration, seed=None):
+    """Run one worker until `duration` elapses; return {name: {...}} samples."""
+    skus, destinations = _reference_data()
+    worker = _Worker(worker_id, skus, destinations, seed)
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    samples = {name: {"latencies": [], "errors": 0, "rejected": 0} for name in names}
+
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        name = worker.random.choices(names, weights)[0]
+        started = time.perf_counter()
+        try:
+            getattr(worker, name)()
+        except Exception as e:  # noqa: W0703
+            kind = "rejected" if any(r in str(e) for r in _REJECTIONS) else "errors"
+            samples[name][kind] += 1
+            continue
+        samples[name]["latencies"].append(time.perf_counter() - started)
+    return samples
+
+
+def _process_worker(args):
+    worker_id, mix, duration, seed = args
+    try:
+        return _run_worker(worker_id, mix, duration, seed), get_pool_stats(), None
+    except Exception as e:  # noqa: W0703
+        return None, get_pool_stats(), f"{type(e).__name__}: {e}"
+
+
+def _server_connections(conn):
+    cursor = conn.cursor()
+    cursor.execute("SHOW GLOBAL STATUS LIKE 'Threads_connected'")
+    value = int(cursor.fetchone()[1])
+    cursor.close()
+    return value
+
+
+def _percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+def _merge(results):
+    merged = {}
+    for samples in results:
+        for name, sample in samples.items():
+            into = merged.setdefault(name, {"latencies": [], "errors": 0, "rejected": 0})
+            into["latencies"].extend(sample["latencies"])
+            into["errors"] += sample["errors"]
+            into["rejected"] += sample["rejected"]
+    return merged
+
+
+def run_load(mix=None, duration=30.0, concurrency=8, workers="threads", seed=None):
+    """Drive the query layer and return a report dict.
+
+    The report holds "functions" ({name: {calls, errors, rejected,
+    throughput, p50_ms, p95_ms, p99_ms}}), "throughput" overall, "pool"
+    (pool counters, summed across processes), "peak_server_connections"
+    and "failed_workers" as (worker_id, error) for workers that crashed.
+    """
+    mix = {name: weight for name, weight in (mix or DEFAULT_MIX).items() if weight > 0}
+    unknown = set(mix) - set(DEFAULT_MIX)
+    if unknown:
+        raise Exception(f"Unknown operations in mix: {sorted(unknown)}")  # noqa: W0719
+
+    # The sampler has its own connection so it never competes with the workers for the pool
+    monitor = connect_unpooled()
+    peak = [_server_connections(monitor)]
+    done = threading.Event()
+
+    def sample_connections():
+        while not done.wait(0.5):
+            peak[0] = max(peak[0], _server_connections(monitor))
+
+    sampler = threading.Thread(target=sample_connections, daemon=True)
+    sampler.start()
+    started = time.monotonic()
+    try:
+        jobs = [(i, mix, duration, None if seed is None else seed + i) for i in range(concurrency)]
+        if workers == "processes":
+            with multiprocessing.get_context("spawn").Pool(concurrency) as pool:
+                outcomes = pool.map(_process_worker, jobs)
+            results = [samples for samples, _, _ in outcomes]
+            failures = [error for _, _, error in outcomes]
+            pool_stats = {}
+            for _, stats, _ in outcomes:
+                for key, value in stats.items():
+                    pool_stats[key] = pool_stats.get(key, 0) + value
+        else:
+            results = [None] * concurrency
+            failures = [None] * concurrency
+
+            def run(i):
+                try:
+                    results[i] = _run_worker(*jobs[i])
+                except Exception as e:  # noqa: W0703
+                    failures[i] = f"{type(e).__name__}: {e}"
+
+            threads = [threading.Thread(target=run, args=(i,)) for i in range(concurrency)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            pool_stats = get_pool_stats()
+    finally:
+        done.set()
+        sampler.join()
+        monitor.close()
+    elapsed = time.monotonic() - started
+
+    functions = {}
+    for name, sample in _merge(r for r in results if r is not None).items():
+        latencies = sorted(sample["latencies"])
+        functions[name] = {
+            "calls": len(latencies),
+            "errors": sample["errors"],
+            "rejected": sample["rejected"],
+            "throughput": len(latencies) / elapsed,
+        }
+        for p in (50, 95, 99):
+            value = _percentile(latencies, p / 100)
+            functions[name][f"p{p}_ms"] = None if value is None else value * 1000
+    return {
+        "seconds": elapsed,
+        "concurrency": concurrency,
+        "workers": workers,
+        "throughput": sum(f["calls"] for f in functions.values()) / elapsed,
+        "functions": functions,
+        "pool": pool_stats,
+        "peak_server_connections": peak[0],
+        "failed_workers": [(i, error) for i, error in enumerate(failures) if error is not None],
+    }
+
+
+def snapshot(directory=SCENARIO_DIR):
+    """Save the current state so cleanup() can restore it after a run."""
+    return save_scenario(SNAPSHOT_SCENARIO, directory)
+
+
+def cleanup(directory=SCENARIO_DIR):
+    """Restore the state saved by snapshot() and remove it; return {table: rows}."""
+    counts = restore_scenario(SNAPSHOT_SCENARIO, directory)
+    delete_scenario(SNAPSHOT_SCENARIO, directory)
+    return counts
+
+
+def _parse_mix(text):
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+
+def _report(report):
+    print(f"{report['concurrency']} {report['workers']} for {report['seconds']:.1f}s: "
+          f"{report['throughput']:.1f} ops/s")
+    print(f"{'function':<26}{'calls':>8}{'err':>6}{'rej':>6}{'ops/s':>9}"
+          f"{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+    for name, f in sorted(report["functions"].items()):
+        latency = "".join(f"{'-' if f[k] is None else format(f[k], '.1f'):>9}"
+                          for k in ("p50_ms", "p95_ms", "p99_ms"))
+        print(f"{name:<26}{f['calls']:>8}{f['errors']:>6}{f['rejected']:>6}"
+              f"{f['throughput']:>9.1f}{latency}")
+    pool = report["pool"]
+    print(f"pool: {pool.get('created', 0)} connections created, {pool.get('checkouts', 0)} checkouts, "
+          f"{pool.get('waits', 0)} waits, {pool.get('timeouts', 0)} timeouts")
+    print(f"peak server connections: {report['peak_server_connections']}")
+    for worker_id, error in report["failed_workers"]:
+        print(f"worker {worker_id} failed: {error}")
+
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate load against the SCMS query layer.")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds to run")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--workers", choices=["threads", "processes"], default="threads")
+    parser.add_argument("--mix", type=_parse_mix, help="e.g. place_order=4,get_orders=2")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--cleanup", action="store_true", help="restore the pre-run state afterwards")
+    args = parser.parse_args(argv)
+
+    if args.cleanup:
+        snapshot()
+    try:
+        _report(run_load(args.mix, args.duration, args.concurrency, args.workers, args.seed))
+    finally:
+        # Also after an error or Ctrl-C, so no loadgen state is left behind
+        if args.cleanup:
+            print(f"cleanup: restored {sum(cleanup().values())} rows from before the run")
+
+
+if __name__ == "__main__":
+    main()
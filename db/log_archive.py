@@ -0,0 +1,132 @@
+"""Retention for the Logs table: roll old entries into compressed archive files.
+
+Entries older than the retention period are written, oldest first and a
+batch at a time, to gzip-compressed JSON Lines files and deleted from Logs
+in the same transaction that records the file in LogArchives. The table
+the logs page queries therefore only holds recent history, and archived
+entries stay readable with read_archive().
+
+    python -m db.log_archive                    # archive entries past SCMS_LOG_RETENTION_DAYS
+    python -m db.log_archive --older-than 90
+    python -m db.log_archive --list
+"""
+
+import argparse
+import gzip
+import json
+import os
+from datetime import datetime, timedelta
+
+from db.connection import get_connection, transaction
+from db.log_writer import flush_logs
+from db.queries import write_log
+
+LOG_ARCHIVE_DIR = os.getenv("SCMS_LOG_ARCHIVE_DIR", "log_archives")
+LOG_RETENTION_DAYS = int(os.getenv("SCMS_LOG_RETENTION_DAYS", "365"))
+ARCHIVE_BATCH_SIZE = 50000
+
+COLUMNS = ("log_id", "created_at", "user_id", "action_type", "entity_type", "entity_id", "action")
+
+
+def _write_file(path, rows):
+    tmp = path + ".tmp"
+    with gzip.open(tmp, "wt", encoding="utf-8") as f:
+        for row in rows:
+            record = dict(zip(COLUMNS, row))
+            record["created_at"] = record["created_at"].isoformat() if record["created_at"] else None
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    os.replace(tmp, path)
+
+
+def archive_logs(older_than_days=LOG_RETENTION_DAYS, before=None, directory=LOG_ARCHIVE_DIR,
+                 batch_size=ARCHIVE_BATCH_SIZE):
+    """Move Logs entries created before the cutoff into archive files.
+
+    The cutoff is `before` if given, else `older_than_days` ago. Each batch
+    becomes one file and is deleted from Logs in its own transaction.
+    Returns the list of archive files written.
+    """
+    cutoff = before or datetime.now() - timedelta(days=older_than_days)
+    # Queued entries are written first so none of them outlives its batch
+    flush_logs()
+    os.makedirs(directory, exist_ok=True)
+    written = []
+    while True:
+        with transaction() as tx:
+            cursor = tx.cursor()
+            # Old entries have the lowest ids, so this walks the primary key from the start
+            cursor.execute(f"""
+                SELECT {", ".join(COLUMNS)} FROM Logs
+                WHERE created_at < %s
+                ORDER BY log_id
+                LIMIT %s
+                FOR UPDATE
+            """, (cutoff, batch_size))
+            rows = cursor.fetchall()
+            if not rows:
+                cursor.close()
+                break
+            first_id, last_id = rows[0][0], rows[-1][0]
+            path = os.path.join(directory, f"logs_{first_id:010d}_{last_id:010d}.jsonl.gz")
+            _write_file(path, rows)
+            try:
+                cursor.execute("""
+                    INSERT INTO LogArchives (path, first_log_id, last_log_id, from_ts, to_ts, row_count)
+                    VALUES (%s, %s, %s, %s, %s, %s)
+                """, (path, first_id, last_id, min(r[1] for r in rows), max(r[1] for r in rows), len(rows)))
+                cursor.execute("DELETE FROM Logs WHERE log_id BETWEEN %s AND %s AND created_at < %s",
+                               (first_id, last_id, cutoff))
+                cursor.close()
+                write_log(None, f"Archived {len(rows)} log entries to {path}", tx=tx,
+                          action_type="logs.archive")
+            except Exception:
+                os.remove(path)
+                raise
+        written.append(path)
+        if len(rows) < batch_size:
+            break
+    return written
+
+
+def list_archives(tx=None):
+    """Return LogArchives rows (archive_id, path, first_log_id, last_log_id, from_ts, to_ts, row_count), newest first."""
+    conn = get_connection(tx)
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT archive_id, path, first_log_id, last_log_id, from_ts, to_ts, row_count
+        FROM LogArchives
+        ORDER BY archive_id DESC
+    """)
+    results = cursor.fetchall()
+    cursor.close()
+    conn.close()
+    return results
+
+
+def read_archive(path):
+    """Yield the entries of an archive file as dicts, oldest first."""
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            yield json.loads(line)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Archive old Logs entries to compressed files.")
+    parser.add_argument("--older-than", type=int, default=LOG_RETENTION_DAYS, help="retention in days")
+    parser.add_argument("--directory", default=LOG_ARCHIVE_DIR)
+    parser.add_argument("--batch-size", type=int, default=ARCHIVE_BATCH_SIZE)
+    parser.add_argument("--list", action="store_true", help="list archive files instead")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        for _, path, first_id, last_id, from_ts, to_ts, count in list_archives():
+            print(f"{path}: {count} entries, #{first_id}-#{last_id}, {from_ts} to {to_ts}")
+        return
+    paths = archive_logs(args.older_than, directory=args.directory, batch_size=args.batch_size)
+    for path in paths:
+        print(f"Wrote {path}")
+    print(f"Archived into {len(paths)} files")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+"""Buffered, batched writer for the Logs audit table."""
+
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+
+from db.connection import get_connection
+
+logger = logging.getLogger(__name__)
+
+LOG_BATCH_SIZE = int(os.getenv("SCMS_LOG_BATCH_SIZE", "200"))
+LOG_FLUSH_INTERVAL = float(os.getenv("SCMS_LOG_FLUSH_INTERVAL", "1.0"))
+LOG_QUEUE_SIZE = int(os.getenv("SCMS_LOG_QUEUE_SIZE", "10000"))
+LOG_SYNC = os.getenv("SCMS_LOG_SYNC") == "1"
+
+# Entries without a known user (CLIs, background jobs) are attributed to the admin
+SYSTEM_USER_ID = 1
+
+INSERT_LOG = """
+    INSERT INTO Logs (user_id, action_type, entity_type, entity_id, action)
+    VALUES (%s, %s, %s, %s, %s)
+"""
+
+_FLUSH = object()
+_STOP = object()
+_current = threading.local()
+
+
+def set_current_user(user_id):
+    """Attribute log entries written by this thread to `user_id` (None to clear)."""
+    _current.user_id = user_id
+
+
+def current_user():
+    """Return the user set for this thread, or SYSTEM_USER_ID."""
+    user_id = getattr(_current, "user_id", None)
+    return SYSTEM_USER_ID if user_id is None else user_id
+
+
+def log_row(user_id, action, action_type="other", entity_type=None, entity_id=None):
+    """Return the INSERT_LOG parameters for one entry."""
+    return (user_id, action_type, entity_type,
+            None if entity_id is None else str(entity_id), action)
+
+
+def _insert_rows(rows):
+    """Insert log rows in one round-trip and one commit."""
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.executemany(INSERT_LOG, rows)
+    conn.commit()
+    cursor.close()
+    conn.close()
+
+
+class LogWriter:
+    """Queue log rows and flush them with executemany on a size or time trigger."""
+
+    def __init__(self, batch_size=LOG_BATCH_SIZE, flush_interval=LOG_FLUSH_INTERVAL,
+                 max_queue=LOG_QUEUE_SIZE, synchronous=LOG_SYNC):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.synchronous = synchronous
+        self.stats = {"queued": 0, "written": 0, "batches": 0, "failed": 0}
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._thread = None
+        if not synchronous:
+            self._thread = threading.Thread(target=self._run, name="scms-log-writer", daemon=True)
+            self._thread.start()
+
+    def write(self, row):
+        """Record a log_row(); blocks only when the queue is full."""
+        if self.synchronous:
+            self._write_batch([row])
+            return
+        self._queue.put(row)
+        self.stats["queued"] += 1
+
+    def flush(self):
+        """Block until every row queued so far has been written."""
+        if self._thread is None or not self._thread.is_alive():
+            return
+        self._queue.put(_FLUSH)
+        self._queue.join()
+
+    def close(self):
+        """Flush pending rows and stop the background thread."""
+        if self._thread is None:
+            return
+        if self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join()
+        self._thread = None
+
+    def _write_batch(self, rows):
+        try:
+            _insert_rows(rows)
+            self.stats["written"] += len(rows)
+            self.stats["batches"] += 1
+        except Exception:  # noqa: W0703
+            self.stats["failed"] += len(rows)
+            logger.exception("Failed to write %d log rows", len(rows))
+            if self.synchronous:
+                raise
+
+    def _run(self):
+        batch = []
+        pending = 0  # queue items (rows and markers) taken but not yet acknowledged
+        deadline = None
+        while True:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                item = self._queue.get(timeout=timeout)
+                pending += 1
+            except queue.Empty:
+                item = _FLUSH
+
+            if item is not _FLUSH and item is not _STOP:
+                batch.append(item)
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_interval
+
+            if batch and (item is _FLUSH or item is _STOP or len(batch) >= self.batch_size):
+                self._write_batch(batch)
+                batch = []
+                deadline = None
+
+            if batch == [] and pending:
+                for _ in range(pending):
+                    self._queue.task_done()
+                pending = 0
+            if item is _STOP:
+                return
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_log_writer():
+    """Return the process-wide log writer, starting it on first use."""
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = LogWriter()
+    return _writer
+
+
+def configure_log_writer(**kwargs):
+    """Replace the process-wide writer, e.g. synchronous=True in tests."""
+    global _writer
+    with _writer_lock:
+        old, _writer = _writer, LogWriter(**kwargs)
+    if old is not None:
+        old.close()
+
+
+def flush_logs():
+    """Write out every queued log row."""
+    if _writer is not None:
+        _writer.flush()
+
+
+def _shutdown():
+    if _writer is not None:
+        _writer.close()
+
+
+atexit.register(_shutdown)
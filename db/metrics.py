@@ -0,0 +1,207 @@
+"""Opt-in instrumentation of the query functions.
+
+Every public function of db.queries is wrapped at import time. While
+metrics are disabled (the default) a wrapper only checks a flag; once
+enabled, through SCMS_METRICS=1 or enable_metrics(), each call records
+its latency, rows returned and pooled connections opened, keyed by
+function and by the Streamlit page that issued it. Times are inclusive,
+so a function that calls another is charged for both.
+
+The data shows on the Debug page and exports in Prometheus text format,
+either to a file (write_prometheus) or from a local HTTP endpoint started
+with serve_metrics() or SCMS_METRICS_PORT.
+"""
+
+import functools
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from db.connection import get_pool_stats, thread_checkouts
+
+# Upper bounds of the latency histogram buckets, in seconds
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+_enabled = os.getenv("SCMS_METRICS", "").lower() in ("1", "true", "yes")
+_lock = threading.Lock()
+_series = {}  # (page, function) -> counters
+_server = None
+
+
+def enable_metrics(enabled=True):
+    """Turn recording on or off for the whole process."""
+    global _enabled
+    _enabled = enabled
+
+
+def metrics_enabled():
+    return _enabled
+
+
+def reset_metrics():
+    """Forget everything recorded so far."""
+    with _lock:
+        _series.clear()
+
+
+def _calling_page():
+    """Name of the Streamlit script on the call stack, e.g. "logistics_simulator"."""
+    frame = sys._getframe(2)
+    while frame is not None:
+        path = frame.f_code.co_filename
+        parent, filename = os.path.split(path)
+        if os.path.basename(parent) == "pages" or filename == "main.py":
+            return os.path.splitext(filename)[0]
+        frame = frame.f_back
+    return "none"
+
+
+def _row_count(result):
+    if isinstance(result, list):
+        return len(result)
+    # Paged queries return (rows, next_before_id)
+    if isinstance(result, tuple) and len(result) == 2 and isinstance(result[0], list):
+        return len(result[0])
+    return 0
+
+
+def _record(page, function, seconds, rows, connections, failed):
+    with _lock:
+        series = _series.get((page, function))
+        if series is None:
+            series = _series[(page, function)] = {
+                "calls": 0, "errors": 0, "seconds": 0.0, "rows": 0,
+                "connections": 0, "buckets": [0] * (len(BUCKETS) + 1),
+            }
+        series["calls"] += 1
+        series["errors"] += failed
+        series["seconds"] += seconds
+        series["rows"] += rows
+        series["connections"] += connections
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                series["buckets"][i] += 1
+                break
+        else:
+            series["buckets"][-1] += 1
+
+
+def instrument(func):
+    """Wrap `func` so that calls are recorded while metrics are enabled."""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not _enabled:
+            return func(*args, **kwargs)
+        page = _calling_page()
+        checkouts = thread_checkouts()
+        started = time.perf_counter()
+        failed = True
+        result = None
+        try:
+            result = func(*args, **kwargs)
+            failed = False
+            return result
+        finally:
+            _record(page, func.__name__, time.perf_counter() - started,
+                    _row_count(result), thread_checkouts() - checkouts, failed)
+    wrapper.instrumented = True
+    return wrapper
+
+
+def instrument_module(namespace):
+    """Instrument every public function defined in the module `namespace`."""
+    module = namespace["__name__"]
+    for name, value in list(namespace.items()):
+        if (callable(value) and not name.startswith("_") and not isinstance(value, type)
+                and getattr(value, "__module__", None) == module
+                and not getattr(value, "instrumented", False)):
+            namespace[name] = instrument(value)
+
+
+def get_metrics():
+    """Return [{page, function, calls, errors, seconds, rows, connections, buckets}]."""
+    with _lock:
+        return [
+            dict(series, page=page, function=function, buckets=list(series["buckets"]))
+            for (page, function), series in sorted(_series.items())
+        ]
+
+
+def _labels(**labels):
+    return "{" + ",".join(f'{k}="{v}"' for k, v in labels.items()) + "}"
+
+
+def render_prometheus():
+    """Return all metrics, plus pool gauges, in Prometheus text format."""
+    lines = []
+    metrics = get_metrics()
+
+    def family(name, kind, help_text, samples):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        lines.extend(samples)
+
+    family("scms_query_calls_total", "counter", "Query function calls.", [
+        f"scms_query_calls_total{_labels(page=m['page'], function=m['function'])} {m['calls']}"
+        for m in metrics])
+    family("scms_query_errors_total", "counter", "Query function calls that raised.", [
+        f"scms_query_errors_total{_labels(page=m['page'], function=m['function'])} {m['errors']}"
+        for m in metrics])
+    family("scms_query_rows_total", "counter", "Rows returned by query functions.", [
+        f"scms_query_rows_total{_labels(page=m['page'], function=m['function'])} {m['rows']}"
+        for m in metrics])
+    family("scms_query_connections_total", "counter", "Pooled connections checked out by query functions.", [
+        f"scms_query_connections_total{_labels(page=m['page'], function=m['function'])} {m['connections']}"
+        for m in metrics])
+
+    histogram = []
+    for m in metrics:
+        cumulative = 0
+        for bound, count in zip(BUCKETS + ("+Inf",), m["buckets"]):
+            cumulative += count
+            histogram.append("scms_query_duration_seconds_bucket"
+                             f"{_labels(page=m['page'], function=m['function'], le=bound)} {cumulative}")
+        labels = _labels(page=m["page"], function=m["function"])
+        histogram.append(f"scms_query_duration_seconds_sum{labels} {m['seconds']:.6f}")
+        histogram.append(f"scms_query_duration_seconds_count{labels} {m['calls']}")
+    family("scms_query_duration_seconds", "histogram", "Query function latency.", histogram)
+
+    family("scms_pool", "gauge", "Connection pool counters.", [
+        f"scms_pool{_labels(stat=stat)} {value}" for stat, value in sorted(get_pool_stats().items())])
+    return "\n".join(lines) + "\n"
+
+
+def write_prometheus(path):
+    """Write render_prometheus() to `path` atomically (for a textfile collector)."""
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(render_prometheus())
+    os.replace(tmp, path)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def serve_metrics(port, host="127.0.0.1"):
+    """Serve /metrics from a background thread; calling it again is a no-op."""
+    global _server
+    if _server is None:
+        _server = ThreadingHTTPServer((host, port), _MetricsHandler)
+        threading.Thread(target=_server.serve_forever, daemon=True).start()
+    return _server.server_address
+
+
+if os.getenv("SCMS_METRICS_PORT"):
+    serve_metrics(int(os.environ["SCMS_METRICS_PORT"]))
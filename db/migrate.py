@@ -0,0 +1,231 @@
+"""Forward-only schema migrations and an index check for the hot queries.
+
+Migrations are the numbered files in db/migrations (0001_baseline.sql,
+0002_...); a .py migration defines upgrade(cursor) for changes that need
+code rather than SQL. Each applied version is recorded in
+schema_migrations, so running the tool again only applies what is new.
+CREATE INDEX and ALTER TABLE ... ADD COLUMN statements are skipped when the
+index or column already exists, so a database bootstrapped from
+db/schema.sql can be brought under version control without errors.
+
+    python -m db.migrate            # apply pending migrations
+    python -m db.migrate --status   # list applied and pending versions
+    python -m db.migrate --check    # apply, then EXPLAIN the hot queries
+"""
+
+import argparse
+import importlib.util
+import os
+import re
+
+from db.connection import get_connection
+from db.forecasting import DELETE_GENERATED_SQL
+from db.queries import (
+    LOCK_ORDER_SQL, LOGISTICS_PAGE_SQL, LOGS_PAGE_SQL, LOW_STOCK_SQL, ORDERS_PAGE_SQL, PAGE_SIZE,
+    PRODUCTS_BY_WAREHOUSE_SQL, STOCK_FOR_SKUS_SQL, WAREHOUSE_STOCK_SQL, page_query
+)
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "migrations")
+
+_FILENAME = re.compile(r"^(\d+)_(\w+)\.(?:sql|py)$")
+_CREATE_INDEX = re.compile(r"^CREATE\s+(?:UNIQUE\s+|FULLTEXT\s+)?INDEX\s+`?(\w+)`?\s+ON\s+`?(\w+)`?", re.I)
+_ADD_COLUMN = re.compile(r"^ALTER\s+TABLE\s+`?(\w+)`?\s+ADD\s+COLUMN\s+`?(\w+)`?", re.I)
+
+# Plan rows reading more than this many rows with a full scan fail the check
+PLAN_ROW_THRESHOLD = 1000
+# Tables read whole by design: small reference data, and the maintained alert set
+SCAN_ALLOWED = {"Products", "Users", "Routes", "LowStock"}
+
+_TABLE_ALIAS = re.compile(
+    r"\b(?:FROM|JOIN)\s+`?(\w+)`?(?:\s+(?!(?:WHERE|JOIN|ON|LEFT|RIGHT|INNER|ORDER|GROUP|LIMIT|FOR)\b)(\w+))?",
+    re.I,
+)
+
+
+def _page(select_sql, id_column, *filters):
+    return page_query(select_sql, id_column, list(filters), before_id=2**31 - 1, limit=PAGE_SIZE)
+
+
+# The hot queries, built from the SQL the query modules run, as (name, sql, params).
+# Each must be answerable from an index; see check_query_plans().
+PLAN_CHECKS = [
+    ("orders by status", *_page(ORDERS_PAGE_SQL, "order_id", ("status = %s", "Pending"))),
+    ("orders by customer", *_page(ORDERS_PAGE_SQL, "order_id", ("customer_name = %s", "user1"))),
+    ("orders by location", *_page(ORDERS_PAGE_SQL, "order_id", ("customer_location = %s", "Retail Hub 1"))),
+    ("order by id", LOCK_ORDER_SQL, (1,)),
+    ("products by warehouse", PRODUCTS_BY_WAREHOUSE_SQL, ("Warehouse A",)),
+    ("low stock", LOW_STOCK_SQL, ()),
+    ("cheapest origin stock", WAREHOUSE_STOCK_SQL, ("SKU001",)),
+    ("fulfillment options stock", STOCK_FOR_SKUS_SQL.format(placeholders="%s, %s"), ("SKU001", "SKU002")),
+    ("logistics by sku", *_page(LOGISTICS_PAGE_SQL, "logistics_id", ("sku = %s", "SKU001"))),
+    ("logistics page", *_page(LOGISTICS_PAGE_SQL, "logistics_id")),
+    ("logs by user", *_page(LOGS_PAGE_SQL, "l.log_id", ("l.user_id = %s", 1))),
+    ("logs by entity", *_page(LOGS_PAGE_SQL, "l.log_id", ("l.entity_type = %s", "product"),
+                              ("l.entity_id = %s", "SKU001"))),
+    ("logs by action type", *_page(LOGS_PAGE_SQL, "l.log_id", ("l.action_type = %s", "inventory.move"))),
+    ("logs by time range", *_page(LOGS_PAGE_SQL, "l.log_id", ("l.created_at >= %s", "2025-01-01"),
+                                  ("l.created_at < %s", "2025-02-01"))),
+    ("generated forecasts by date", DELETE_GENERATED_SQL, ("2025-01-01", "2025-12-31")),
+]
+
+
+def list_migrations(directory=MIGRATIONS_DIR):
+    """Return [(version, name, path)] for every migration file, in order."""
+    migrations = []
+    for filename in os.listdir(directory):
+        match = _FILENAME.match(filename)
+        if match:
+            migrations.append((int(match.group(1)), match.group(2), os.path.join(directory, filename)))
+    migrations.sort()
+    versions = [version for version, _, _ in migrations]
+    if len(versions) != len(set(versions)):
+        raise Exception("Duplicate migration version in " + directory)  # noqa: W0719
+    return migrations
+
+
+def split_statements(sql):
+    """Split a migration file into statements, dropping `--` comments."""
+    lines = [line for line in sql.splitlines() if not line.strip().startswith("--")]
+    return [s.strip() for s in "\n".join(lines).split(";") if s.strip()]
+
+
+def _ensure_version_table(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INT PRIMARY KEY,
+            name VARCHAR(100) NOT NULL,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        ) ENGINE=InnoDB
+    """)
+
+
+def _already_applied(cursor, statement):
+    """True if `statement` adds an index or column that already exists."""
+    match = _CREATE_INDEX.match(statement)
+    if match:
+        cursor.execute("""
+            SELECT COUNT(*) FROM information_schema.statistics
+            WHERE table_schema = DATABASE() AND table_name = %s AND index_name = %s
+        """, (match.group(2), match.group(1)))
+        return cursor.fetchone()[0] > 0
+    match = _ADD_COLUMN.match(statement)
+    if match:
+        cursor.execute("""
+            SELECT COUNT(*) FROM information_schema.columns
+            WHERE table_schema = DATABASE() AND table_name = %s AND column_name = %s
+        """, match.groups())
+        return cursor.fetchone()[0] > 0
+    return False
+
+
+def _run_python_migration(path, cursor):
+    """Load a .py migration and call its upgrade(cursor)."""
+    spec = importlib.util.spec_from_file_location(f"scms_migration_{os.path.basename(path)[:-3]}", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    module.upgrade(cursor)
+
+
+def applied_versions():
+    """Return the set of migration versions recorded in schema_migrations."""
+    conn = get_connection()
+    cursor = conn.cursor()
+    _ensure_version_table(cursor)
+    cursor.execute("SELECT version FROM schema_migrations")
+    versions = {row[0] for row in cursor.fetchall()}
+    cursor.close()
+    conn.close()
+    return versions
+
+
+def migrate(directory=MIGRATIONS_DIR):
+    """Apply every pending migration in version order; return the versions applied.
+
+    MySQL commits DDL implicitly, so a migration is not atomic: if one fails
+    midway, fix the file and rerun. Statements that already took effect are
+    skipped by the index/column checks or by IF NOT EXISTS.
+    """
+    done = applied_versions()
+    pending = [m for m in list_migrations(directory) if m[0] not in done]
+    applied = []
+    conn = get_connection()
+    cursor = conn.cursor()
+    try:
+        for version, name, path in pending:
+            if path.endswith(".py"):
+                _run_python_migration(path, cursor)
+            else:
+                with open(path, encoding="utf-8") as f:
+                    statements = split_statements(f.read())
+                for statement in statements:
+                    if not _already_applied(cursor, statement):
+                        cursor.execute(statement)
+            cursor.execute(
+                "INSERT INTO schema_migrations (version, name) VALUES (%s, %s)",
+                (version, name),
+            )
+            conn.commit()
+            applied.append(version)
+    except Exception as e:
+        conn.rollback()
+        raise Exception(f"Migration {version}_{name} failed: {e}") from e  # noqa: W0719
+    finally:
+        cursor.close()
+        conn.close()
+    return applied
+
+
+def check_query_plans(checks=PLAN_CHECKS):
+    """EXPLAIN each check query; return [(name, table)] for every full scan.
+
+    A plan row fails when it reads the whole table (type ALL) and either
+    no index could be used or the optimizer expects more than
+    PLAN_ROW_THRESHOLD rows. On tiny tables MySQL may prefer a scan over a
+    usable index, which the threshold tolerates. Tables in SCAN_ALLOWED
+    never fail.
+    """
+    failures = []
+    conn = get_connection()
+    cursor = conn.cursor(dictionary=True)
+    for name, sql, params in checks:
+        tables = {}
+        for table, alias in _TABLE_ALIAS.findall(sql):
+            tables[table] = tables[alias or table] = table
+        cursor.execute("EXPLAIN " + sql, params)
+        for row in cursor.fetchall():
+            table = tables.get(row["table"], row["table"])
+            if row["type"] != "ALL" or table in SCAN_ALLOWED:
+                continue
+            if not row["possible_keys"] or (row["rows"] or 0) > PLAN_ROW_THRESHOLD:
+                failures.append((name, table))
+    cursor.close()
+    conn.close()
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Apply schema migrations.")
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("--status", action="store_true", help="list applied and pending versions")
+    group.add_argument("--check", action="store_true", help="also fail on full-scan query plans")
+    args = parser.parse_args(argv)
+
+    if args.status:
+        done = applied_versions()
+        for version, name, _ in list_migrations():
+            print(f"{version:04d} {name}: {'applied' if version in done else 'pending'}")
+        return
+
+    applied = migrate()
+    print(f"Applied {len(applied)} migrations" + (f": {applied}" if applied else ""))
+    if args.check:
+        failures = check_query_plans()
+        for name, table in failures:
+            print(f"Full scan of {table} in query '{name}'")
+        if failures:
+            raise SystemExit(1)
+        print(f"All {len(PLAN_CHECKS)} query plans use an index")
+
+
+if __name__ == "__main__":
+    main()
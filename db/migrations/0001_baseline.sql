@@ -0,0 +1,86 @@
+-- Baseline schema: the tables as they existed before versioned migrations.
+-- Later migrations add what was introduced since. Safe to apply to a
+-- database created from db/schema.sql.
+
+-- Users Table
+CREATE TABLE IF NOT EXISTS Users (
+    user_id INT AUTO_INCREMENT PRIMARY KEY,
+    username VARCHAR(50) UNIQUE NOT NULL,
+    password VARCHAR(100) NOT NULL,
+    role ENUM('Admin', 'User') NOT NULL
+) ENGINE=InnoDB;
+
+-- Products Table
+CREATE TABLE IF NOT EXISTS Products (
+    sku VARCHAR(20) PRIMARY KEY,
+    name VARCHAR(100) NOT NULL,
+    description TEXT,
+    threshold INT DEFAULT 10
+) ENGINE=InnoDB;
+
+-- Inventory Table
+CREATE TABLE IF NOT EXISTS Inventory (
+    inventory_id INT AUTO_INCREMENT PRIMARY KEY,
+    sku VARCHAR(20) NOT NULL,
+    location VARCHAR(100) NOT NULL,
+    quantity INT DEFAULT 0 CHECK (quantity >= 0),
+    FOREIGN KEY (sku) REFERENCES Products(sku),
+    UNIQUE KEY unique_sku_location (sku, location)
+) ENGINE=InnoDB;
+
+-- Orders Table
+CREATE TABLE IF NOT EXISTS Orders (
+    order_id INT AUTO_INCREMENT PRIMARY KEY,
+    sku VARCHAR(20) NOT NULL,
+    quantity INT NOT NULL,
+    customer_name VARCHAR(100),
+    customer_location VARCHAR(100) NOT NULL,
+    status ENUM('Pending', 'Processed') DEFAULT 'Pending',
+    FOREIGN KEY (sku) REFERENCES Products(sku),
+    INDEX idx_status (status)  -- ✅ Faster filtering by order status
+) ENGINE=InnoDB;
+
+-- Logistics Table
+CREATE TABLE IF NOT EXISTS Logistics (
+    logistics_id INT AUTO_INCREMENT PRIMARY KEY,
+    sku VARCHAR(20) NOT NULL,
+    origin VARCHAR(100) NOT NULL,
+    destination VARCHAR(100) NOT NULL,
+    transport_cost DECIMAL(10,2) NOT NULL,
+    FOREIGN KEY (sku) REFERENCES Products(sku)
+) ENGINE=InnoDB;
+
+-- Routes Table
+CREATE TABLE IF NOT EXISTS Routes (
+    route_id INT AUTO_INCREMENT PRIMARY KEY,
+    origin VARCHAR(100) NOT NULL,
+    destination VARCHAR(100) NOT NULL,
+    cost DECIMAL(10,2) NOT NULL,
+    distance_km DECIMAL(6,2),
+    UNIQUE KEY unique_route (origin, destination),
+    INDEX idx_origin_dest (origin, destination)
+) ENGINE=InnoDB;
+
+-- Demand Forecast Table
+CREATE TABLE IF NOT EXISTS DemandForecast (
+    forecast_id INT AUTO_INCREMENT PRIMARY KEY,
+    sku VARCHAR(20) NOT NULL,
+    forecast_value INT NOT NULL,
+    forecast_date DATE NOT NULL,
+    FOREIGN KEY (sku) REFERENCES Products(sku)
+) ENGINE=InnoDB;
+
+-- Reports Table
+CREATE TABLE IF NOT EXISTS Reports (
+    report_id INT AUTO_INCREMENT PRIMARY KEY,
+    generated_by VARCHAR(50) NOT NULL,
+    summary TEXT
+) ENGINE=InnoDB;
+
+-- Logs Table
+CREATE TABLE IF NOT EXISTS Logs (
+    log_id INT AUTO_INCREMENT PRIMARY KEY,
+    user_id INT NOT NULL,
+    action TEXT NOT NULL,
+    FOREIGN KEY (user_id) REFERENCES Users(user_id)
+) ENGINE=InnoDB;
@@ -0,0 +1,25 @@
+-- Columns and tables added before versioned migrations existed: the stored
+-- location type, created_at timestamps, the LowStock set and the summary
+-- counters. 0003 fills LowStock and the counters from the base tables.
+
+ALTER TABLE Inventory ADD COLUMN location_type ENUM('Warehouse', 'Retail Hub') AS (
+    IF(location LIKE 'Retail Hub%', 'Retail Hub', 'Warehouse')
+) STORED;
+
+ALTER TABLE Orders ADD COLUMN created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP;
+ALTER TABLE Logistics ADD COLUMN created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP;
+ALTER TABLE Logs ADD COLUMN created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP;
+
+-- Low Stock Table (warehouse rows below threshold, maintained by inventory writers)
+CREATE TABLE IF NOT EXISTS LowStock (
+    sku VARCHAR(20) NOT NULL,
+    location VARCHAR(100) NOT NULL,
+    PRIMARY KEY (sku, location),
+    FOREIGN KEY (sku) REFERENCES Products(sku) ON DELETE CASCADE
+) ENGINE=InnoDB;
+
+-- Summary Counters (maintained by writers, read by generate_summary_report)
+CREATE TABLE IF NOT EXISTS SummaryCounters (
+    name VARCHAR(50) PRIMARY KEY,
+    value DECIMAL(14,2) NOT NULL DEFAULT 0
+) ENGINE=InnoDB;
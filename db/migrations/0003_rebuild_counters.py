@@ -0,0 +1,7 @@
+"""Compute LowStock and the summary counters from the existing data."""
+
+from db.counters import rebuild_counters_on
+
+
+def upgrade(cursor):
+    rebuild_counters_on(cursor)
@@ -0,0 +1,12 @@
+-- Indexes behind the keyset-paginated and filtered queries in db/queries.py.
+-- Inventory(sku, location) is already covered by unique_sku_location and
+-- Logistics(logistics_id) by the primary key.
+
+CREATE INDEX idx_orders_status_id ON Orders (status, order_id);
+CREATE INDEX idx_orders_customer_id ON Orders (customer_name, order_id);
+CREATE INDEX idx_orders_location_id ON Orders (customer_location, order_id);
+CREATE INDEX idx_routes_origin_dest_cost ON Routes (origin, destination, cost);
+CREATE INDEX idx_routes_destination ON Routes (destination);
+CREATE INDEX idx_logistics_sku_id ON Logistics (sku, logistics_id);
+CREATE INDEX idx_inventory_location ON Inventory (location);
+CREATE INDEX idx_forecast_date ON DemandForecast (forecast_date);
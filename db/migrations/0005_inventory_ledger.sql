@@ -0,0 +1,33 @@
+-- Append-only stock movements and periodic snapshots (see db/ledger.py).
+
+CREATE TABLE IF NOT EXISTS InventoryLedger (
+    entry_id BIGINT AUTO_INCREMENT PRIMARY KEY,
+    sku VARCHAR(20) NOT NULL,
+    location VARCHAR(100) NOT NULL,
+    delta INT NOT NULL,
+    reason VARCHAR(20) NOT NULL,
+    created_at TIMESTAMP(6) DEFAULT CURRENT_TIMESTAMP(6),
+    INDEX idx_ledger_created (created_at),
+    INDEX idx_ledger_sku_location (sku, location, entry_id)
+) ENGINE=InnoDB;
+
+CREATE TABLE IF NOT EXISTS InventorySnapshots (
+    snapshot_id INT AUTO_INCREMENT PRIMARY KEY,
+    taken_at TIMESTAMP(6) DEFAULT CURRENT_TIMESTAMP(6),
+    last_entry_id BIGINT NOT NULL,
+    INDEX idx_snapshots_taken (taken_at)
+) ENGINE=InnoDB;
+
+CREATE TABLE IF NOT EXISTS InventorySnapshotRows (
+    snapshot_id INT NOT NULL,
+    sku VARCHAR(20) NOT NULL,
+    location VARCHAR(100) NOT NULL,
+    quantity INT NOT NULL,
+    PRIMARY KEY (snapshot_id, sku, location),
+    FOREIGN KEY (snapshot_id) REFERENCES InventorySnapshots(snapshot_id) ON DELETE CASCADE
+) ENGINE=InnoDB;
+
+-- Existing stock becomes the opening balance of an empty ledger
+INSERT INTO InventoryLedger (sku, location, delta, reason)
+SELECT sku, location, quantity, 'opening' FROM Inventory
+WHERE quantity <> 0 AND NOT EXISTS (SELECT 1 FROM InventoryLedger);
@@ -0,0 +1,23 @@
+-- Structured audit log: action type and entity keys, indexed filters,
+-- full-text search over the action text, and a catalogue of archive files
+-- (see db/log_archive.py).
+
+ALTER TABLE Logs ADD COLUMN action_type VARCHAR(30) NOT NULL DEFAULT 'other' AFTER user_id;
+ALTER TABLE Logs ADD COLUMN entity_type VARCHAR(30) NULL AFTER action_type;
+ALTER TABLE Logs ADD COLUMN entity_id VARCHAR(100) NULL AFTER entity_type;
+
+CREATE INDEX idx_logs_created ON Logs (created_at);
+CREATE INDEX idx_logs_type ON Logs (action_type, log_id);
+CREATE INDEX idx_logs_entity ON Logs (entity_type, entity_id, log_id);
+CREATE FULLTEXT INDEX ft_logs_action ON Logs (action);
+
+CREATE TABLE IF NOT EXISTS LogArchives (
+    archive_id INT AUTO_INCREMENT PRIMARY KEY,
+    path VARCHAR(255) NOT NULL,
+    first_log_id INT NOT NULL,
+    last_log_id INT NOT NULL,
+    from_ts TIMESTAMP NULL,
+    to_ts TIMESTAMP NULL,
+    row_count INT NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+) ENGINE=InnoDB;
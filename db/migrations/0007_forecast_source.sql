@@ -0,0 +1,6 @@
+-- Tell generated forecasts (db/forecasting.py) from ones entered by hand,
+-- so a refresh only replaces its own rows.
+
+ALTER TABLE DemandForecast ADD COLUMN source VARCHAR(20) NOT NULL DEFAULT 'manual';
+
+CREATE INDEX idx_forecast_source_date ON DemandForecast (source, forecast_date);
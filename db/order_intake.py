@@ -0,0 +1,274 @@
+"""Streaming order intake from a file, stdin or a local socket.
+
+Each record is a JSON object (or a CSV row for .csv files) with
+sku, quantity, customer_name and customer_location.
+
+    python -m db.order_intake orders.jsonl
+    producer | python -m db.order_intake -
+    python -m db.order_intake tcp://127.0.0.1:9100
+"""
+
+import argparse
+import csv
+import json
+import queue
+import socket
+import sys
+import threading
+import time
+
+from db.connection import transaction
+from db.counters import bump_counter
+from db.queries import get_customer_locations, write_log
+
+BATCH_SIZE = 500
+QUEUE_SIZE = 5000
+REFERENCE_TTL = 60.0
+
+INSERT_ORDER = """
+    INSERT INTO Orders (sku, quantity, customer_name, customer_location, status)
+    VALUES (%s, %s, %s, %s, 'Pending')
+"""
+
+_EOF = object()
+
+
+def _parse_quantity(value):
+    """Return `value` as an int, rejecting fractions and non-numbers."""
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, (int, str)) and not isinstance(value, bool):
+        try:
+            return int(str(value).strip())
+        except ValueError:
+            pass
+    raise ValueError("quantity must be a whole number")
+
+
+class ReferenceData:
+    """Cached SKUs and Retail Hub destinations used to validate orders."""
+
+    def __init__(self, ttl=REFERENCE_TTL):
+        self.ttl = ttl
+        self.skus = set()
+        self.destinations = set()
+        self._loaded_at = None
+
+    def refresh(self):
+        with transaction() as tx:
+            cursor = tx.cursor()
+            cursor.execute("SELECT sku FROM Products")
+            self.skus = {row[0] for row in cursor.fetchall()}
+            cursor.close()
+            self.destinations = set(get_customer_locations(tx=tx))
+        self._loaded_at = time.monotonic()
+
+    def _stale(self):
+        return self._loaded_at is None or time.monotonic() - self._loaded_at > self.ttl
+
+    def validate(self, record):
+        """Return a clean order tuple or raise ValueError."""
+        if self._stale():
+            self.refresh()
+        sku = str(record.get("sku") or "").strip().upper()
+        location = str(record.get("customer_location") or "").strip()
+        customer = str(record.get("customer_name") or "").strip()
+        quantity = _parse_quantity(record.get("quantity"))
+        if quantity < 1:
+            raise ValueError("quantity must be >= 1")
+        if sku not in self.skus:
+            raise ValueError(f"unknown SKU {sku!r}")
+        if location not in self.destinations:
+            raise ValueError(f"unknown destination {location!r}")
+        return sku, quantity, customer, location
+
+
+def _parse_lines(lines, fmt):
+    """Yield (record, error) for each non-empty input line."""
+    if fmt == "csv":
+        for record in csv.DictReader(lines):
+            yield record, None
+        return
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line), None
+        except ValueError as e:
+            yield None, f"invalid JSON: {e}"
+
+
+def _iter_socket(address, stop):
+    host, port = address.rsplit(":", 1)
+    with socket.create_server((host, int(port))) as server:
+        server.settimeout(0.5)
+        while not stop.is_set():
+            try:
+                client, _ = server.accept()
+            except socket.timeout:
+                continue
+            with client, client.makefile("r", encoding="utf-8") as lines:
+                yield from _parse_lines(lines, "jsonl")
+
+
+def _iter_source(source, stop):
+    if source == "-":
+        yield from _parse_lines(sys.stdin, "jsonl")
+    elif source.startswith("tcp://"):
+        yield from _iter_socket(source[len("tcp://"):], stop)
+    else:
+        fmt = "csv" if source.lower().endswith(".csv") else "jsonl"
+        with open(source, newline="", encoding="utf-8") as lines:
+            yield from _parse_lines(lines, fmt)
+
+
+class OrderIntake:
+    """Reader thread feeding a bounded queue; the caller's thread batch-inserts."""
+
+    def __init__(self, batch_size=BATCH_SIZE, queue_size=QUEUE_SIZE,
+                 flush_interval=1.0, reference=None, user_id=None):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.reference = reference or ReferenceData()
+        self.user_id = user_id
+        self.stats = {"received": 0, "inserted": 0, "rejected": 0, "batches": 0,
+                      "failed": 0, "failed_batches": 0, "errors": {}}
+        self.error = None
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._stop = threading.Event()
+
+    def stop(self):
+        self._stop.set()
+
+    def _reject(self, reason):
+        self.stats["rejected"] += 1
+        # Count by kind of error, not by offending value
+        kind = reason.split(" '", 1)[0].split(":", 1)[0]
+        self.stats["errors"][kind] = self.stats["errors"].get(kind, 0) + 1
+
+    def _read(self, records):
+        try:
+            for item in records:
+                # put() blocks when the writer falls behind (backpressure)
+                self._queue.put(item)
+                if self._stop.is_set():
+                    break
+        except Exception as e:  # noqa: W0703
+            # Handed to run(), which raises it once the queued orders are in
+            self.error = e
+        finally:
+            self._queue.put(_EOF)
+
+    def _insert(self, batch):
+        try:
+            with transaction() as tx:
+                cursor = tx.cursor()
+                cursor.executemany(INSERT_ORDER, batch)
+                bump_counter(cursor, "total_orders", len(batch))
+                cursor.close()
+                write_log(self.user_id, f"Order intake: inserted {len(batch)} orders", tx=tx,
+                          action_type="order.intake")
+        except Exception as e:  # noqa: W0703
+            # The batch was rolled back as a whole; count it and keep consuming
+            self.stats["failed"] += len(batch)
+            self.stats["failed_batches"] += 1
+            self.stats["last_failure"] = str(e)
+            return
+        self.stats["inserted"] += len(batch)
+        self.stats["batches"] += 1
+
+    def _accept(self, item, batch):
+        """Validate one (record, error) pair into `batch` or count the rejection."""
+        record, error = item
+        self.stats["received"] += 1
+        if error is None:
+            try:
+                batch.append(self.reference.validate(record))
+            except (ValueError, TypeError, AttributeError) as e:
+                error = str(e)
+        if error is not None:
+            self._reject(error)
+
+    def run(self, records):
+        """Consume (record, error) pairs until exhausted; return stats.
+
+        On Ctrl-C the reader is stopped and everything already queued is
+        validated and inserted before returning. An error raised while
+        reading the source is re-raised after that, with the stats kept on
+        `self.stats`. Batches that fail to insert are counted in "failed"
+        and "failed_batches".
+        """
+        started = time.perf_counter()
+        reader = threading.Thread(target=self._read, args=(records,), daemon=True)
+        reader.start()
+
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        try:
+            while True:
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    item = None
+                if item is _EOF:
+                    break
+                if item is not None:
+                    self._accept(item, batch)
+                if batch and (len(batch) >= self.batch_size or time.monotonic() >= deadline):
+                    self._insert(batch)
+                    batch = []
+                if time.monotonic() >= deadline:
+                    deadline = time.monotonic() + self.flush_interval
+        except KeyboardInterrupt:
+            self.stop()
+            # The reader ends after its current item; a reader blocked on
+            # input never sends _EOF, so stop waiting after one flush interval
+            while True:
+                try:
+                    item = self._queue.get(timeout=self.flush_interval)
+                except queue.Empty:
+                    break
+                if item is _EOF:
+                    break
+                self._accept(item, batch)
+        if batch:
+            self._insert(batch)
+
+        elapsed = time.perf_counter() - started
+        self.stats["seconds"] = elapsed
+        self.stats["orders_per_sec"] = self.stats["inserted"] / elapsed if elapsed > 0 else 0.0
+        if self.error is not None:
+            raise self.error
+        return self.stats
+
+
+def ingest_orders(source, **kwargs):
+    """Ingest orders from a path, '-' (stdin) or 'tcp://host:port'."""
+    intake = OrderIntake(**kwargs)
+    return intake.run(_iter_source(source, intake._stop))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Stream orders into the Orders table.")
+    parser.add_argument("source", help="file path, '-' for stdin, or tcp://host:port")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--queue-size", type=int, default=QUEUE_SIZE)
+    args = parser.parse_args(argv)
+
+    intake = OrderIntake(batch_size=args.batch_size, queue_size=args.queue_size)
+    try:
+        intake.run(_iter_source(args.source, intake._stop))
+    finally:
+        # Report what got in even when the source failed part way
+        stats = intake.stats
+        print(f"{stats['inserted']} orders inserted, {stats['rejected']} rejected "
+              f"({stats.get('orders_per_sec', 0):.0f} orders/s)")
+        for reason, count in sorted(stats["errors"].items()):
+            print(f"  {reason}: {count}")
+        if stats["failed"]:
+            print(f"{stats['failed']} orders in {stats['failed_batches']} batches failed to insert: "
+                  f"{stats['last_failure']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,103 @@
 """Database query functions for products, inventory, logistics, and orders."""
 
-from db.connection import get_connection
+import re
+
+from db.cache import cached, invalidate
+from db.connection import get_connection, transaction
+from db.counters import LowStockTracker, apply_low_stock_changes, bump_counter, read_counters
+from db.ledger import LedgerTracker, record_entries
+from db.log_writer import INSERT_LOG, current_user, get_log_writer, log_row
+from db.metrics import instrument_module
+from db.routing import get_route_graph, get_shortest_route
+from db.scenarios import INITIAL_SCENARIO, restore_scenario
+
+PAGE_SIZE = 50
+
+# SQL of the hot queries, shared with the EXPLAIN checks in db/migrate.py
+ORDERS_PAGE_SQL = """
+    SELECT order_id, sku, quantity, customer_name, customer_location, status
+    FROM Orders
+"""
+LOGISTICS_PAGE_SQL = """
+    SELECT logistics_id, sku, origin, destination, transport_cost
+    FROM Logistics
+"""
+LOGS_PAGE_SQL = """
+    SELECT l.log_id, l.created_at, u.username, l.action_type, l.entity_type, l.entity_id, l.action
+    FROM Logs l
+    LEFT JOIN Users u ON u.user_id = l.user_id
+"""
+LOCK_ORDER_SQL = "SELECT status FROM Orders WHERE order_id = %s FOR UPDATE"
+PRODUCTS_BY_WAREHOUSE_SQL = """
+    SELECT Inventory.sku, Products.name, Inventory.quantity
+    FROM Inventory
+    JOIN Products ON Inventory.sku = Products.sku
+    WHERE Inventory.location = %s
+"""
+LOW_STOCK_SQL = """
+    SELECT ls.sku, p.name, ls.location, i.quantity, p.threshold
+    FROM LowStock ls
+    JOIN Inventory i ON i.sku = ls.sku AND i.location = ls.location
+    JOIN Products p ON p.sku = ls.sku
+"""
+WAREHOUSE_STOCK_SQL = """
+    SELECT location FROM Inventory
+    WHERE sku = %s AND quantity > 0 AND location_type = 'Warehouse'
+"""
+# Formatted with one placeholder per SKU
+STOCK_FOR_SKUS_SQL = """
+    SELECT sku, location, quantity, location_type FROM Inventory
+    WHERE sku IN ({placeholders}) AND quantity > 0
+    ORDER BY quantity DESC
+"""
+
+
+def page_query(select_sql, id_column, filters, before_id=None, limit=None):
+    """Return (sql, params) of a keyset-paginated SELECT; see _fetch_page()."""
+    clauses, params = [], []
+    for clause, value in filters:
+        if value is None:
+            continue
+        clauses.append(clause)
+        params.extend(value if isinstance(value, tuple) else (value,))
+    if before_id is not None:
+        clauses.append(f"{id_column} < %s")
+        params.append(before_id)
+
+    sql = select_sql
+    if clauses:
+        sql += " WHERE " + " AND ".join(clauses)
+    sql += f" ORDER BY {id_column} DESC"
+    if limit is not None:
+        sql += " LIMIT %s"
+        params.append(limit + 1)
+    return sql, tuple(params)
+
+
+def _fetch_page(select_sql, id_column, filters, before_id, limit, tx=None):
+    """Run a keyset-paginated SELECT ordered by `id_column` descending.
+
+    `filters` is a list of (sql, value) pairs; pairs whose value is None are
+    skipped and tuple values bind several placeholders. Returns
+    (rows, next_before_id), where next_before_id is None on the last page.
+    """
+    sql, params = page_query(select_sql, id_column, filters, before_id, limit)
+    conn = get_connection(tx)
+    cursor = conn.cursor()
+    cursor.execute(sql, params)
+    rows = cursor.fetchall()
+    cursor.close()
+    conn.close()
+
+    if limit is not None and len(rows) > limit:
+        return rows[:limit], rows[limit - 1][0]
+    return rows, None
 
 
 # ------------------------- PRODUCT FUNCTIONS ------------------------- #
-def get_all_products():
+def get_all_products(tx=None):
     """Fetch all products from the database."""
-    conn = get_connection()
+    conn = get_connection(tx)
     cursor = conn.cursor()
     cursor.execute("SELECT * FROM Products")
     results = cursor.fetchall()
@@ -15,50 +106,72 @@ def get_all_products():
     return results
 
 
-def add_product(sku, name, description, threshold):
+def get_products_page(sku_prefix=None, before_id=None, limit=PAGE_SIZE, tx=None):
+    """Return one page of products (by SKU, descending) and the cursor of the next page."""
+    return _fetch_page(
+        "SELECT sku, name, description, threshold FROM Products",
+        "sku",
+        [("sku LIKE %s", f"{sku_prefix}%" if sku_prefix else None)],
+        before_id, limit, tx,
+    )
+
+
+def add_product(sku, name, description, threshold, tx=None):
     """Add a new product to the database."""
-    conn = get_connection()
+    conn = get_connection(tx)
     cursor = conn.cursor()
     cursor.execute(
         "INSERT INTO Products (sku, name, description, threshold) VALUES (%s, %s, %s, %s)",
         (sku, name, description, threshold),
     )
     conn.commit()
-    write_log(1, f"Created product {sku}")
+    invalidate("Products", tx=tx)
     cursor.close()
     conn.close()
+    write_log(current_user(), f"Created product {sku}", tx=tx,
+              action_type="product.create", entity_type="product", entity_id=sku)
 
 
-def update_product(sku, name, description, threshold):
+def update_product(sku, name, description, threshold, tx=None):
     """Update an existing product in the database."""
-    conn = get_connection()
+    conn = get_connection(tx)
     cursor = conn.cursor()
+    low_stock = LowStockTracker(cursor, sku).before()
     cursor.execute(
         "UPDATE Products SET name=%s, description=%s, threshold=%s WHERE sku=%s",
         (name, description, threshold, sku),
     )
+    low_stock.after()
     conn.commit()
-    write_log(1, f"Updated product {sku}")
+    invalidate("Products", tx=tx)
     cursor.close()
     conn.close()
+    write_log(current_user(), f"Updated product {sku}", tx=tx,
+              action_type="product.update", entity_type="product", entity_id=sku)
 
 
-def delete_product(sku):
+def delete_product(sku, tx=None):
     """Delete a product and its inventory records."""
-    conn = get_connection()
+    conn = get_connection(tx)
     cursor = conn.cursor()
+    low_stock = LowStockTracker(cursor, sku).before()
+    ledger = LedgerTracker(cursor, "delete", sku).before()
     cursor.execute("DELETE FROM Inventory WHERE sku = %s", (sku,))
+    ledger.after()
     cursor.execute("DELETE FROM Products WHERE sku = %s", (sku,))
+    low_stock.after()
     conn.commit()
-    write_log(1, f"Deleted product {sku}")
+    invalidate("Products", "Inventory", tx=tx)
     cursor.close()
     conn.close()
+    write_log(current_user(), f"Deleted product {sku}", tx=tx,
+              action_type="product.delete", entity_type="product", entity_id=sku)
 
 
 # ------------------------- INVENTORY FUNCTIONS ------------------------- #
-def get_inventory():
+def get_inventory(tx=None):
     """Fetch all inventory records along with product details."""
-    conn = get_connection()
+    conn = get_connection(tx)
     cursor = conn.cursor()
     cursor.execute("""
         SELECT Inventory.inventory_id, Inventory.sku, Inventory.location, Inventory.quantity,
@@ -72,71 +185,102 @@ def get_inventory():
     return results
 
 
-def add_inventory(sku, location, quantity):
+def add_inventory(sku, location, quantity, tx=None):
     """Add new inventory for a product at a specific location."""
-    conn = get_connection()
+    conn = get_connection(tx)
     cursor = conn.cursor()
+    low_stock = LowStockTracker(cursor, sku).before()
     cursor.execute(
         "INSERT INTO Inventory (sku, location, quantity) VALUES (%s, %s, %s)",
         (sku, location, quantity),
     )
+    record_entries(cursor, [(sku, location, quantity)], "add")
+    low_stock.after()
     conn.commit()
-    write_log(1, f"Added inventory for {sku} at {location}: {quantity}")
+    invalidate("Inventory", tx=tx)
     cursor.close()
     conn.close()
+    write_log(current_user(), f"Added inventory for {sku} at {location}: {quantity}", tx=tx,
+              action_type="inventory.add", entity_type="product", entity_id=sku)
 
 
-def update_inventory(sku, location, quantity):
+def update_inventory(sku, location, quantity, tx=None):
     """Update inventory quantity for a product at a given location."""
-    conn = get_connection()
+    conn = get_connection(tx)
     cursor = conn.cursor()
+    low_stock = LowStockTracker(cursor, sku).before()
+    ledger = LedgerTracker(cursor, "update", sku).before()
     cursor.execute("""
         UPDATE Inventory
         SET quantity = %s
         WHERE sku = %s AND location = %s
     """, (quantity, sku, location))
+    ledger.after()
+    low_stock.after()
     conn.commit()
-    write_log(1, f"Updated inventory for {sku} at {location}: {quantity}")
+    invalidate("Inventory", tx=tx)
     cursor.close()
     conn.close()
+    write_log(current_user(), f"Updated inventory for {sku} at {location}: {quantity}", tx=tx,
+              action_type="inventory.update", entity_type="product", entity_id=sku)
 
 
-def delete_inventory_for_sku(sku):
+def delete_inventory_for_sku(sku, tx=None):
     """Delete all inventory entries for a given SKU."""
-    conn = get_connection()
+    conn = get_connection(tx)
     cursor = conn.cursor()
+    low_stock = LowStockTracker(cursor, sku).before()
+    ledger = LedgerTracker(cursor, "delete", sku).before()
     cursor.execute("DELETE FROM Inventory WHERE sku = %s", (sku,))
+    ledger.after()
+    low_stock.after()
     conn.commit()
+    invalidate("Inventory", tx=tx)
     cursor.close()
     conn.close()
 
 
-def get_low_stock():
-    """Fetch all products with quantity below threshold (excluding retail hubs)."""
-    conn = get_connection()
+def set_inventory_levels(levels, reason="set", tx=None):
+    """Set many (sku, location, quantity) rows at once, inserting missing ones."""
+    if not levels:
+        return
+    conn = get_connection(tx)
     cursor = conn.cursor()
-    cursor.execute("""
-        SELECT i.sku, p.name, i.location, i.quantity, p.threshold
-        FROM Inventory i
-        JOIN Products p ON i.sku = p.sku
-        WHERE i.quantity < p.threshold AND i.location NOT LIKE 'Retail Hub%'
-    """)
+    skus = {sku for sku, _, _ in levels}
+    low_stock = LowStockTracker(cursor, *skus).before()
+    ledger = LedgerTracker(cursor, reason, *skus).before()
+    cursor.executemany(
+        "INSERT INTO Inventory (sku, location, quantity) VALUES (%s, %s, %s) "
+        "ON DUPLICATE KEY UPDATE quantity = VALUES(quantity)",
+        levels,
+    )
+    ledger.after()
+    low_stock.after()
+    conn.commit()
+    invalidate("Inventory", tx=tx)
+    cursor.close()
+    conn.close()
+
+
+def get_low_stock(tx=None):
+    """Fetch all products with quantity below threshold (excluding retail hubs).
+
+    Reads the maintained LowStock set, so the cost follows the number of alerts.
+    """
+    conn = get_connection(tx)
+    cursor = conn.cursor()
+    cursor.execute(LOW_STOCK_SQL)
     results = cursor.fetchall()
     cursor.close()
     conn.close()
     return results
 
 
-def get_products_by_warehouse(location):
+def get_products_by_warehouse(location, tx=None):
     """Get all products stored at a specific warehouse."""
-    conn = get_connection()
+    conn = get_connection(tx)
     cursor = conn.cursor()
-    cursor.execute("""
-        SELECT Inventory.sku, Products.name, Inventory.quantity
-        FROM Inventory
-        JOIN Products ON Inventory.sku = Products.sku
-        WHERE Inventory.location = %s
-    """, (location,))
+    cursor.execute(PRODUCTS_BY_WAREHOUSE_SQL, (location,))
     results = cursor.fetchall()
     cursor.close()
     conn.close()
@@ -144,113 +288,140 @@ def get_products_by_warehouse(location):
 
 
 # ------------------------- LOGISTICS FUNCTIONS ------------------------- #
-def move_product(sku, origin, destination, quantity, transport_cost):
+def move_product(sku, origin, destination, quantity, transport_cost, tx=None):
     """Move a product between two locations and log the transfer."""
-    conn = get_connection()
+    conn = get_connection(tx)
     cursor = conn.cursor()
 
     sku = sku.strip().upper()
     origin = origin.strip()
     destination = destination.strip()
 
-    cursor.execute("SELECT quantity FROM Inventory WHERE sku = %s AND location = %s", (sku, origin))
-    result = cursor.fetchone()
-    if not result or result[0] < quantity:
+    # Guarded decrement: the row lock taken by the UPDATE makes the stock
+    # check and the decrement one step, so concurrent moves cannot oversell
+    cursor.execute(
+        "UPDATE Inventory SET quantity = quantity - %s "
+        "WHERE sku = %s AND location = %s AND quantity >= %s",
+        (quantity, sku, origin, quantity),
+    )
+    if cursor.rowcount != 1:
         conn.rollback()
         cursor.close()
         conn.close()
         raise Exception("Insufficient stock at origin")  # noqa: W0719
 
     cursor.execute(
-        "UPDATE Inventory SET quantity = quantity - %s WHERE sku = %s AND location = %s",
-        (quantity, sku, origin),
+        "INSERT INTO Inventory (sku, location, quantity) VALUES (%s, %s, %s) "
+        "ON DUPLICATE KEY UPDATE quantity = quantity + VALUES(quantity)",
+        (sku, destination, quantity),
     )
-
-    cursor.execute("SELECT quantity FROM Inventory WHERE sku = %s AND location = %s", (sku, destination))
-    if cursor.fetchone():
-        cursor.execute(
-            "UPDATE Inventory SET quantity = quantity + %s WHERE sku = %s AND location = %s",
-            (quantity, sku, destination),
-        )
-    else:
-        cursor.execute(
-            "INSERT INTO Inventory (sku, location, quantity) VALUES (%s, %s, %s)",
-            (sku, destination, quantity),
-        )
+    # One affected row means the destination row was inserted, two that it was updated
+    created = (destination,) if cursor.rowcount == 1 and destination != origin else ()
+    record_entries(cursor, [(sku, origin, -quantity), (sku, destination, quantity)], "move")
 
     cursor.execute(
         "INSERT INTO Logistics (sku, origin, destination, transport_cost) VALUES (%s, %s, %s, %s)",
         (sku, origin, destination, transport_cost),
     )
+    bump_counter(cursor, "total_logistics_cost", transport_cost)
+    deltas = {origin: -quantity}
+    deltas[destination] = deltas.get(destination, 0) + quantity
+    apply_low_stock_changes(cursor, sku, deltas, created)
 
     conn.commit()
-    write_log(1, f"Moved {quantity} of {sku} from {origin} to {destination} (₹{transport_cost:.2f})")
+    invalidate("Inventory", tx=tx)
+    # Release the connection first: a synchronous log write checks out its own
     cursor.close()
     conn.close()
+    write_log(current_user(), f"Moved {quantity} of {sku} from {origin} to {destination} (₹{transport_cost:.2f})",
+              tx=tx, action_type="inventory.move", entity_type="product", entity_id=sku)
+
 
+def record_shipments(shipments, tx=None):
+    """Insert many (sku, origin, destination, transport_cost) Logistics rows.
 
-def get_route_cost(origin, destination):
-    """Return the cost of a route between origin and destination."""
-    conn = get_connection()
+    Stock is not touched; use this for movements already applied elsewhere,
+    such as the summarized history of a simulation run.
+    """
+    if not shipments:
+        return
+    conn = get_connection(tx)
     cursor = conn.cursor()
-    cursor.execute("SELECT cost FROM Routes WHERE origin = %s AND destination = %s", (origin, destination))
-    result = cursor.fetchone()
+    cursor.executemany(
+        "INSERT INTO Logistics (sku, origin, destination, transport_cost) VALUES (%s, %s, %s, %s)",
+        shipments,
+    )
+    bump_counter(cursor, "total_logistics_cost", sum(s[3] for s in shipments))
+    conn.commit()
     cursor.close()
     conn.close()
-    return result[0] if result else None
+
+
+@cached("Routes")
+def get_route_cost(origin, destination, tx=None):
+    """Return the cost of the cheapest route between origin and destination.
+
+    Uses the same multi-hop route that move_order_to_customer() charges.
+    """
+    route = get_shortest_route(origin, destination, tx=tx)
+    return route["cost"] if route else None
 
 
 # ------------------------- ORDER FUNCTIONS ------------------------- #
-def place_order(sku, quantity, customer_name, customer_location):
+def place_order(sku, quantity, customer_name, customer_location, tx=None):
     """Insert a new customer order."""
-    conn = get_connection()
+    conn = get_connection(tx)
     cursor = conn.cursor()
     cursor.execute("""
         INSERT INTO Orders (sku, quantity, customer_name, customer_location, status)
         VALUES (%s, %s, %s, %s, 'Pending')
     """, (sku, quantity, customer_name, customer_location))
+    bump_counter(cursor, "total_orders", 1)
     conn.commit()
     cursor.close()
     conn.close()
 
 
-def get_orders(username=None, role="Admin"):
-    """Retrieve orders based on user role."""
-    conn = get_connection()
-    cursor = conn.cursor()
+def get_orders(username=None, role="Admin", status=None, tx=None):
+    """Retrieve orders based on user role, optionally filtered by status."""
+    rows, _ = get_orders_page(username, role, status=status, limit=None, tx=tx)
+    return rows
+
+
+def get_orders_page(username=None, role="Admin", status=None, sku=None, customer=None,
+                    location=None, before_id=None, limit=PAGE_SIZE, tx=None):
+    """Return one page of orders (newest first) and the cursor of the next page."""
     if role == "User":
-        cursor.execute("""
-            SELECT order_id, sku, quantity, customer_name, customer_location, status
-            FROM Orders
-            WHERE customer_name = %s
-            ORDER BY order_id DESC
-        """, (username,))
-    else:
-        cursor.execute("""
-            SELECT order_id, sku, quantity, customer_name, customer_location, status
-            FROM Orders
-            ORDER BY order_id DESC
-        """)
-    results = cursor.fetchall()
-    cursor.close()
-    conn.close()
-    return results
+        # A tuple is never skipped, so a missing username matches no orders
+        customer = (username,)
+    return _fetch_page(
+        ORDERS_PAGE_SQL,
+        "order_id",
+        [("status = %s", status), ("sku = %s", sku),
+         ("customer_name = %s", customer), ("customer_location = %s", location)],
+        before_id, limit, tx,
+    )
 
 
-def update_order_status(order_id, status):
+def update_order_status(order_id, status, tx=None):
     """Update order status."""
-    conn = get_connection()
+    conn = get_connection(tx)
     cursor = conn.cursor()
+    cursor.execute(LOCK_ORDER_SQL, (order_id,))
+    previous = cursor.fetchone()
     cursor.execute("UPDATE Orders SET status = %s WHERE order_id = %s", (status, order_id))
+    if previous:
+        bump_counter(cursor, "processed_orders",
+                     (status == "Processed") - (previous[0] == "Processed"))
     conn.commit()
     cursor.close()
     conn.close()
 
 
 # ------------------------- FORECAST FUNCTIONS ------------------------- #
-def get_forecast():
+def get_forecast(tx=None):
     """Fetch all demand forecasts."""
-    conn = get_connection()
+    conn = get_connection(tx)
     cursor = conn.cursor()
     cursor.execute("SELECT sku, forecast_value, forecast_date FROM DemandForecast")
     results = cursor.fetchall()
@@ -259,24 +430,76 @@ def get_forecast():
     return results
 
 
-def add_forecast(sku, forecast_value, forecast_date):
+def add_forecast(sku, forecast_value, forecast_date, tx=None):
     """Add a new demand forecast record."""
-    conn = get_connection()
+    conn = get_connection(tx)
     cursor = conn.cursor()
     cursor.execute("""
         INSERT INTO DemandForecast (sku, forecast_value, forecast_date)
         VALUES (%s, %s, %s)
     """, (sku, forecast_value, forecast_date))
     conn.commit()
-    write_log(1, f"Forecasted {forecast_value} units of {sku} for {forecast_date}")
     cursor.close()
     conn.close()
+    write_log(current_user(), f"Forecasted {forecast_value} units of {sku} for {forecast_date}", tx=tx,
+              action_type="forecast.add", entity_type="product", entity_id=sku)
+
+
+def get_forecast_gaps(start_date=None, end_date=None, by_location=False, tx=None):
+    """Return forecast, current inventory, gap and status for many forecasts at once.
+
+    Rows are (sku, forecast_value, forecast_date, current_inventory, gap,
+    status), with inventory summed over all locations in a single aggregated
+    join. With `by_location`, each row gets a trailing list of
+    (location, quantity) pairs, loaded by one more set-based query.
+    """
+    clauses, params = [], []
+    if start_date is not None:
+        clauses.append("f.forecast_date >= %s")
+        params.append(start_date)
+    if end_date is not None:
+        clauses.append("f.forecast_date <= %s")
+        params.append(end_date)
+    where = ("WHERE " + " AND ".join(clauses)) if clauses else ""
+
+    conn = get_connection(tx)
+    cursor = conn.cursor()
+    cursor.execute(f"""
+        SELECT f.sku, f.forecast_value, f.forecast_date,
+               COALESCE(i.total, 0) AS current_inventory,
+               f.forecast_value - COALESCE(i.total, 0) AS gap,
+               CASE WHEN f.forecast_value <= COALESCE(i.total, 0)
+                    THEN 'OK' ELSE 'Shortage' END AS status
+        FROM DemandForecast f
+        LEFT JOIN (
+            SELECT sku, SUM(quantity) AS total FROM Inventory GROUP BY sku
+        ) i ON i.sku = f.sku
+        {where}
+        ORDER BY f.forecast_date, f.sku
+    """, tuple(params))
+    results = cursor.fetchall()
+
+    if by_location:
+        cursor.execute(f"""
+            SELECT inv.sku, inv.location, inv.quantity
+            FROM Inventory inv
+            JOIN (SELECT DISTINCT f.sku FROM DemandForecast f {where}) s ON s.sku = inv.sku
+            ORDER BY inv.sku, inv.location
+        """, tuple(params))
+        locations = {}
+        for sku, location, quantity in cursor.fetchall():
+            locations.setdefault(sku, []).append((location, quantity))
+        results = [row + (locations.get(row[0], []),) for row in results]
+
+    cursor.close()
+    conn.close()
+    return results
 
 
 # ------------------------- UTILITY FUNCTIONS ------------------------- #
-def get_inventory_for_sku(sku):
+def get_inventory_for_sku(sku, tx=None):
     """Return inventory locations and quantities for a specific SKU."""
-    conn = get_connection()
+    conn = get_connection(tx)
     cursor = conn.cursor()
     cursor.execute("""
         SELECT location, quantity FROM Inventory
@@ -289,38 +512,64 @@ def get_inventory_for_sku(sku):
     return results
 
 
-def delete_order(order_id):
+def delete_order(order_id, tx=None):
     """Delete an order by ID."""
-    conn = get_connection()
+    conn = get_connection(tx)
     cursor = conn.cursor()
+    cursor.execute(LOCK_ORDER_SQL, (order_id,))
+    previous = cursor.fetchone()
     cursor.execute("DELETE FROM Orders WHERE order_id = %s", (order_id,))
+    if previous:
+        bump_counter(cursor, "total_orders", -1)
+        bump_counter(cursor, "processed_orders", -(previous[0] == "Processed"))
     conn.commit()
     cursor.close()
     conn.close()
 
 
-def write_log(user_id, action):
-    """Write an action log."""
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("INSERT INTO Logs (user_id, action) VALUES (%s, %s)", (user_id, action))
-    conn.commit()
+def write_log(user_id, action, tx=None, action_type="other", entity_type=None, entity_id=None):
+    """Write an action log.
+
+    `user_id` None means the current user (see db.log_writer.set_current_user).
+    `action_type` (e.g. "inventory.move") and the entity keys make the entry
+    filterable; `action` stays the human-readable text. Inside a transaction
+    the row is inserted on the shared connection so it commits with the
+    change it describes; otherwise it is handed to the buffered log writer.
+    """
+    row = log_row(current_user() if user_id is None else user_id, action,
+                  action_type, entity_type, entity_id)
+    if tx is None:
+        get_log_writer().write(row)
+        return
+    cursor = tx.cursor()
+    cursor.execute(INSERT_LOG, row)
     cursor.close()
-    conn.close()
 
-def move_order_to_customer(order_id, sku, quantity, origin, destination):
-    """Move an order's products from warehouse to customer."""
-    cost_per_unit = get_route_cost(origin, destination)
-    if cost_per_unit is None:
+
+def move_order_to_customer(order_id, sku, quantity, origin, destination, tx=None):
+    """Move an order's products from warehouse to customer and mark it processed.
+
+    All steps run in one transaction; pass `tx` to make them part of a larger one.
+    """
+    if tx is None:
+        with transaction() as tx:
+            return move_order_to_customer(order_id, sku, quantity, origin, destination, tx=tx)
+
+    route = get_shortest_route(origin, destination, tx=tx)
+    if route is None:
         raise Exception("No route found")  # noqa: W0719
-    total_cost = cost_per_unit * quantity
-    move_product(sku, origin, destination, quantity, total_cost)
-    write_log(1, f"Moved order #{order_id}: {quantity} of {sku} from {origin} to {destination}")
+    total_cost = route["cost"] * quantity
+    move_product(sku, origin, destination, quantity, total_cost, tx=tx)
+    update_order_status(order_id, "Processed", tx=tx)
+    write_log(current_user(), f"Moved order #{order_id}: {quantity} of {sku} via {' -> '.join(route['path'])}",
+              tx=tx, action_type="order.process", entity_type="order", entity_id=order_id)
+    return total_cost
 
 
-def get_all_warehouse_locations():
+@cached("Inventory")
+def get_all_warehouse_locations(tx=None):
     """Return a list of all warehouse locations."""
-    conn = get_connection()
+    conn = get_connection(tx)
     cursor = conn.cursor()
     cursor.execute("SELECT DISTINCT location FROM Inventory")
     results = [row[0] for row in cursor.fetchall()]
@@ -329,9 +578,9 @@ def get_all_warehouse_locations():
     return results
 
 
-def get_valid_origins_for_destination(destination, sku):
+def get_valid_origins_for_destination(destination, sku, tx=None):
     """Get valid origins that can ship a given SKU to a destination."""
-    conn = get_connection()
+    conn = get_connection(tx)
     cursor = conn.cursor()
     cursor.execute("""
         SELECT DISTINCT r.origin
@@ -345,9 +594,10 @@ def get_valid_origins_for_destination(destination, sku):
     return results
 
 
-def get_customer_locations():
+@cached("Routes")
+def get_customer_locations(tx=None):
     """Retrieve all retail hub destinations."""
-    conn = get_connection()
+    conn = get_connection(tx)
     cursor = conn.cursor()
     cursor.execute(
         "SELECT DISTINCT destination FROM Routes WHERE destination LIKE 'Retail Hub%'"
@@ -358,9 +608,9 @@ def get_customer_locations():
     return results
 
 
-def get_inventory_locations_for_sku(sku):
+def get_inventory_locations_for_sku(sku, tx=None):
     """Get all locations where a SKU is stored."""
-    conn = get_connection()
+    conn = get_connection(tx)
     cursor = conn.cursor()
     cursor.execute("SELECT location FROM Inventory WHERE sku = %s", (sku,))
     results = [row[0] for row in cursor.fetchall()]
@@ -369,9 +619,10 @@ def get_inventory_locations_for_sku(sku):
     return results
 
 
-def get_locations():
+@cached("Routes")
+def get_locations(tx=None):
     """Return all origins and destinations in the Routes table."""
-    conn = get_connection()
+    conn = get_connection(tx)
     cursor = conn.cursor()
     cursor.execute("SELECT DISTINCT origin FROM Routes")
     origins = [row[0] for row in cursor.fetchall() if not row[0].startswith("Retail Hub")]
@@ -382,9 +633,9 @@ def get_locations():
     return origins, destinations
 
 
-def get_inventory_for_forecast(sku):
+def get_inventory_for_forecast(sku, tx=None):
     """Get total available quantity for a SKU across all locations."""
-    conn = get_connection()
+    conn = get_connection(tx)
     cursor = conn.cursor()
     cursor.execute("SELECT SUM(quantity) FROM Inventory WHERE sku = %s", (sku,))
     result = cursor.fetchone()[0]
@@ -393,75 +644,97 @@ def get_inventory_for_forecast(sku):
     return result or 0
 
 
-def get_cheapest_route_details(origin, destination):
-    """Return the cheapest route between two locations with cost and distance."""
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT cost, distance_km FROM Routes
-        WHERE origin = %s AND destination = %s
-        ORDER BY cost ASC LIMIT 1
-    """, (origin, destination))
-    result = cursor.fetchone()
-    cursor.close()
-    conn.close()
-    return {"cost": result[0], "distance": result[1]} if result else None
-
+@cached("Routes")
+def get_cheapest_route_details(origin, destination, tx=None):
+    """Return the cheapest (possibly multi-hop) route with cost and distance."""
+    route = get_shortest_route(origin, destination, tx=tx)
+    return {"cost": route["cost"], "distance": route["distance"]} if route else None
 
-def generate_summary_report():
-    """Generate a summary report of key logistics and inventory statistics."""
-    conn = get_connection()
-    cursor = conn.cursor()
-
-    cursor.execute("SELECT COUNT(*) FROM Orders")
-    total_orders = cursor.fetchone()[0]
-
-    cursor.execute("SELECT COUNT(*) FROM Orders WHERE status = 'Processed'")
-    processed_orders = cursor.fetchone()[0]
-
-    cursor.execute("""
-        SELECT DISTINCT i.sku
-        FROM Inventory i
-        JOIN Products p ON i.sku = p.sku
-        WHERE i.quantity < p.threshold AND i.location NOT LIKE 'Retail Hub%'
-    """)
-    low_stock_items = len(cursor.fetchall())
 
-    cursor.execute("SELECT SUM(transport_cost) FROM Logistics")
-    total_logistics_cost = cursor.fetchone()[0] or 0
+def generate_summary_report(tx=None):
+    """Generate a summary report of key logistics and inventory statistics.
 
+    Reads the maintained SummaryCounters rows instead of scanning history.
+    """
+    conn = get_connection(tx)
+    cursor = conn.cursor()
+    counters = read_counters(cursor)
     cursor.close()
     conn.close()
 
     return {
-        "Total Orders": total_orders,
-        "Processed Orders": processed_orders,
-        "Low Stock Items": low_stock_items,
-        "Total Logistics Cost": total_logistics_cost,
+        "Total Orders": int(counters["total_orders"]),
+        "Processed Orders": int(counters["processed_orders"]),
+        "Low Stock Items": int(counters["low_stock_items"]),
+        "Total Logistics Cost": counters["total_logistics_cost"],
     }
 
 
-def suggest_cheapest_origin(sku, destination):
-    """Suggest the cheapest origin location for a given SKU and destination."""
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT i.location, r.cost
-        FROM Inventory i
-        JOIN Routes r ON i.location = r.origin AND r.destination = %s
-        WHERE i.sku = %s AND i.quantity > 0 AND i.location NOT LIKE 'Retail Hub%'
-        ORDER BY r.cost ASC
-        LIMIT 1
-    """, (destination, sku))
-    result = cursor.fetchone()
-    cursor.close()
-    conn.close()
-    return {"origin": result[0], "cost": result[1]} if result else None
-
+def suggest_cheapest_origin(sku, destination, tx=None):
+    """Suggest the cheapest origin location for a given SKU and destination.
+
+    Costs come from the route graph, so origins reachable only through
+    intermediate locations are considered too.
+    """
+    conn = get_connection(tx)
+    cursor = conn.cursor()
+    cursor.execute(WAREHOUSE_STOCK_SQL, (sku,))
+    locations = [row[0] for row in cursor.fetchall()]
+    cursor.close()
+    conn.close()
+
+    graph = get_route_graph(tx)
+    best = None
+    for location in locations:
+        route = graph.shortest(location, destination)
+        if route and (best is None or route["cost"] < best["cost"]):
+            best = {"origin": location, "cost": route["cost"], "path": route["path"]}
+    return best
+
+
+def get_fulfillment_options(orders, tx=None):
+    """Return stock, valid origins and the cheapest origin for many orders at once.
+
+    `orders` is a list of (order_id, sku, quantity, destination) tuples. Stock
+    for every SKU comes from one query and route costs from the in-memory
+    route graph. Returns {order_id: {"stock", "valid_origins", "suggestion"}},
+    where suggestion is the cheapest origin holding enough stock, as
+    {"origin", "cost", "path"}, or None.
+    """
+    skus = sorted({sku for _, sku, _, _ in orders})
+    stock = {sku: [] for sku in skus}
+    warehouses = set()
+    if skus:
+        conn = get_connection(tx)
+        cursor = conn.cursor()
+        cursor.execute(STOCK_FOR_SKUS_SQL.format(placeholders=", ".join(["%s"] * len(skus))), tuple(skus))
+        for sku, location, quantity, location_type in cursor.fetchall():
+            stock[sku].append((location, quantity))
+            if location_type == "Warehouse":
+                warehouses.add(location)
+        cursor.close()
+        conn.close()
 
-def get_logistics_records():
+    graph = get_route_graph(tx)
+    options = {}
+    for order_id, sku, quantity, destination in orders:
+        valid = [loc for loc, qty in stock.get(sku, []) if qty >= quantity and loc in warehouses]
+        suggestion = None
+        for location in valid:
+            route = graph.shortest(location, destination)
+            if route and (suggestion is None or route["cost"] < suggestion["cost"]):
+                suggestion = {"origin": location, "cost": route["cost"], "path": route["path"]}
+        options[order_id] = {
+            "stock": stock.get(sku, []),
+            "valid_origins": valid,
+            "suggestion": suggestion,
+        }
+    return options
+
+
+def get_logistics_records(tx=None):
     """Fetch all logistics transaction records."""
-    conn = get_connection()
+    conn = get_connection(tx)
     cursor = conn.cursor()
     cursor.execute("""
         SELECT sku, origin, destination, transport_cost
@@ -474,12 +747,12 @@ def get_logistics_records():
     return results
 
 
-def get_logs():
-    """Retrieve all system log entries."""
-    conn = get_connection()
+def get_logs(tx=None):
+    """Retrieve all system log entries, newest first."""
+    conn = get_connection(tx)
     cursor = conn.cursor()
     cursor.execute("""
-        SELECT user_id, action
+        SELECT log_id, created_at, user_id, action_type, entity_type, entity_id, action
         FROM Logs
         ORDER BY log_id DESC
     """)
@@ -489,87 +762,81 @@ def get_logs():
     return results
 
 
-def reset_simulation():
-    """Reset the simulation to its initial database state."""
-    conn = get_connection()
-    cursor = conn.cursor()
-
-    # Clear dynamic tables
-    cursor.execute("DELETE FROM Orders")
-    cursor.execute("DELETE FROM Logistics")
-    cursor.execute("DELETE FROM DemandForecast")
-    cursor.execute("DELETE FROM Reports")
-    cursor.execute("DELETE FROM Logs")
-    cursor.execute("DELETE FROM Inventory")
-    cursor.execute("DELETE FROM Products")
-    cursor.execute("DELETE FROM Routes")
-    cursor.execute("DELETE FROM Users")
-
-    # Reset AUTO_INCREMENT
-    for table in [
-        "Users", "Orders", "Logistics", "DemandForecast",
-        "Reports", "Logs", "Inventory", "Routes"
-    ]:
-        cursor.execute(f"ALTER TABLE {table} AUTO_INCREMENT = 1")
+def get_logistics_page(sku=None, location=None, before_id=None, limit=PAGE_SIZE, tx=None):
+    """Return one page of logistics records (newest first) and the next cursor.
 
-    # Reinsert base users
-    cursor.execute("""
-        INSERT INTO Users (username, password, role)
-        VALUES (%s, %s, %s)
-    """, ('admin1', 'adminpass123', 'Admin'))
-    cursor.execute("""
-        INSERT INTO Users (username, password, role)
-        VALUES (%s, %s, %s)
-    """, ('user1', 'userpass123', 'User'))
-
-    # Reinsert products
-    products = [
-        ('SKU001', 'Laptop', 'High-performance laptop', 5),
-        ('SKU002', 'Smartphone', 'Latest model smartphone', 10),
-        ('SKU003', 'Router', 'Dual-band WiFi router', 8),
-    ]
-    cursor.executemany(
-        "INSERT INTO Products (sku, name, description, threshold) VALUES (%s, %s, %s, %s)",
-        products,
+    `location` matches either end of the movement.
+    """
+    filters = [("sku = %s", sku)]
+    if location is not None:
+        filters.append(("(origin = %s OR destination = %s)", (location, location)))
+    return _fetch_page(
+        LOGISTICS_PAGE_SQL,
+        "logistics_id", filters, before_id, limit, tx,
     )
 
-    # Reinsert inventory
-    inventory = [
-        ('SKU001', 'Warehouse A', 20),
-        ('SKU002', 'Warehouse B', 15),
-        ('SKU003', 'Warehouse A', 5),
-    ]
-    cursor.executemany(
-        "INSERT INTO Inventory (sku, location, quantity) VALUES (%s, %s, %s)",
-        inventory,
-    )
 
-    # Reinsert routes
-    routes = [
-        ('Warehouse A', 'Retail Hub 1', 150.00, 25.5),
-        ('Warehouse A', 'Retail Hub 2', 120.00, 5.0),
-        ('Warehouse A', 'Retail Hub 3', 90.00, 10.0),
-        ('Warehouse B', 'Retail Hub 1', 70.00, 15.0),
-        ('Warehouse B', 'Retail Hub 2', 100.00, 25.0),
-        ('Warehouse B', 'Retail Hub 3', 175.00, 30.0),
-        ('Warehouse B', 'Warehouse A', 80.00, 20.0),
-        ('Warehouse A', 'Warehouse B', 100.00, 30.0),
+def _fulltext_terms(search):
+    """Turn free text into a boolean-mode query requiring every word as a prefix.
+
+    Returns None when no word is long enough for the full-text index
+    (innodb_ft_min_token_size defaults to 3).
+    """
+    words = [word for word in re.findall(r"\w+", search or "") if len(word) >= 3]
+    return " ".join(f"+{word}*" for word in words) or None
+
+
+def get_logs_page(user_id=None, action_type=None, entity_type=None, entity_id=None,
+                  since=None, until=None, search=None, before_id=None, limit=PAGE_SIZE, tx=None):
+    """Return one page of log entries (newest first) and the next cursor.
+
+    Rows are (log_id, created_at, username, action_type, entity_type,
+    entity_id, action). `since` is inclusive and `until` exclusive; `search`
+    matches words of the action text through the full-text index.
+    """
+    terms = _fulltext_terms(search)
+    filters = [
+        ("l.user_id = %s", user_id),
+        ("l.action_type = %s", action_type),
+        ("l.entity_type = %s", entity_type),
+        ("l.entity_id = %s", None if entity_id is None else str(entity_id)),
+        ("l.created_at >= %s", since),
+        ("l.created_at < %s", until),
+        ("MATCH(l.action) AGAINST (%s IN BOOLEAN MODE)", terms),
     ]
-    cursor.executemany(
-        "INSERT INTO Routes (origin, destination, cost, distance_km) VALUES (%s, %s, %s, %s)",
-        routes,
+    if search and terms is None:
+        filters.append(("l.action LIKE %s", f"%{search}%"))
+    return _fetch_page(
+        LOGS_PAGE_SQL,
+        "l.log_id", filters, before_id, limit, tx,
     )
 
-    conn.commit()
-    write_log(1, "Simulation reset to initial state")
 
+def get_log_action_types(tx=None):
+    """Return the distinct action types present in Logs."""
+    conn = get_connection(tx)
+    cursor = conn.cursor()
+    cursor.execute("SELECT DISTINCT action_type FROM Logs ORDER BY action_type")
+    results = [row[0] for row in cursor.fetchall()]
     cursor.close()
     conn.close()
+    return results
+
+
+def reset_simulation(tx=None):
+    """Reset the simulation to its initial state (the built-in "initial" scenario).
 
+    The tables are truncated and reloaded, which commits implicitly, so
+    this cannot be part of a caller's transaction.
+    """
+    if tx is not None:
+        raise Exception("reset_simulation cannot run inside a transaction")  # noqa: W0719
+    restore_scenario(INITIAL_SCENARIO)
 
-def validate_user(username, password):
+
+def validate_user(username, password, tx=None):
     """Validate user credentials and return role info."""
-    conn = get_connection()
+    conn = get_connection(tx)
     cursor = conn.cursor()
     cursor.execute(
         "SELECT user_id, role FROM Users WHERE username = %s AND password = %s",
@@ -583,9 +850,9 @@ def validate_user(username, password):
     return None
 
 
-def create_user(username, password):
+def create_user(username, password, tx=None):
     """Create a new user with default 'User' role."""
-    conn = get_connection()
+    conn = get_connection(tx)
     cursor = conn.cursor()
     cursor.execute("""
         INSERT INTO Users (username, password, role)
@@ -594,3 +861,7 @@ def create_user(username, password):
     conn.commit()
     cursor.close()
     conn.close()
+
+
+# Record calls, latency, rows and connections when metrics are enabled
+instrument_module(globals())
@@ -0,0 +1,200 @@
+"""Automatic replenishment of warehouse rows below threshold.
+
+For every SKU in the LowStock table, warehouses holding more than the
+threshold offer their surplus and low warehouses ask for the shortfall.
+Transfers are then chosen by a min-cost flow over the route graph's
+cheapest per-unit costs between warehouses. SKUs are independent, so the
+batch is solved SKU by SKU. The plan is applied with move_product in a
+single transaction.
+
+    python -m db.replenishment                 # show the plan
+    python -m db.replenishment --apply
+    python -m db.replenishment --apply --every 3600
+"""
+
+import argparse
+import time
+from decimal import Decimal
+
+import numpy as np
+
+from db.connection import get_connection, transaction
+from db.queries import move_product, write_log
+from db.routing import get_route_graph
+
+
+def min_cost_flow(supply, demand, cost):
+    """Solve a transportation problem by successive shortest paths.
+
+    `supply` (m,) and `demand` (n,) are non-negative integers and `cost`
+    (m, n) the unit cost, inf where there is no route. Returns an (m, n)
+    integer flow that meets as much demand as possible at minimum cost.
+    """
+    supply = np.array(supply, dtype=np.int64)
+    demand = np.array(demand, dtype=np.int64)
+    cost = np.asarray(cost, dtype=float)
+    m, n = cost.shape
+    flow = np.zeros((m, n), dtype=np.int64)
+    finite = np.isfinite(cost)
+    finite_cost = np.where(finite, cost, 0.0)
+
+    while supply.any() and demand.any():
+        # Bellman-Ford from a virtual source feeding every source with stock left.
+        # Forward arcs go source -> sink; arcs with flow can be undone backwards.
+        dist_s = np.where(supply > 0, 0.0, np.inf)
+        parent_s = np.full(m, -1)  # sink this source was reached from, -1 = virtual source
+        dist_d = np.full(n, np.inf)
+        parent_d = np.full(n, -1)
+        for _ in range(m + n):
+            via = np.where(finite, dist_s[:, None] + cost, np.inf)
+            best_i = np.argmin(via, axis=0)
+            cand_d = via[best_i, np.arange(n)]
+            improved_d = cand_d < dist_d - 1e-9
+            dist_d = np.where(improved_d, cand_d, dist_d)
+            parent_d = np.where(improved_d, best_i, parent_d)
+
+            back = np.where(flow > 0, dist_d[None, :] - finite_cost, np.inf)
+            best_j = np.argmin(back, axis=1)
+            cand_s = back[np.arange(m), best_j]
+            improved_s = cand_s < dist_s - 1e-9
+            dist_s = np.where(improved_s, cand_s, dist_s)
+            parent_s = np.where(improved_s, best_j, parent_s)
+            if not improved_d.any() and not improved_s.any():
+                break
+
+        open_demand = np.where(demand > 0, dist_d, np.inf)
+        j = int(np.argmin(open_demand))
+        if not np.isfinite(open_demand[j]):
+            break
+
+        # Walk back to the source, collecting the arcs and the bottleneck
+        path, amount = [], demand[j]
+        node_d = j
+        while True:
+            i = int(parent_d[node_d])
+            path.append((i, node_d, 1))
+            if parent_s[i] < 0:
+                amount = min(amount, supply[i])
+                break
+            prev_d = int(parent_s[i])
+            path.append((i, prev_d, -1))
+            amount = min(amount, flow[i, prev_d])
+            node_d = prev_d
+
+        for i, jj, direction in path:
+            flow[i, jj] += direction * amount
+        supply[path[-1][0]] -= amount
+        demand[j] -= amount
+    return flow
+
+
+def _load_positions(tx=None):
+    """Return {sku: (threshold, {warehouse: quantity})} for SKUs with low stock."""
+    conn = get_connection(tx)
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT i.sku, p.threshold, i.location, i.quantity
+        FROM Inventory i
+        JOIN Products p ON p.sku = i.sku
+        JOIN (SELECT DISTINCT sku FROM LowStock) ls ON ls.sku = i.sku
+        WHERE i.location_type = 'Warehouse'
+    """)
+    rows = cursor.fetchall()
+    cursor.close()
+    conn.close()
+    positions = {}
+    for sku, threshold, location, quantity in rows:
+        positions.setdefault(sku, (threshold, {}))[1][location] = quantity
+    return positions
+
+
+def plan_replenishment(positions=None, graph=None):
+    """Plan transfers that lift low warehouse rows back to their threshold.
+
+    Sources keep at least the threshold themselves. Returns
+    {"transfers": [...], "unmet": [...], "total_cost": Decimal}; each
+    transfer holds sku, origin, destination, quantity, unit_cost, cost and
+    path, and each unmet entry sku, location and shortfall.
+    """
+    positions = positions if positions is not None else _load_positions()
+    graph = graph or get_route_graph()
+
+    plan = {"transfers": [], "unmet": [], "total_cost": Decimal("0.00")}
+    for sku, (threshold, stock) in sorted(positions.items()):
+        locations = sorted(stock)
+        quantities = np.array([stock[loc] for loc in locations], dtype=np.int64)
+        surplus = np.maximum(quantities - threshold, 0)
+        shortfall = np.maximum(threshold - quantities, 0)
+        sources = np.flatnonzero(surplus)
+        sinks = np.flatnonzero(shortfall)
+        if sinks.size == 0:
+            continue
+
+        cost = graph.cost_matrix([locations[s] for s in sources], [locations[d] for d in sinks])
+
+        flow = min_cost_flow(surplus[sources], shortfall[sinks], cost)
+        for a, b in zip(*np.nonzero(flow)):
+            origin, destination = locations[sources[a]], locations[sinks[b]]
+            route = graph.shortest(origin, destination)
+            quantity = int(flow[a, b])
+            plan["transfers"].append({
+                "sku": sku,
+                "origin": origin,
+                "destination": destination,
+                "quantity": quantity,
+                "unit_cost": route["cost"],
+                "cost": route["cost"] * quantity,
+                "path": route["path"],
+            })
+            plan["total_cost"] += route["cost"] * quantity
+        for b, d in enumerate(sinks):
+            missing = int(shortfall[d] - flow[:, b].sum())
+            if missing > 0:
+                plan["unmet"].append({"sku": sku, "location": locations[d], "shortfall": missing})
+    return plan
+
+
+def apply_replenishment_plan(plan, user_id=None):
+    """Execute every transfer of `plan` in one transaction; return the count.
+
+    If stock changed since planning so that a source no longer has enough,
+    the guarded move fails and nothing is applied.
+    """
+    with transaction() as tx:
+        for t in plan["transfers"]:
+            move_product(t["sku"], t["origin"], t["destination"], t["quantity"], t["cost"], tx=tx)
+        if plan["transfers"]:
+            write_log(user_id, f"Replenished {len(plan['transfers'])} transfers "
+                               f"(₹{plan['total_cost']:.2f})", tx=tx, action_type="replenishment.apply")
+    return len(plan["transfers"])
+
+
+def run_replenishment(apply=False):
+    """Plan (and optionally apply) one replenishment round; return the plan."""
+    plan = plan_replenishment()
+    if apply:
+        apply_replenishment_plan(plan)
+    return plan
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Plan transfers for warehouses below threshold.")
+    parser.add_argument("--apply", action="store_true", help="execute the plan")
+    parser.add_argument("--every", type=float, help="repeat every N seconds")
+    args = parser.parse_args(argv)
+
+    while True:
+        plan = run_replenishment(apply=args.apply)
+        for t in plan["transfers"]:
+            print(f"{t['sku']}: {t['quantity']} from {t['origin']} to {t['destination']} (₹{t['cost']:.2f})")
+        for u in plan["unmet"]:
+            print(f"{u['sku']} at {u['location']}: {u['shortfall']} short, no surplus reachable")
+        verb = "Applied" if args.apply else "Planned"
+        print(f"{verb} {len(plan['transfers'])} transfers, total ₹{plan['total_cost']:.2f}")
+        if not args.every:
+            break
+        time.sleep(args.every)
+
+
+if __name__ == "__main__":
+    main()
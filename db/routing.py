@@ -0,0 +1,151 @@
+"""In-memory route graph with lazily computed cheapest paths."""
+
+import heapq
+import os
+import threading
+import time
+from decimal import Decimal
+
+import numpy as np
+
+from db.cache import table_generation
+from db.connection import get_connection
+
+WEIGHTS = ("cost", "distance")
+# How often Routes is reread to pick up changes made by other processes
+ROUTES_RECHECK = float(os.getenv("SCMS_ROUTES_RECHECK", "900"))
+
+
+class RouteGraph:
+    """Directed graph over Routes, searched with Dijkstra one origin at a time.
+
+    Routes are kept as adjacency lists. The first lookup from an origin runs
+    Dijkstra from it, O(E log V), and keeps the resulting tree, so later
+    lookups from the same origin cost O(path length). Nothing is computed
+    for origins that are never asked about.
+    """
+
+    def __init__(self, routes):
+        # Keep the cheapest edge when a pair is listed more than once
+        edges = {}
+        for origin, destination, cost, distance in routes:
+            edge = (float(cost), float(distance or 0))
+            if (origin, destination) not in edges or edge[0] < edges[origin, destination][0]:
+                edges[origin, destination] = edge
+        self.nodes = sorted({r[0] for r in routes} | {r[1] for r in routes})
+        self.adjacency = {node: [] for node in self.nodes}
+        for (origin, destination), (cost, distance) in edges.items():
+            if origin != destination:
+                self.adjacency[origin].append((destination, cost, distance))
+        self._trees = {}
+        self._lock = threading.Lock()
+
+    def _tree(self, origin, weight):
+        """Return {node: (primary, secondary, previous)} for the best paths from `origin`.
+
+        Ties on the optimized weight are broken by the other one.
+        """
+        tree = self._trees.get((origin, weight))
+        if tree is not None:
+            return tree
+        tree = {origin: (0.0, 0.0, None)}
+        heap = [(0.0, 0.0, origin)]
+        while heap:
+            primary, secondary, node = heapq.heappop(heap)
+            if tree[node][:2] != (primary, secondary):
+                continue  # superseded by a better path
+            for destination, cost, distance in self.adjacency[node]:
+                step = (cost, distance) if weight == "cost" else (distance, cost)
+                candidate = (primary + step[0], secondary + step[1])
+                known = tree.get(destination)
+                if known is None or candidate < known[:2]:
+                    tree[destination] = (*candidate, node)
+                    heapq.heappush(heap, (*candidate, destination))
+        # Searched outside the lock; a concurrent search of the same origin gives the same tree
+        with self._lock:
+            return self._trees.setdefault((origin, weight), tree)
+
+    def cost_matrix(self, origins, destinations, weight="cost"):
+        """Return best-path costs from each origin to each destination.
+
+        The matrix is len(origins) x len(destinations), with inf where there
+        is no path or the origin is the destination.
+        """
+        if weight not in WEIGHTS:
+            raise ValueError(f"weight must be one of {WEIGHTS}")
+        matrix = np.full((len(origins), len(destinations)), np.inf)
+        for i, origin in enumerate(origins):
+            if origin not in self.adjacency:
+                continue
+            tree = self._tree(origin, weight)
+            for j, destination in enumerate(destinations):
+                if destination != origin and destination in tree:
+                    matrix[i, j] = tree[destination][0]
+        return matrix
+
+    def shortest(self, origin, destination, weight="cost"):
+        """Return {'cost', 'distance', 'path'} for the best path, or None."""
+        if weight not in WEIGHTS:
+            raise ValueError(f"weight must be one of {WEIGHTS}")
+        if origin not in self.adjacency or destination not in self.adjacency or origin == destination:
+            return None
+        tree = self._tree(origin, weight)
+        if destination not in tree:
+            return None
+        primary, secondary, _ = tree[destination]
+        cost, distance = (primary, secondary) if weight == "cost" else (secondary, primary)
+        path = [destination]
+        while path[-1] != origin:
+            path.append(tree[path[-1]][2])
+        path.reverse()
+        return {
+            "cost": Decimal(f"{cost:.2f}"),
+            "distance": Decimal(f"{distance:.2f}"),
+            "path": path,
+        }
+
+
+_graph = None
+_graph_key = None  # (Routes generation, routes loaded, monotonic time loaded)
+_graph_lock = threading.Lock()
+
+
+def _load_routes(tx=None):
+    conn = get_connection(tx)
+    cursor = conn.cursor()
+    cursor.execute("SELECT origin, destination, cost, distance_km FROM Routes ORDER BY origin, destination, cost")
+    routes = cursor.fetchall()
+    cursor.close()
+    conn.close()
+    return routes
+
+
+def get_route_graph(tx=None):
+    """Return the shared RouteGraph, rebuilt when Routes change.
+
+    Writes through this process change the Routes generation, which rebuilds
+    the graph on next use. Changes made by other processes are picked up by
+    rereading Routes every ROUTES_RECHECK seconds; when they are unchanged
+    the graph and the paths it has found so far are kept. Routes are read
+    and the graph built outside the lock, so lookups never wait on a rebuild.
+
+    Pass `tx` when calling inside a transaction, so a rebuild reads Routes on
+    the connection already held instead of checking out a second one.
+    """
+    global _graph, _graph_key
+    generation = table_generation("Routes")
+    with _graph_lock:
+        graph, key = _graph, _graph_key
+    if graph is not None and key[0] == generation and time.monotonic() - key[2] < ROUTES_RECHECK:
+        return graph
+    routes = _load_routes(tx)
+    if graph is None or routes != key[1]:
+        graph = RouteGraph(routes)
+    with _graph_lock:
+        _graph, _graph_key = graph, (generation, routes, time.monotonic())
+    return graph
+
+
+def get_shortest_route(origin, destination, weight="cost", tx=None):
+    """Return the cheapest (or shortest) multi-hop route between two locations."""
+    return get_route_graph(tx).shortest(origin, destination, weight)
@@ -0,0 +1,250 @@
+"""Named snapshots of the whole simulation state, saved and restored in bulk.
+
+A scenario is a gzip-compressed JSON Lines dump of every SCMS table,
+written from one consistent read snapshot. Each line holds one chunk of
+rows of one table. Restoring truncates all the tables and reloads them
+with multi-row inserts, with foreign-key and unique checks off for the
+session. The cost depends on the size of the scenario, not on how much
+the tables grew since. The built-in scenario "initial" holds the demo
+fixtures that reset_simulation() used to re-insert.
+
+LowStock, SummaryCounters and the inventory ledger are saved with the
+rest, so a restored scenario needs no rebuild. LogArchives and
+schema_migrations describe the files and schema, not the simulation, and
+are left alone.
+
+    python -m db.scenarios save peak-season
+    python -m db.scenarios restore peak-season
+    python -m db.scenarios restore initial
+    python -m db.scenarios list
+"""
+
+import argparse
+import gzip
+import json
+import os
+import re
+import time
+from datetime import datetime
+
+from db.cache import invalidate
+from db.connection import get_connection, transaction
+from db.counters import rebuild_counters_on
+from db.ledger import rebuild_ledger_on
+from db.log_writer import INSERT_LOG, current_user, flush_logs, log_row
+
+SCENARIO_DIR = os.getenv("SCMS_SCENARIO_DIR", "scenarios")
+INITIAL_SCENARIO = "initial"
+CHUNK_SIZE = 5000
+
+# Every table that makes up the simulation state
+TABLES = (
+    "Users", "Products", "Routes", "Inventory", "LowStock", "Orders", "Logistics",
+    "DemandForecast", "Reports", "Logs", "InventoryLedger", "InventorySnapshots",
+    "InventorySnapshotRows", "SummaryCounters",
+)
+
+# The built-in "initial" scenario; derived tables are rebuilt after loading it
+INITIAL_FIXTURES = {
+    "Users": (("username", "password", "role"), [
+        ("admin1", "adminpass123", "Admin"),
+        ("user1", "userpass123", "User"),
+    ]),
+    "Products": (("sku", "name", "description", "threshold"), [
+        ("SKU001", "Laptop", "High-performance laptop", 5),
+        ("SKU002", "Smartphone", "Latest model smartphone", 10),
+        ("SKU003", "Router", "Dual-band WiFi router", 8),
+    ]),
+    "Inventory": (("sku", "location", "quantity"), [
+        ("SKU001", "Warehouse A", 20),
+        ("SKU002", "Warehouse B", 15),
+        ("SKU003", "Warehouse A", 5),
+    ]),
+    "Routes": (("origin", "destination", "cost", "distance_km"), [
+        ("Warehouse A", "Retail Hub 1", 150.00, 25.5),
+        ("Warehouse A", "Retail Hub 2", 120.00, 5.0),
+        ("Warehouse A", "Retail Hub 3", 90.00, 10.0),
+        ("Warehouse B", "Retail Hub 1", 70.00, 15.0),
+        ("Warehouse B", "Retail Hub 2", 100.00, 25.0),
+        ("Warehouse B", "Retail Hub 3", 175.00, 30.0),
+        ("Warehouse B", "Warehouse A", 80.00, 20.0),
+        ("Warehouse A", "Warehouse B", 100.00, 30.0),
+    ]),
+}
+
+_NAME = re.compile(r"^[\w-]+$")
+
+
+def scenario_path(name, directory=SCENARIO_DIR):
+    """Return the dump file of scenario `name`."""
+    if not _NAME.match(name or ""):
+        raise Exception(f"Invalid scenario name {name!r}: use letters, digits, '_' and '-'")  # noqa: W0719
+    return os.path.join(directory, f"{name}.json.gz")
+
+
+def _columns(cursor, table):
+    """Return the stored (non-generated) columns of `table`, in table order."""
+    cursor.execute("""
+        SELECT column_name FROM information_schema.columns
+        WHERE table_schema = DATABASE() AND table_name = %s AND generation_expression = ''
+        ORDER BY ordinal_position
+    """, (table,))
+    return [row[0] for row in cursor.fetchall()]
+
+
+def save_scenario(name, directory=SCENARIO_DIR, chunk_size=CHUNK_SIZE):
+    """Dump every table to the scenario file, replacing it; return {table: rows}.
+
+    All tables are read in one transaction, so the dump is a consistent
+    point in time even while the app keeps writing.
+    """
+    if name == INITIAL_SCENARIO:
+        raise Exception(f"'{INITIAL_SCENARIO}' is built in and cannot be overwritten")  # noqa: W0719
+    path = scenario_path(name, directory)
+    os.makedirs(directory, exist_ok=True)
+    # Queued log entries belong to the state being saved
+    flush_logs()
+    counts = {}
+    tmp = path + ".tmp"
+    try:
+        with transaction() as tx, gzip.open(tmp, "wt", encoding="utf-8", compresslevel=1) as f:
+            cursor = tx.cursor()
+            columns = {table: _columns(cursor, table) for table in TABLES}
+            cursor.close()
+            f.write(json.dumps({"scenario": name, "saved_at": datetime.now().isoformat(timespec="seconds"),
+                                "tables": list(TABLES)}) + "\n")
+            for table in TABLES:
+                counts[table] = 0
+                # Unbuffered, so large tables stream through in chunks
+                cursor = tx.cursor(buffered=False)
+                cursor.execute(f"SELECT {', '.join(columns[table])} FROM {table}")
+                while True:
+                    rows = cursor.fetchmany(chunk_size)
+                    if not rows:
+                        break
+                    # Decimals and dates go out as strings, which MySQL parses back on insert
+                    f.write(json.dumps({"table": table, "columns": columns[table], "rows": rows},
+                                       default=str, ensure_ascii=False) + "\n")
+                    counts[table] += len(rows)
+                cursor.close()
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    return counts
+
+
+def _read_chunks(path):
+    """Yield (table, columns, rows) chunks of a scenario file."""
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        next(f)  # header
+        for line in f:
+            chunk = json.loads(line)
+            yield chunk["table"], chunk["columns"], chunk["rows"]
+
+
+def _initial_chunks():
+    for table, (columns, rows) in INITIAL_FIXTURES.items():
+        yield table, columns, rows
+
+
+def restore_scenario(name, directory=SCENARIO_DIR):
+    """Replace the contents of every table with scenario `name`; return {table: rows}.
+
+    TRUNCATE commits implicitly, so this cannot run inside a transaction
+    and a failed restore leaves the tables partly loaded: restore again.
+    """
+    if name == INITIAL_SCENARIO:
+        chunks = _initial_chunks()
+    else:
+        path = scenario_path(name, directory)
+        if not os.path.exists(path):
+            raise Exception(f"No scenario named {name}")  # noqa: W0719
+        chunks = _read_chunks(path)
+
+    # Queued entries predate the restore and must not reappear after it
+    flush_logs()
+    counts = dict.fromkeys(TABLES, 0)
+    conn = get_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SET foreign_key_checks = 0, unique_checks = 0")
+        for table in TABLES:
+            cursor.execute(f"TRUNCATE TABLE {table}")
+        for table, columns, rows in chunks:
+            if table not in counts:
+                continue
+            cursor.executemany(
+                f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join(['%s'] * len(columns))})",
+                rows,
+            )
+            counts[table] += len(rows)
+        if name == INITIAL_SCENARIO:
+            rebuild_counters_on(cursor)
+            rebuild_ledger_on(cursor)
+        cursor.execute(INSERT_LOG, log_row(current_user(), f"Restored scenario {name}",
+                                           "scenario.restore"))
+        conn.commit()
+    finally:
+        try:
+            # Session settings would otherwise follow the connection back into the pool
+            cursor.execute("SET foreign_key_checks = 1, unique_checks = 1")
+            cursor.close()
+        except Exception:  # noqa: W0703
+            # A connection that cannot reset them is broken; let the original error through
+            pass
+        conn.close()
+        invalidate(*TABLES)
+    return counts
+
+
+def list_scenarios(directory=SCENARIO_DIR):
+    """Return [(name, saved_at, bytes)] of the saved scenarios, with "initial" first."""
+    scenarios = [(INITIAL_SCENARIO, None, 0)]
+    if not os.path.isdir(directory):
+        return scenarios
+    for filename in sorted(os.listdir(directory)):
+        if not filename.endswith(".json.gz"):
+            continue
+        path = os.path.join(directory, filename)
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            header = json.loads(f.readline())
+        scenarios.append((header["scenario"], header["saved_at"], os.path.getsize(path)))
+    return scenarios
+
+
+def delete_scenario(name, directory=SCENARIO_DIR):
+    """Remove a saved scenario file."""
+    os.remove(scenario_path(name, directory))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Save and restore named simulation scenarios.")
+    parser.add_argument("command", choices=["save", "restore", "list", "delete"])
+    parser.add_argument("name", nargs="?")
+    parser.add_argument("--directory", default=SCENARIO_DIR)
+    args = parser.parse_args(argv)
+
+    if args.command == "list":
+        for name, saved_at, size in list_scenarios(args.directory):
+            print(f"{name}: built in" if saved_at is None else f"{name}: saved {saved_at}, {size / 1e6:.1f} MB")
+        return
+    if not args.name:
+        parser.error(f"{args.command} needs a scenario name")
+    if args.command == "delete":
+        delete_scenario(args.name, args.directory)
+        print(f"Deleted scenario {args.name}")
+        return
+
+    started = time.perf_counter()
+    if args.command == "save":
+        counts = save_scenario(args.name, args.directory)
+    else:
+        counts = restore_scenario(args.name, args.directory)
+    verb = "Saved" if args.command == "save" else "Restored"
+    print(f"{verb} {args.name}: {sum(counts.values())} rows in {time.perf_counter() - started:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
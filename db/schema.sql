@@ -24,8 +24,20 @@ CREATE TABLE Inventory (
     sku VARCHAR(20) NOT NULL,
     location VARCHAR(100) NOT NULL,
     quantity INT DEFAULT 0 CHECK (quantity >= 0),
+    location_type ENUM('Warehouse', 'Retail Hub') AS (
+        IF(location LIKE 'Retail Hub%', 'Retail Hub', 'Warehouse')
+    ) STORED,
     FOREIGN KEY (sku) REFERENCES Products(sku),
-    UNIQUE KEY unique_sku_location (sku, location)  
+    UNIQUE KEY unique_sku_location (sku, location),
+    INDEX idx_inventory_location (location)
+) ENGINE=InnoDB;
+
+-- Low Stock Table (warehouse rows below threshold, maintained by inventory writers)
+CREATE TABLE LowStock (
+    sku VARCHAR(20) NOT NULL,
+    location VARCHAR(100) NOT NULL,
+    PRIMARY KEY (sku, location),
+    FOREIGN KEY (sku) REFERENCES Products(sku) ON DELETE CASCADE
 ) ENGINE=InnoDB;
 
 -- Orders Table
@@ -36,8 +48,12 @@ CREATE TABLE Orders (
     customer_name VARCHAR(100),
     customer_location VARCHAR(100) NOT NULL,
     status ENUM('Pending', 'Processed') DEFAULT 'Pending',
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     FOREIGN KEY (sku) REFERENCES Products(sku),
-    INDEX idx_status (status)  -- ✅ Faster filtering by order status
+    INDEX idx_status (status),  -- ✅ Faster filtering by order status
+    INDEX idx_orders_status_id (status, order_id),
+    INDEX idx_orders_customer_id (customer_name, order_id),
+    INDEX idx_orders_location_id (customer_location, order_id)
 ) ENGINE=InnoDB;
 
 -- Logistics Table
@@ -47,7 +63,9 @@ CREATE TABLE Logistics (
     origin VARCHAR(100) NOT NULL,
     destination VARCHAR(100) NOT NULL,
     transport_cost DECIMAL(10,2) NOT NULL,
-    FOREIGN KEY (sku) REFERENCES Products(sku)
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (sku) REFERENCES Products(sku),
+    INDEX idx_logistics_sku_id (sku, logistics_id)
 ) ENGINE=InnoDB;
 
 -- Routes Table
@@ -58,7 +76,9 @@ CREATE TABLE Routes (
     cost DECIMAL(10,2) NOT NULL,
     distance_km DECIMAL(6,2),
     UNIQUE KEY unique_route (origin, destination),  
-    INDEX idx_origin_dest (origin, destination)     
+    INDEX idx_origin_dest (origin, destination),
+    INDEX idx_routes_origin_dest_cost (origin, destination, cost),
+    INDEX idx_routes_destination (destination)
 ) ENGINE=InnoDB;
 
 -- Demand Forecast Table
@@ -67,7 +87,10 @@ CREATE TABLE DemandForecast (
     sku VARCHAR(20) NOT NULL,
     forecast_value INT NOT NULL,
     forecast_date DATE NOT NULL,
-    FOREIGN KEY (sku) REFERENCES Products(sku)
+    source VARCHAR(20) NOT NULL DEFAULT 'manual',
+    FOREIGN KEY (sku) REFERENCES Products(sku),
+    INDEX idx_forecast_date (forecast_date),
+    INDEX idx_forecast_source_date (source, forecast_date)
 ) ENGINE=InnoDB;
 
 -- Reports Table
@@ -81,8 +104,63 @@ CREATE TABLE Reports (
 CREATE TABLE Logs (
     log_id INT AUTO_INCREMENT PRIMARY KEY,
     user_id INT NOT NULL,
+    action_type VARCHAR(30) NOT NULL DEFAULT 'other',
+    entity_type VARCHAR(30) NULL,
+    entity_id VARCHAR(100) NULL,
     action TEXT NOT NULL,
-    FOREIGN KEY (user_id) REFERENCES Users(user_id)
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (user_id) REFERENCES Users(user_id),
+    INDEX idx_logs_created (created_at),
+    INDEX idx_logs_type (action_type, log_id),
+    INDEX idx_logs_entity (entity_type, entity_id, log_id),
+    FULLTEXT INDEX ft_logs_action (action)
+) ENGINE=InnoDB;
+
+-- Log Archives (compressed files holding Logs rows past retention, see db/log_archive.py)
+CREATE TABLE LogArchives (
+    archive_id INT AUTO_INCREMENT PRIMARY KEY,
+    path VARCHAR(255) NOT NULL,
+    first_log_id INT NOT NULL,
+    last_log_id INT NOT NULL,
+    from_ts TIMESTAMP NULL,
+    to_ts TIMESTAMP NULL,
+    row_count INT NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+) ENGINE=InnoDB;
+
+-- Inventory Ledger (one signed row per stock change, written by every inventory writer)
+CREATE TABLE InventoryLedger (
+    entry_id BIGINT AUTO_INCREMENT PRIMARY KEY,
+    sku VARCHAR(20) NOT NULL,
+    location VARCHAR(100) NOT NULL,
+    delta INT NOT NULL,
+    reason VARCHAR(20) NOT NULL,
+    created_at TIMESTAMP(6) DEFAULT CURRENT_TIMESTAMP(6),
+    INDEX idx_ledger_created (created_at),
+    INDEX idx_ledger_sku_location (sku, location, entry_id)
+) ENGINE=InnoDB;
+
+-- Inventory Snapshots (stock as of a ledger position)
+CREATE TABLE InventorySnapshots (
+    snapshot_id INT AUTO_INCREMENT PRIMARY KEY,
+    taken_at TIMESTAMP(6) DEFAULT CURRENT_TIMESTAMP(6),
+    last_entry_id BIGINT NOT NULL,
+    INDEX idx_snapshots_taken (taken_at)
+) ENGINE=InnoDB;
+
+CREATE TABLE InventorySnapshotRows (
+    snapshot_id INT NOT NULL,
+    sku VARCHAR(20) NOT NULL,
+    location VARCHAR(100) NOT NULL,
+    quantity INT NOT NULL,
+    PRIMARY KEY (snapshot_id, sku, location),
+    FOREIGN KEY (snapshot_id) REFERENCES InventorySnapshots(snapshot_id) ON DELETE CASCADE
+) ENGINE=InnoDB;
+
+-- Summary Counters (maintained by writers, read by generate_summary_report)
+CREATE TABLE SummaryCounters (
+    name VARCHAR(50) PRIMARY KEY,
+    value DECIMAL(14,2) NOT NULL DEFAULT 0
 ) ENGINE=InnoDB;
 
 -- Sample Users
@@ -102,6 +180,21 @@ INSERT INTO Inventory (sku, location, quantity) VALUES
 ('SKU002', 'Warehouse B', 15),
 ('SKU003', 'Warehouse A', 5);
 
+-- Opening Ledger Balances
+INSERT INTO InventoryLedger (sku, location, delta, reason)
+SELECT sku, location, quantity, 'opening' FROM Inventory;
+
+-- Initial Low Stock
+INSERT INTO LowStock (sku, location) VALUES
+('SKU003', 'Warehouse A');
+
+-- Initial Counters (no orders or logistics yet; SKU003 is below threshold)
+INSERT INTO SummaryCounters (name, value) VALUES
+('total_orders', 0),
+('processed_orders', 0),
+('low_stock_items', 1),
+('total_logistics_cost', 0);
+
 -- Sample Logistics
 -- INSERT INTO Logistics (sku, origin, destination, transport_cost) VALUES
 -- ('SKU001', 'Warehouse A', 'Retail Hub 1', 150.00),
@@ -141,3 +234,7 @@ SELECT * FROM Routes;
 SELECT * FROM DemandForecast; 
 SELECT * FROM Reports; 
 SELECT * FROM Logs;
+SELECT * FROM LogArchives;
+SELECT * FROM SummaryCounters;
+SELECT * FROM LowStock;
+SELECT * FROM InventoryLedger;
@@ -0,0 +1,232 @@
+"""Headless, time-stepped supply-chain simulation.
+
+State lives in NumPy arrays (SKUs × warehouses stock, SKUs × hubs
+backlog, a ring buffer of supplier orders in transit), so each simulated
+day is a handful of vectorized operations no matter how many SKUs there
+are. Every day:
+
+1. Customer demand at each retail hub is drawn from a Poisson distribution.
+2. Demand (plus backlog) is served from warehouses in order of route cost
+   to the hub; hubs are served in a fixed order, so stock goes to the
+   first hub when it runs short.
+3. Supplier deliveries that are due arrive at the warehouses.
+4. Warehouses whose stock plus stock on order is below the product
+   threshold reorder up to `order_up_to` × threshold.
+
+The run starts from Products, Inventory and Routes and, if asked, writes
+the final stock and one Logistics row per (SKU, origin, hub) back through
+db.queries.
+
+    python -m db.simulation --days 365 --seed 1
+    python -m db.simulation --days 90 --write-back
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from db.connection import get_connection, transaction
+from db.queries import get_customer_locations, record_shipments, set_inventory_levels, write_log
+from db.routing import get_route_graph
+
+HISTORY = ("demand", "fulfilled", "backlog", "lost", "transport_cost",
+           "stock_on_hand", "stockouts", "supplier_units")
+
+
+class Simulation:
+    """In-memory simulation over `skus` × `warehouses` × `hubs`.
+
+    `stock` is an int array (SKUs × warehouses); only pairs with a starting
+    Inventory row (`stocked`) are replenished. `unit_cost` is the per-unit
+    route cost (warehouses × hubs, inf where there is no route).
+    `demand_rate` is the mean daily demand per SKU and hub; it defaults to a
+    fifth of the product threshold spread over the hubs.
+    """
+
+    def __init__(self, skus, thresholds, warehouses, hubs, stock, unit_cost,
+                 stocked=None, demand_rate=None, supplier_lead_time=3,
+                 order_up_to=3.0, backorders=True, seed=None):
+        self.skus = list(skus)
+        self.warehouses = list(warehouses)
+        self.hubs = list(hubs)
+        self.thresholds = np.asarray(thresholds, dtype=np.int64)
+        self.stock = np.array(stock, dtype=np.int64)
+        self.initial_stock = self.stock.copy()
+        self.stocked = self.stock > 0 if stocked is None else np.asarray(stocked, dtype=bool)
+        self.unit_cost = np.asarray(unit_cost, dtype=float)
+        if demand_rate is None:
+            demand_rate = np.repeat(self.thresholds[:, None] / 5.0 / max(len(self.hubs), 1),
+                                    len(self.hubs), axis=1)
+        self.demand_rate = np.broadcast_to(np.asarray(demand_rate, dtype=float),
+                                           (len(self.skus), len(self.hubs)))
+        self.order_up_to = (self.thresholds * order_up_to).astype(np.int64)
+        self.backorders = backorders
+        self.rng = np.random.default_rng(seed)
+
+        n_skus, n_warehouses = self.stock.shape
+        self.lead_time = max(1, int(supplier_lead_time))
+        self.pipeline = np.zeros((self.lead_time, n_skus, n_warehouses), dtype=np.int64)
+        self.backlog = np.zeros((n_skus, len(self.hubs)), dtype=np.int64)
+        # Indexed (warehouse, hub, sku) so the per-route slice in step() is contiguous
+        self.shipped = np.zeros((n_warehouses, len(self.hubs), n_skus), dtype=np.int64)
+        # Reachable warehouses for each hub, cheapest first
+        self.sources = [
+            [w for w in np.argsort(self.unit_cost[:, h], kind="stable") if np.isfinite(self.unit_cost[w, h])]
+            for h in range(len(self.hubs))
+        ]
+        self.day = 0
+        self.history = {name: [] for name in HISTORY}
+
+    @classmethod
+    def from_database(cls, **kwargs):
+        """Seed a simulation from Products, warehouse Inventory and the route graph."""
+        conn = get_connection()
+        cursor = conn.cursor()
+        cursor.execute("SELECT sku, threshold FROM Products ORDER BY sku")
+        products = cursor.fetchall()
+        cursor.execute("""
+            SELECT sku, location, quantity FROM Inventory
+            WHERE location_type = 'Warehouse'
+        """)
+        inventory = cursor.fetchall()
+        cursor.close()
+        conn.close()
+
+        skus = [sku for sku, _ in products]
+        sku_index = {sku: i for i, sku in enumerate(skus)}
+        warehouses = sorted({location for _, location, _ in inventory})
+        warehouse_index = {w: i for i, w in enumerate(warehouses)}
+        hubs = sorted(get_customer_locations())
+
+        stock = np.zeros((len(skus), len(warehouses)), dtype=np.int64)
+        stocked = np.zeros_like(stock, dtype=bool)
+        for sku, location, quantity in inventory:
+            if sku in sku_index:
+                stock[sku_index[sku], warehouse_index[location]] = quantity
+                stocked[sku_index[sku], warehouse_index[location]] = True
+
+        graph = get_route_graph()
+        unit_cost = graph.cost_matrix(warehouses, hubs)
+
+        return cls(skus, [t for _, t in products], warehouses, hubs, stock, unit_cost,
+                   stocked=stocked, **kwargs)
+
+    def step(self):
+        """Advance the simulation by one day."""
+        demand = self.rng.poisson(self.demand_rate)
+        need = demand + self.backlog
+        cost = 0.0
+        for h, sources in enumerate(self.sources):
+            for w in sources:
+                take = np.minimum(need[:, h], self.stock[:, w])
+                self.stock[:, w] -= take
+                need[:, h] -= take
+                self.shipped[w, h] += take
+                cost += float(take.sum()) * self.unit_cost[w, h]
+        fulfilled = int(demand.sum() + self.backlog.sum() - need.sum())
+        if self.backorders:
+            self.backlog, lost = need, 0
+        else:
+            self.backlog, lost = np.zeros_like(need), int(need.sum())
+
+        slot = self.day % self.lead_time
+        self.stock += self.pipeline[slot]
+        self.pipeline[slot] = 0
+
+        position = self.stock + self.pipeline.sum(axis=0)
+        reorder = np.where(self.stocked & (position < self.thresholds[:, None]),
+                           self.order_up_to[:, None] - position, 0)
+        # Orders placed today arrive lead_time days later, in the slot just emptied
+        self.pipeline[slot] = reorder
+
+        self.day += 1
+        for name, value in (
+            ("demand", int(demand.sum())),
+            ("fulfilled", fulfilled),
+            ("backlog", int(self.backlog.sum())),
+            ("lost", lost),
+            ("transport_cost", cost),
+            ("stock_on_hand", int(self.stock.sum())),
+            ("stockouts", int((self.stocked & (self.stock == 0)).sum())),
+            ("supplier_units", int(reorder.sum())),
+        ):
+            self.history[name].append(value)
+
+    def run(self, days=365):
+        """Simulate `days` days and return summary()."""
+        for _ in range(days):
+            self.step()
+        return self.summary()
+
+    def summary(self):
+        """Totals over the days simulated so far."""
+        demand = sum(self.history["demand"])
+        fulfilled = sum(self.history["fulfilled"])
+        return {
+            "days": self.day,
+            "skus": len(self.skus),
+            "warehouses": len(self.warehouses),
+            "hubs": len(self.hubs),
+            "demand": demand,
+            "fulfilled": fulfilled,
+            "fill_rate": fulfilled / demand if demand else 1.0,
+            "backlog": int(self.backlog.sum()),
+            "lost": sum(self.history["lost"]),
+            "transport_cost": round(float(sum(self.history["transport_cost"])), 2),
+            "supplier_units": sum(self.history["supplier_units"]),
+            "stock_on_hand": int(self.stock.sum()),
+            "stockout_days": sum(self.history["stockouts"]),
+        }
+
+    def write_back(self, user_id=None):
+        """Store final stock and one summarized Logistics row per route used.
+
+        Everything is written in one transaction. Returns (inventory rows,
+        logistics rows) written.
+        """
+        changed = np.argwhere(self.stocked & (self.stock != self.initial_stock))
+        levels = [(self.skus[s], self.warehouses[w], int(self.stock[s, w])) for s, w in changed]
+        shipments = [
+            (self.skus[s], self.warehouses[w], self.hubs[h],
+             round(float(self.shipped[w, h, s]) * self.unit_cost[w, h], 2))
+            for w, h, s in np.argwhere(self.shipped > 0)
+        ]
+        with transaction() as tx:
+            set_inventory_levels(levels, reason="simulation", tx=tx)
+            record_shipments(shipments, tx=tx)
+            summary = self.summary()
+            write_log(user_id, f"Simulated {summary['days']} days: {summary['fulfilled']} of "
+                               f"{summary['demand']} units fulfilled, ₹{summary['transport_cost']:.2f} "
+                               f"transport", tx=tx, action_type="simulation.run")
+        self.initial_stock = self.stock.copy()
+        self.shipped[:] = 0
+        return len(levels), len(shipments)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a headless supply-chain simulation.")
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--lead-time", type=int, default=3, help="supplier lead time in days")
+    parser.add_argument("--order-up-to", type=float, default=3.0, help="reorder level as a multiple of threshold")
+    parser.add_argument("--lost-sales", action="store_true", help="drop unmet demand instead of backordering")
+    parser.add_argument("--write-back", action="store_true", help="store final stock and shipment history")
+    args = parser.parse_args(argv)
+
+    sim = Simulation.from_database(seed=args.seed, supplier_lead_time=args.lead_time,
+                                   order_up_to=args.order_up_to, backorders=not args.lost_sales)
+    started = time.perf_counter()
+    summary = sim.run(args.days)
+    elapsed = time.perf_counter() - started
+    print(f"Simulated {summary['days']} days for {summary['skus']} SKUs, {summary['warehouses']} "
+          f"warehouses and {summary['hubs']} hubs in {elapsed:.2f}s")
+    for name, value in summary.items():
+        print(f"  {name}: {value:.3f}" if isinstance(value, float) else f"  {name}: {value}")
+    if args.write_back:
+        inventory, logistics = sim.write_back()
+        print(f"Wrote {inventory} inventory rows and {logistics} logistics rows")
+
+
+if __name__ == "__main__":
+    main()
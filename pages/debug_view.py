@@ -0,0 +1,81 @@
+import streamlit as st
+from db.cache import get_cache_stats
+from db.connection import get_pool_stats
+from db.metrics import (
+    enable_metrics, get_metrics, metrics_enabled, render_prometheus,
+    reset_metrics, serve_metrics, write_prometheus
+)
+
+if "role" not in st.session_state or st.session_state.role != "Admin":
+    st.error("⛔ Access Denied: Admins only.")
+    st.stop()
+
+st.title("🛠️ Debug: Query Metrics")
+
+enabled = st.toggle("Record query metrics", value=metrics_enabled())
+if enabled != metrics_enabled():
+    enable_metrics(enabled)
+    st.rerun()
+
+if st.button("Reset Metrics"):
+    reset_metrics()
+    st.rerun()
+
+metrics = get_metrics()
+
+# --- Per Page ---
+st.subheader("📄 Per Page")
+if metrics:
+    pages = {}
+    for m in metrics:
+        page = pages.setdefault(m["page"], {"Page": m["page"], "Calls": 0, "Connections": 0, "Rows": 0, "Time (ms)": 0.0})
+        page["Calls"] += m["calls"]
+        page["Connections"] += m["connections"]
+        page["Rows"] += m["rows"]
+        page["Time (ms)"] += m["seconds"] * 1000
+    st.dataframe(sorted(pages.values(), key=lambda p: -p["Calls"]), use_container_width=True)
+
+    # --- Per Function ---
+    st.subheader("🔍 Per Function")
+    page_filter = st.selectbox("Page", ["All"] + sorted(pages))
+    st.dataframe([{
+        "Page": m["page"],
+        "Function": m["function"],
+        "Calls": m["calls"],
+        "Errors": m["errors"],
+        "Avg (ms)": round(m["seconds"] * 1000 / m["calls"], 2),
+        "Total (ms)": round(m["seconds"] * 1000, 1),
+        "Rows": m["rows"],
+        "Connections": m["connections"],
+    } for m in sorted(metrics, key=lambda m: -m["seconds"])
+        if page_filter == "All" or m["page"] == page_filter], use_container_width=True)
+elif enabled:
+    st.info("No queries recorded yet. Use the other pages, then come back.")
+else:
+    st.info("Metrics are off. Turn on recording to collect them.")
+
+# --- Pool & Cache ---
+st.subheader("🔌 Connection Pool & Cache")
+left, right = st.columns(2)
+left.json(get_pool_stats())
+right.json(get_cache_stats())
+
+# --- Export ---
+st.subheader("📤 Prometheus Export")
+st.download_button("Download metrics.prom", render_prometheus(), file_name="metrics.prom", mime="text/plain")
+
+path = st.text_input("Write to file", value="metrics.prom")
+if st.button("Write File"):
+    try:
+        write_prometheus(path)
+        st.success(f"✅ Wrote {path}")
+    except OSError as e:
+        st.error(f"Failed to write metrics: {e}")
+
+port = st.number_input("Serve on local port", min_value=1024, max_value=65535, value=9464)
+if st.button("Start Endpoint"):
+    try:
+        host, bound = serve_metrics(int(port))
+        st.success(f"✅ Serving metrics at http://{host}:{bound}/metrics")
+    except OSError as e:
+        st.error(f"Failed to start endpoint: {e}")
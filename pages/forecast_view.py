@@ -1,11 +1,15 @@
 import streamlit as st
-from db.queries import get_forecast, add_forecast, get_inventory_for_forecast
+from db.forecasting import METHODS, PERIODS, refresh_forecasts
+from db.queries import add_forecast, get_forecast_gaps
 from datetime import date
+from db.log_writer import set_current_user
 
 if "role" not in st.session_state or st.session_state.role != "Admin":
     st.error("⛔ Access Denied: Admins only.")
     st.stop()
 
+set_current_user(st.session_state.get("user_id"))
+
 st.title("📈 Demand Forecast")
 
 # --- Add Forecast ---
@@ -21,28 +25,50 @@ if st.button("Add Forecast"):
     except Exception as e:
         st.error(f"Failed to add forecast: {e}")
 
+# --- Generate From Order History ---
+st.subheader("Generate From Order History")
+gen_cols = st.columns(3)
+period = gen_cols[0].selectbox("Period", PERIODS, index=PERIODS.index("week"))
+horizon = gen_cols[1].number_input("Periods Ahead", min_value=1, max_value=52, value=4)
+method = gen_cols[2].selectbox("Model", METHODS)
+
+if st.button("🔄 Refresh All Forecasts"):
+    try:
+        report = refresh_forecasts(period, horizon, method)
+        st.success(f"✅ Wrote {report['rows']} forecasts for {report['skus']} SKUs in {report['seconds']:.2f}s")
+    except Exception as e:
+        st.error(f"Failed to refresh forecasts: {e}")
+
 # --- Forecasted Demand Table ---
 st.subheader("📊 Forecasted Demand")
-forecasts = get_forecast()
+filter_cols = st.columns(3)
+use_range = filter_cols[0].checkbox("Filter by Date Range")
+start_date = filter_cols[1].date_input("From", value=date.today(), disabled=not use_range)
+end_date = filter_cols[2].date_input("To", value=date.today(), disabled=not use_range)
+by_location = st.checkbox("Show Inventory by Location")
+
+forecasts = get_forecast_gaps(
+    start_date if use_range else None,
+    end_date if use_range else None,
+    by_location=by_location,
+)
 
 if forecasts:
     forecast_table = []
     for f in forecasts:
-        sku, forecast_qty, f_date = f
-        current_inventory = get_inventory_for_forecast(sku)  # Returns total quantity across all locations
-        gap = forecast_qty - current_inventory
-        status = "OK" if gap <= 0 else "⚠️ Shortage"
-
-        forecast_table.append({
+        sku, forecast_qty, f_date, current_inventory, gap, status = f[:6]
+        row = {
             "SKU": sku,
             "Forecast Qty": forecast_qty,
             "Date": f_date,
             "Current Inventory": current_inventory,
             "Gap": gap,
-            "Status": status
-        })
+            "Status": "OK" if status == "OK" else "⚠️ Shortage"
+        }
+        if by_location:
+            row["By Location"] = ", ".join(f"{loc}: {qty}" for loc, qty in f[6])
+        forecast_table.append(row)
 
-    st.table(forecast_table)
+    st.dataframe(forecast_table, use_container_width=True, hide_index=True)
 else:
     st.info("No forecast data available.")
-
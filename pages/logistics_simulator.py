@@ -1,16 +1,23 @@
 import streamlit as st
+from components.grid import data_grid
+from components.pagination import keyset_page
+from db.connection import transaction
 from db.queries import (
-    move_product, get_route_cost, get_orders,
-    update_order_status, move_order_to_customer,
-    get_inventory_for_sku, get_locations,
-    get_cheapest_route_details, write_log,
-    suggest_cheapest_origin
+    move_product, get_orders_page,
+    move_order_to_customer, get_fulfillment_options,
+    get_locations, suggest_cheapest_origin
 )
+from db.fulfillment import plan_fulfillment, apply_fulfillment_plan
+from db.replenishment import plan_replenishment, apply_replenishment_plan
+from db.routing import get_shortest_route
+from db.log_writer import set_current_user
 
 if "role" not in st.session_state or st.session_state.role != "Admin":
     st.error("⛔ Access Denied: Admins only.")
     st.stop()
 
+set_current_user(st.session_state.get("user_id"))
+
 st.title("🚚 Logistics Simulator")
 
 # --- Manual Movement ---
@@ -29,21 +36,18 @@ if sku and destination:
     if suggestion:
         st.caption(f"💡 Suggested Origin: {suggestion['origin']} (₹{suggestion['cost']:.2f})")
 
-origin = st.selectbox("Origin Warehouse", origins, index=origins.index(suggestion['origin']) if suggestion else 0, key="manual_origin")
+origin = st.selectbox("Origin Warehouse", origins, index=origins.index(suggestion['origin']) if suggestion and suggestion['origin'] in origins else 0, key="manual_origin")
 
 if sku and origin and destination and quantity:
-    route_info = get_cheapest_route_details(origin.strip(), destination.strip())
-    if route_info:
-        st.caption(f"📍 Route Info: ₹{route_info['cost']} for {route_info['distance']} km")
-
-    cost_per_unit = get_route_cost(origin.strip(), destination.strip())
-    if cost_per_unit is not None:
-        total_cost = cost_per_unit * quantity
+    route = get_shortest_route(origin.strip(), destination.strip())
+    if route is not None:
+        st.caption(f"📍 Route: {' → '.join(route['path'])} — ₹{route['cost']} for {route['distance']} km")
+        total_cost = route["cost"] * quantity
         st.info(f"Transport Cost: ₹{total_cost:.2f}")
         if st.button("Simulate Movement"):
             try:
-                move_product(sku.strip().upper(), origin.strip(), destination.strip(), quantity, total_cost)
-                write_log(1, f"Moved {quantity} units of {sku.upper()} from {origin} to {destination}")
+                with transaction() as tx:
+                    move_product(sku.strip().upper(), origin.strip(), destination.strip(), quantity, total_cost, tx=tx)
                 st.success(f"✅ Moved {quantity} units of {sku} from {origin} to {destination}")
             except Exception as e:
                 st.error(f"Movement failed: {e}")
@@ -53,52 +57,143 @@ if sku and origin and destination and quantity:
 # --- Move Orders to Customer ---
 st.subheader("📦 Move Orders to Customer")
 
-orders = get_orders()
-pending_orders = [o for o in orders if o[5] == "Pending"]
+pending_orders = keyset_page(
+    "pending_orders",
+    lambda before_id, limit: get_orders_page(status="Pending", before_id=before_id, limit=limit),
+)
 
 if pending_orders:
-    st.markdown("### Pending Orders")
-    header = st.columns([1.2, 2, 1.2, 2, 2, 2])
-    header[0].markdown("**Order ID**")
-    header[1].markdown("**SKU**")
-    header[2].markdown("**Qty**")
-    header[3].markdown("**Customer**")
-    header[4].markdown("**Location**")
-    header[5].markdown("**Action**")
-
-    for order in pending_orders:
-        order_id, sku, qty, customer, location, status = order
-        row = st.columns([1.2, 2, 1.2, 2, 2, 2])
-        row[0].write(order_id)
-        row[1].write(sku)
-        row[2].write(qty)
-        row[3].write(customer)
-        row[4].write(location)
-
-        inventory_sources = get_inventory_for_sku(sku.strip().upper())
-        valid_origins = [loc for loc, available_qty in inventory_sources if available_qty >= qty and not loc.startswith("Retail Hub")]
-
+    # Stock, valid origins and suggestions for the whole page in one query
+    options = get_fulfillment_options([
+        (order_id, sku.strip().upper(), qty, location.strip())
+        for order_id, sku, qty, _, location, _ in pending_orders
+    ])
+
+    rows = []
+    for order_id, sku, qty, customer, location, _ in pending_orders:
+        suggestion = options[order_id]["suggestion"]
+        rows.append((order_id, sku, qty, customer, location,
+                     suggestion["origin"] if suggestion else "⚠️ No warehouse has enough stock",
+                     float(suggestion["cost"]) if suggestion else None))
+    selected = data_grid(
+        "pending_orders", rows,
+        ["Order ID", "SKU", "Qty", "Customer", "Location", "Suggested Origin", "Route Cost (₹)"],
+        column_config={"Route Cost (₹)": st.column_config.NumberColumn(format="%.2f")},
+    )
+    by_id = {order[0]: order for order in pending_orders}
+    selected = [by_id[row[0]] for row in selected]
+
+    if len(selected) == 1:
+        # One order: pick the origin and preview the route
+        order_id, sku, qty, customer, location, _ = selected[0]
+        valid_origins = options[order_id]["valid_origins"]
+        suggestion = options[order_id]["suggestion"]
         if not valid_origins:
-            row[5].warning("⚠️ No warehouse has enough stock")
+            st.warning(f"⚠️ Order #{order_id}: no warehouse has enough stock")
         else:
-            # Suggest cheapest origin
-            suggestion = suggest_cheapest_origin(sku.strip().upper(), location.strip())
-            if suggestion:
-                row[5].caption(f"💡 Suggested: {suggestion['origin']} (₹{suggestion['cost']:.2f})")
-
-            selected_origin = row[5].selectbox("Origin", valid_origins, index=valid_origins.index(suggestion['origin']) if suggestion and suggestion['origin'] in valid_origins else 0, key=f"origin_{order_id}")
-            route_cost = get_route_cost(selected_origin.strip(), location.strip())
-            if route_cost is None:
-                row[5].warning("⚠️ No route from origin to customer")
+            selected_origin = st.selectbox(
+                f"Origin for order #{order_id}", valid_origins,
+                index=valid_origins.index(suggestion["origin"]) if suggestion and suggestion["origin"] in valid_origins else 0,
+                key=f"origin_{order_id}",
+            )
+            route = get_shortest_route(selected_origin.strip(), location.strip())
+            if route is None:
+                st.warning("⚠️ No route from origin to customer")
             else:
-                if row[5].button("🚚 Move", key=f"move_{order_id}"):
+                st.caption(f"📍 Route: {' → '.join(route['path'])} — ₹{route['cost'] * qty:.2f}")
+                if st.button("🚚 Move Order"):
                     try:
-                        move_order_to_customer(order_id, sku.strip().upper(), qty, selected_origin.strip(), location.strip())
-                        update_order_status(order_id, "Processed")
-                        write_log(1, f"Processed order #{order_id}: {qty} units of {sku.upper()} from {selected_origin} to {location}")
+                        # Stock move, status change and their audit entries commit together
+                        with transaction() as tx:
+                            move_order_to_customer(order_id, sku.strip().upper(), qty, selected_origin.strip(), location.strip(), tx=tx)
                         st.success(f"✅ Order #{order_id} moved from {selected_origin} to {location}")
                         st.rerun()
                     except Exception as e:
                         st.error(f"Failed to move order: {e}")
+    elif selected:
+        # Several orders: ship each from its suggested origin, all or nothing
+        movable = [o for o in selected if options[o[0]]["suggestion"]]
+        if len(movable) < len(selected):
+            st.caption("Orders without a suggested origin are skipped.")
+        if st.button(f"🚚 Move {len(movable)} Orders via Suggested Origins", disabled=not movable):
+            try:
+                with transaction() as tx:
+                    for order_id, sku, qty, customer, location, _ in movable:
+                        origin = options[order_id]["suggestion"]["origin"]
+                        move_order_to_customer(order_id, sku.strip().upper(), qty, origin, location.strip(), tx=tx)
+                st.success(f"✅ Moved {len(movable)} orders")
+                st.rerun()
+            except Exception as e:
+                st.error(f"Failed to move orders (nothing was changed): {e}")
+    else:
+        st.caption("Select orders in the table to move them.")
 else:
     st.info("No pending orders to move.")
+
+# --- Batch Fulfillment ---
+st.subheader("🧮 Batch Fulfillment Plan")
+st.caption("Assign every pending order to a warehouse at once, approximately minimizing total transport cost (Vogel's method).")
+
+if st.button("Plan All Pending Orders"):
+    st.session_state.fulfillment_plan = plan_fulfillment()
+
+plan = st.session_state.get("fulfillment_plan")
+if plan:
+    if plan["assignments"]:
+        st.table([{
+            "Order ID": a["order_id"],
+            "SKU": a["sku"],
+            "Qty": a["quantity"],
+            "From": a["origin"],
+            "To": a["destination"],
+            "Route": " → ".join(a["path"]),
+            "Cost (₹)": f"{a['cost']:.2f}",
+        } for a in plan["assignments"]])
+        st.info(f"Total Transport Cost: ₹{plan['total_cost']:.2f}")
+    if plan["unassigned"]:
+        st.warning(f"{len(plan['unassigned'])} orders cannot be fulfilled")
+        st.table([{"Order ID": u["order_id"], "SKU": u["sku"], "Reason": u["reason"]} for u in plan["unassigned"]])
+
+    if plan["assignments"] and st.button("✅ Apply Plan"):
+        try:
+            applied = apply_fulfillment_plan(plan)
+            st.session_state.fulfillment_plan = None
+            st.success(f"Fulfilled {applied} orders")
+            st.rerun()
+        except Exception as e:
+            st.error(f"Failed to apply plan (nothing was changed): {e}")
+
+# --- Replenishment ---
+st.subheader("🔁 Replenish Low Stock")
+st.caption("Move surplus between warehouses so every warehouse row is back at its threshold, at minimum transport cost.")
+
+if st.button("Plan Replenishment"):
+    st.session_state.replenishment_plan = plan_replenishment()
+
+replenishment = st.session_state.get("replenishment_plan")
+if replenishment:
+    if replenishment["transfers"]:
+        st.dataframe([{
+            "SKU": t["sku"],
+            "Qty": t["quantity"],
+            "From": t["origin"],
+            "To": t["destination"],
+            "Route": " → ".join(t["path"]),
+            "Cost (₹)": f"{t['cost']:.2f}",
+        } for t in replenishment["transfers"]], use_container_width=True, hide_index=True)
+        st.info(f"Total Transport Cost: ₹{replenishment['total_cost']:.2f}")
+    else:
+        st.info("Nothing to transfer.")
+    if replenishment["unmet"]:
+        st.warning(f"{len(replenishment['unmet'])} warehouse rows cannot be topped up from surplus")
+        st.dataframe([{"SKU": u["sku"], "Location": u["location"], "Short": u["shortfall"]}
+                      for u in replenishment["unmet"]], use_container_width=True, hide_index=True)
+
+    if replenishment["transfers"] and st.button("✅ Apply Replenishment"):
+        try:
+            applied = apply_replenishment_plan(replenishment)
+            st.session_state.replenishment_plan = None
+            st.success(f"Applied {applied} transfers")
+            st.rerun()
+        except Exception as e:
+            st.error(f"Failed to apply plan (nothing was changed): {e}")
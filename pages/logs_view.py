@@ -1,31 +1,110 @@
 import streamlit as st
-from db.queries import get_logs, reset_simulation
+from datetime import date, datetime, time, timedelta
+from components.grid import paged_grid
+from db.log_archive import LOG_RETENTION_DAYS, archive_logs, list_archives, read_archive
+from db.queries import get_log_action_types, get_logs_page, reset_simulation
+from db.scenarios import INITIAL_SCENARIO, delete_scenario, list_scenarios, restore_scenario, save_scenario
+from db.log_writer import set_current_user
 
 if "role" not in st.session_state or st.session_state.role != "Admin":
     st.error("⛔ Access Denied: Admins only.")
     st.stop()
 
+set_current_user(st.session_state.get("user_id"))
+
 st.title("📝 Logs Viewer")
 
 # --- Logs Table ---
 st.subheader("System Logs")
 
-logs = get_logs()
-
-if logs:
-    log_table = []
-    for log in logs:
-        user_id, action = log
-        log_table.append({
-            "User ID": user_id,
-            "Action": action
-        })
-    st.table(log_table)
+col1, col2, col3 = st.columns(3)
+today = date.today()
+period = col1.date_input("Date range", value=(today - timedelta(days=7), today), key="logs_period")
+action_type = col2.selectbox("Action type", ["All"] + get_log_action_types(), key="logs_type")
+search = col3.text_input("Search actions", key="logs_search").strip() or None
+
+col4, col5 = st.columns(2)
+entity_type = col4.selectbox("Entity", ["All", "product", "order"], key="logs_entity_type")
+entity_id = col5.text_input("Entity ID (SKU or order #)", key="logs_entity_id").strip() or None
+
+since = until = None
+if isinstance(period, tuple) and len(period) == 2:
+    since = datetime.combine(period[0], time.min)
+    until = datetime.combine(period[1] + timedelta(days=1), time.min)
+filters = {
+    "since": since,
+    "until": until,
+    "action_type": None if action_type == "All" else action_type,
+    "entity_type": None if entity_type == "All" else entity_type,
+    "entity_id": entity_id.upper() if entity_id and entity_type == "product" else entity_id,
+    "search": search,
+}
+
+logs, _ = paged_grid(
+    "logs",
+    lambda before_id, limit: get_logs_page(before_id=before_id, limit=limit, **filters),
+    ["ID", "Time", "User", "Type", "Entity", "Entity ID", "Action"],
+    filters=tuple(filters.values()),
+    selectable=False,
+)
+if not logs:
+    st.info("No logs match these filters.")
+
+# --- Archives ---
+st.subheader("🗄️ Archived Logs")
+
+retention = st.number_input("Archive entries older than (days)", min_value=0, value=LOG_RETENTION_DAYS)
+if st.button("Archive Old Entries"):
+    paths = archive_logs(older_than_days=retention)
+    st.success(f"✅ Wrote {len(paths)} archive files")
+
+archives = list_archives()
+if archives:
+    st.table([
+        {"File": path, "Entries": count, "From": from_ts, "To": to_ts, "IDs": f"#{first_id}–#{last_id}"}
+        for _, path, first_id, last_id, from_ts, to_ts, count in archives
+    ])
+    chosen = st.selectbox("Open archive", [a[1] for a in archives])
+    needle = st.text_input("Filter archive entries").strip().lower()
+    if st.button("Show Entries"):
+        try:
+            entries = [e for e in read_archive(chosen) if needle in e["action"].lower()]
+            st.dataframe(entries[-1000:], hide_index=True, use_container_width=True)
+            st.caption(f"{len(entries)} matching entries (latest 1000 shown)")
+        except OSError as e:
+            st.error(f"Cannot read archive: {e}")
 else:
-    st.info("No logs available.")
+    st.caption("No archives yet.")
+
+# --- Scenarios ---
+st.subheader("🧹 Scenarios")
+
+scenarios = list_scenarios()
+st.table([
+    {"Scenario": name, "Saved": saved_at or "built in", "Size (MB)": f"{size / 1e6:.1f}"}
+    for name, saved_at, size in scenarios
+])
 
-# --- Reset Button ---
-st.subheader("🧹 Reset Simulation")
+col1, col2 = st.columns(2)
+with col1:
+    new_name = st.text_input("Save current state as").strip()
+    if st.button("Save Scenario", disabled=not new_name):
+        try:
+            counts = save_scenario(new_name)
+            st.success(f"✅ Saved {new_name} ({sum(counts.values())} rows)")
+        except Exception as e:
+            st.error(f"Save failed: {e}")
+with col2:
+    scenario = st.selectbox("Scenario", [name for name, _, _ in scenarios], key="scenario_choice")
+    if st.button("Restore Scenario"):
+        try:
+            counts = restore_scenario(scenario)
+            st.success(f"✅ Restored {scenario} ({sum(counts.values())} rows)")
+        except Exception as e:
+            st.error(f"Restore failed: {e}")
+    if scenario != INITIAL_SCENARIO and st.button("Delete Scenario"):
+        delete_scenario(scenario)
+        st.rerun()
 
 if st.button("Reset All Data"):
     reset_simulation()
@@ -1,15 +1,19 @@
 import streamlit as st
-import time
+from components.grid import paged_grid
+from db.connection import transaction
 from db.queries import (
-    place_order, get_orders, update_order_status,
-    fulfill_order, delete_order, get_customer_locations
+    place_order, get_orders_page, update_order_status,
+    delete_order, get_customer_locations
 )
+from db.log_writer import set_current_user
 
 # --- Access Control ---
 if "logged_in" not in st.session_state or not st.session_state.logged_in:
     st.error("⛔ Please log in to access this page.")
     st.stop()
 
+set_current_user(st.session_state.get("user_id"))
+
 st.title("Order Manager")
 
 # --- Place Custom Order ---
@@ -35,47 +39,47 @@ if st.button("Place Order"):
             customer_name.strip(),
             customer_location.strip()
         )
+        # The orders grid below is drawn after this, so it already shows the new order
         st.success(f"✅ Order placed for {quantity} units of {sku} by {customer_name} to {customer_location}")
-        time.sleep(2.5)
-        st.rerun()
     except Exception as e:
         st.error(f"Failed to place order: {e}")
 
 # --- Display Orders Based on Role ---
 st.subheader("All Orders" if st.session_state.role == "Admin" else "My Orders")
-orders = get_orders(st.session_state.username, st.session_state.role)
-
-if orders:
-    st.markdown("### 📦 Current Orders")
-
-    header = st.columns([1, 2, 1.5, 2, 2, 1.5, 1.5])
-    header[0].markdown("**Order ID**")
-    header[1].markdown("**SKU**")
-    header[2].markdown("**Qty**")
-    header[3].markdown("**Customer**")
-    header[4].markdown("**Location**")
-    header[5].markdown("**Status**")
-    header[6].markdown("**Actions**")
+filter_cols = st.columns(3)
+status_filter = filter_cols[0].selectbox("Status", ["All", "Pending", "Processed"])
+sku_filter = filter_cols[1].text_input("Filter by SKU").strip().upper()
+location_filter = filter_cols[2].selectbox("Filter by Location", ["All"] + locations)
 
-    for order in orders:
-        order_id, sku, qty, customer, location, status = order
-        row = st.columns([1, 2, 1.5, 2, 2, 1.5, 1.5])
-        row[0].write(order_id)
-        row[1].write(sku)
-        row[2].write(qty)
-        row[3].write(customer)
-        row[4].write(location)
-        row[5].write(status)
+status_filter = None if status_filter == "All" else status_filter
+sku_filter = sku_filter or None
+location_filter = None if location_filter == "All" else location_filter
+is_admin = st.session_state.role == "Admin"
+orders, selected = paged_grid(
+    "orders",
+    lambda before_id, limit: get_orders_page(
+        st.session_state.username, st.session_state.role,
+        status=status_filter, sku=sku_filter, location=location_filter,
+        before_id=before_id, limit=limit,
+    ),
+    ["Order ID", "SKU", "Qty", "Customer", "Location", "Status"],
+    filters=(status_filter, sku_filter, location_filter),
+    selectable=is_admin,
+)
 
-        if status == "Pending" and st.session_state.role == "Admin":
-            if row[6].button("🗑️ Delete", key=f"delete_{order_id}"):
-                try:
-                    delete_order(order_id)
-                    st.success(f"Order #{order_id} deleted.")
-                    st.rerun()
-                except Exception as e:
-                    st.error(f"Failed to delete order: {e}")
-        else:
-            row[6].markdown("✅")
-else:
+if not orders:
     st.info("No orders found.")
+elif is_admin:
+    # Only pending orders can be deleted
+    deletable = [order for order in selected if order[5] == "Pending"]
+    if len(deletable) < len(selected):
+        st.caption("Processed orders in the selection are kept.")
+    if st.button(f"🗑️ Delete Selected ({len(deletable)})", disabled=not deletable):
+        try:
+            with transaction() as tx:
+                for order in deletable:
+                    delete_order(order[0], tx=tx)
+            st.success(f"Deleted orders {', '.join(f'#{order[0]}' for order in deletable)}")
+            st.rerun()
+        except Exception as e:
+            st.error(f"Failed to delete order: {e}")
@@ -1,16 +1,21 @@
 import streamlit as st
-import pandas as pd
+from components.grid import paged_grid
+from db.connection import transaction
 from db.queries import (
-    get_all_products, add_product, update_product, delete_product,
+    get_products_page, add_product, update_product, delete_product,
     add_inventory, update_inventory, get_all_warehouse_locations,
     delete_inventory_for_sku, get_inventory_locations_for_sku
 )
+from db.bulk_import import import_catalog
+from db.log_writer import set_current_user
 
 # --- Access Control ---
 if "logged_in" not in st.session_state or not st.session_state.logged_in:
     st.error("⛔ Please log in to access this page.")
     st.stop()
 
+set_current_user(st.session_state.get("user_id"))
+
 st.title("Product Manager")
 
 # --- Form State Reset ---
@@ -96,32 +101,39 @@ if st.session_state.role == "Admin":
                 except Exception as e:
                     st.error(f"Failed to update product: {e}")
 
+    # --- Bulk Import ---
+    st.subheader("Bulk Import")
+    st.caption("CSV or JSONL with columns: sku, name, description, threshold, location, quantity")
+    upload = st.file_uploader("Catalog File", type=["csv", "jsonl"])
+    if upload and st.button("📥 Import Catalog"):
+        fmt = "jsonl" if upload.name.lower().endswith(".jsonl") else "csv"
+        report = import_catalog(upload, fmt=fmt)
+        st.success(
+            f"Imported {report['rows'] - len(report['rejects'])} of {report['rows']} rows "
+            f"({report['rows_per_sec']:.0f} rows/s)"
+        )
+        if report["rejects"]:
+            st.warning(f"{len(report['rejects'])} rows rejected")
+            st.table([{"Line": line_no, "Reason": reason} for line_no, reason in report["rejects"]])
+
 # --- Product List (Visible to All Roles) ---
 st.subheader("All Products")
 
-products = get_all_products()
-
-if products:
-    header = st.columns([1.5, 2.5, 3, 1.5, 1])
-    header[0].markdown("**SKU**")
-    header[1].markdown("**Name**")
-    header[2].markdown("**Description**")
-    header[3].markdown("**Threshold**")
-    header[4].markdown("**Delete**" if st.session_state.role == "Admin" else "")
-
-    for p in products:
-        row = st.columns([1.5, 2.5, 3, 1.5, 1])
-        row[0].write(p[0])  # SKU
-        row[1].write(p[1])  # Name
-        row[2].write(p[2])  # Description
-        row[3].write(p[3])  # Threshold
-
-        if st.session_state.role == "Admin":
-            if row[4].button("🗑️", key=f"delete_{p[0]}"):
-                delete_product(p[0])
-                st.warning(f"Deleted {p[0]}")
-                st.rerun()
-        else:
-            row[4].write("")  # Empty cell for users
-else:
+sku_search = st.text_input("Search by SKU prefix").strip().upper() or None
+is_admin = st.session_state.role == "Admin"
+products, selected = paged_grid(
+    "products",
+    lambda before_id, limit: get_products_page(sku_search, before_id=before_id, limit=limit),
+    ["SKU", "Name", "Description", "Threshold"],
+    filters=(sku_search,),
+    selectable=is_admin,
+)
+
+if not products:
     st.info("No products found.")
+elif is_admin and st.button(f"🗑️ Delete Selected ({len(selected)})", disabled=not selected):
+    with transaction() as tx:
+        for p in selected:
+            delete_product(p[0], tx=tx)
+    st.warning(f"Deleted {', '.join(p[0] for p in selected)}")
+    st.rerun()
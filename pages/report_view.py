@@ -1,5 +1,6 @@
 import streamlit as st
-from db.queries import generate_summary_report, get_logistics_records
+from components.pagination import keyset_page
+from db.queries import generate_summary_report, get_logistics_page
 
 if "role" not in st.session_state or st.session_state.role != "Admin":
     st.error("⛔ Access Denied: Admins only.")
@@ -18,14 +19,19 @@ st.metric("Total Logistics Cost (₹)", f"{report['Total Logistics Cost']:.2f}")
 # --- Logistics Cost Table ---
 st.subheader("📦 Logistics Movements")
 
-logistics = get_logistics_records()
+sku_filter = st.text_input("Filter by SKU").strip().upper() or None
+logistics = keyset_page(
+    "logistics",
+    lambda before_id, limit: get_logistics_page(sku=sku_filter, before_id=before_id, limit=limit),
+    filters=(sku_filter,),
+)
 
 if logistics:
     logistics_table = []
     total_cost = 0
 
     for record in logistics:
-        sku, origin, destination, cost = record
+        _, sku, origin, destination, cost = record
         logistics_table.append({
             "SKU": sku,
             "From": origin,
@@ -35,6 +41,6 @@ if logistics:
         total_cost += cost
 
     st.table(logistics_table)
-    st.success(f"🧾 Total Logistics Cost: ₹{total_cost:.2f}")
+    st.success(f"🧾 Logistics Cost on this page: ₹{total_cost:.2f}")
 else:
     st.info("No logistics records found.")
@@ -1,14 +1,46 @@
 from db.queries import (
     add_product, get_all_products, update_product, delete_product,
-    add_inventory, get_inventory, get_low_stock,
+    add_inventory, update_inventory, get_inventory, get_low_stock,
     move_product, get_route_cost, get_cheapest_route_details,
     place_order, get_orders, update_order_status, delete_order,
     add_forecast, get_forecast, get_inventory_for_forecast,
     generate_summary_report, reset_simulation, get_connection
 )
+from db.connection import configure_pool, get_pool_stats, transaction
+from db.log_writer import configure_log_writer, flush_logs, get_log_writer, set_current_user
+from db.queries import (
+    move_order_to_customer, get_orders_page, get_all_warehouse_locations,
+    get_fulfillment_options, get_forecast_gaps, get_products_page, set_inventory_levels,
+    get_logs_page, write_log
+)
+from db.cache import get_cache_stats
+from db.routing import get_shortest_route
+from db.counters import rebuild_summary_counters, verify_summary_counters
+from db.migrate import check_query_plans, migrate
+from db.simulation import Simulation
+from db.forecasting import forecast_demand, refresh_forecasts
+from db.replenishment import plan_replenishment
+from db.fulfillment import plan_fulfillment
+from db.export import export_table, main as export_main
+from db.routing import RouteGraph
+from db.ledger import inventory_at, take_snapshot
+from db.log_archive import archive_logs, read_archive
+from db.scenarios import restore_scenario, save_scenario
+from db.order_intake import ingest_orders
+from db.bulk_import import import_catalog
+from db.loadgen import run_load, snapshot, cleanup
+from db.metrics import enable_metrics, get_metrics, render_prometheus, reset_metrics
+from concurrent.futures import ThreadPoolExecutor
 from decimal import Decimal
+import json
+import numpy as np
+import random
+import time
 import pytest
 
+# Write audit logs inline so tests observe them immediately
+configure_log_writer(synchronous=True)
+
 # F-001: Add/Edit/Delete Product
 def test_add_update_delete_product():
     sku = "TESTSKU"
@@ -43,6 +75,10 @@ def test_inventory_tracking_and_alert():
     low_stock = get_low_stock()
     assert any(i[0] == sku and i[2] == location for i in low_stock)
 
+    # Raising the quantity above threshold clears the maintained alert
+    update_inventory(sku, location, 50)
+    assert not any(i[0] == sku and i[2] == location for i in get_low_stock())
+
 # F-004, F-005, F-008: Move Product, Transport Cost, Route Optimization
 def test_move_product_and_cost():
     sku = "SKU001"
@@ -67,6 +103,39 @@ def test_move_product_and_cost():
     dest_qty = [i[3] for i in inventory if i[1] == sku and i[2] == destination]
     assert dest_qty and dest_qty[0] >= quantity
 
+# Reference cache: repeated reads hit, inventory writes invalidate
+def test_reference_cache_invalidation():
+    get_route_cost("Warehouse A", "Retail Hub 1")
+    hits = get_cache_stats()["hits"]
+    get_route_cost("Warehouse A", "Retail Hub 1")
+    assert get_cache_stats()["hits"] == hits + 1
+
+    delete_product("CACHESKU")
+    add_product("CACHESKU", "Cache Product", "Desc", 1)
+    add_inventory("CACHESKU", "Warehouse Cache", 5)
+    assert "Warehouse Cache" in get_all_warehouse_locations()
+    delete_product("CACHESKU")
+    assert "Warehouse Cache" not in get_all_warehouse_locations()
+
+# Multi-hop routing: B -> A -> Hub 3 (80 + 90) beats the direct B -> Hub 3 (175)
+def test_multi_hop_route():
+    route = get_shortest_route("Warehouse B", "Retail Hub 3")
+    assert route["path"] == ["Warehouse B", "Warehouse A", "Retail Hub 3"]
+    assert route["cost"] == Decimal("170.00")
+    assert get_shortest_route("Retail Hub 3", "Warehouse B") is None
+    assert get_route_cost("Warehouse B", "Retail Hub 3") == route["cost"]
+    assert get_cheapest_route_details("Warehouse B", "Retail Hub 3")["distance"] == route["distance"]
+
+# Batched fulfillment options match the per-order lookups
+def test_batched_fulfillment_options():
+    options = get_fulfillment_options([
+        (1, "SKU001", 1, "Retail Hub 1"),
+        (2, "SKU001", 10_000, "Retail Hub 1"),
+    ])
+    assert "Warehouse A" in options[1]["valid_origins"]
+    assert options[1]["suggestion"]["origin"] in options[1]["valid_origins"]
+    assert options[2]["valid_origins"] == [] and options[2]["suggestion"] is None
+
 # F-006: Place, Update, Delete Order
 def test_order_flow():
     sku = "SKU001"
@@ -86,6 +155,30 @@ def test_order_flow():
     orders = get_orders(user, "User")
     assert not any(o[0] == order_id for o in orders)
 
+# Keyset pagination: pages are disjoint, newest first, and filtered in SQL
+def test_orders_keyset_pagination():
+    user = "PageUser"
+    for qty in range(1, 6):
+        place_order("SKU001", qty, user, "Retail Hub 1")
+
+    first, cursor = get_orders_page(user, "User", status="Pending", limit=3)
+    second, last_cursor = get_orders_page(user, "User", status="Pending", before_id=cursor, limit=3)
+    ids = [o[0] for o in first + second]
+    assert len(first) == 3 and len(second) == 2 and last_cursor is None
+    assert ids == sorted(ids, reverse=True)
+    assert all(o[5] == "Pending" and o[3] == user for o in first + second)
+
+    for order_id in ids:
+        delete_order(order_id)
+
+def test_products_keyset_pagination():
+    first, cursor = get_products_page("SKU00", limit=2)
+    rest, last_cursor = get_products_page("SKU00", before_id=cursor, limit=50)
+    skus = [p[0] for p in first + rest]
+    assert len(first) == 2 and last_cursor is None
+    assert skus == sorted(set(skus), reverse=True)
+    assert all(sku.startswith("SKU00") for sku in skus)
+
 # F-007: Forecast Demand
 def test_forecast_and_gap():
     sku = "SKU001"
@@ -96,6 +189,11 @@ def test_forecast_and_gap():
     inventory = get_inventory_for_forecast(sku)
     assert isinstance(inventory, (int, float, Decimal))
 
+    gaps = [g for g in get_forecast_gaps("2025-11-10", "2025-11-10", by_location=True) if g[0] == sku]
+    assert gaps and gaps[0][3] == inventory
+    assert gaps[0][4] == gaps[0][1] - inventory
+    assert sum(qty for _, qty in gaps[0][6]) == inventory
+
 # F-009: Reporting
 def test_summary_report():
     report = generate_summary_report()
@@ -104,6 +202,380 @@ def test_summary_report():
     assert "Low Stock Items" in report
     assert "Total Logistics Cost" in report
 
+# Connection pool: queries reuse pooled connections instead of reconnecting
+def test_connection_pool_reuse():
+    get_all_products()
+    before = get_pool_stats()
+    for _ in range(20):
+        get_all_products()
+    after = get_pool_stats()
+    assert after["checkouts"] - before["checkouts"] == 20
+    assert after["created"] == before["created"]
+    assert after["in_use"] == 0
+
+# A thread never needs a second connection, so one pooled connection is enough
+def test_single_connection_pool_suffices():
+    configure_pool(size=1, timeout=2)
+    try:
+        add_product("SKU_POOL", "Pool Item", "Single-connection pool", 2)
+        add_inventory("SKU_POOL", "Warehouse A", 3)
+        update_inventory("SKU_POOL", "Warehouse A", 4)
+        move_product("SKU_POOL", "Warehouse A", "Warehouse B", 1, 1)
+        with transaction() as tx:
+            assert get_shortest_route("Warehouse A", "Retail Hub 1", tx=tx) is not None
+            move_product("SKU_POOL", "Warehouse B", "Warehouse A", 1, 1, tx=tx)
+        assert get_pool_stats()["timeouts"] == 0
+    finally:
+        configure_pool()
+    set_inventory_levels([("SKU_POOL", "Warehouse A", 0), ("SKU_POOL", "Warehouse B", 0)])
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute("DELETE FROM Logistics WHERE sku = 'SKU_POOL'")
+    conn.commit()
+    cursor.close()
+    conn.close()
+    delete_product("SKU_POOL")
+    rebuild_summary_counters()
+
+# Unit of work: a failed order move leaves neither stock nor status changed
+def test_order_move_is_atomic():
+    sku = "SKU001"
+    user = "TxUser"
+    place_order(sku, 10_000, user, "Retail Hub 1")
+    order_id = get_orders(user, "User")[0][0]
+    before = [i[3] for i in get_inventory() if i[1] == sku and i[2] == "Warehouse A"]
+
+    with pytest.raises(Exception):
+        with transaction() as tx:
+            move_order_to_customer(order_id, sku, 10_000, "Warehouse A", "Retail Hub 1", tx=tx)
+
+    assert get_orders(user, "User")[0][5] == "Pending"
+    after = [i[3] for i in get_inventory() if i[1] == sku and i[2] == "Warehouse A"]
+    assert before == after
+    delete_order(order_id)
+
+    # A failure after earlier writes in the same transaction undoes those writes too
+    place_order(sku, 1, user, "Retail Hub 1")
+    place_order(sku, 10_000, user, "Retail Hub 1")
+    big_id, small_id = [o[0] for o in get_orders(user, "User")]
+    report_before = generate_summary_report()
+
+    with pytest.raises(Exception):
+        with transaction() as tx:
+            move_order_to_customer(small_id, sku, 1, "Warehouse A", "Retail Hub 1", tx=tx)
+            move_order_to_customer(big_id, sku, 10_000, "Warehouse A", "Retail Hub 1", tx=tx)
+
+    assert [o[5] for o in get_orders(user, "User")] == ["Pending", "Pending"]
+    after = [i[3] for i in get_inventory() if i[1] == sku and i[2] == "Warehouse A"]
+    assert before == after
+    assert generate_summary_report() == report_before
+    delete_order(big_id)
+    delete_order(small_id)
+
+# Summary counters stay in step with the base tables
+def test_summary_counters_maintained():
+    rebuild_summary_counters()
+    place_order("SKU001", 1, "CounterUser", "Retail Hub 1")
+    order_id = get_orders("CounterUser", "User")[0][0]
+    update_order_status(order_id, "Processed")
+    add_inventory("SKU002", "Warehouse Counter", 1)
+    move_product("SKU002", "Warehouse Counter", "Retail Hub 2", 1, 100)
+    delete_order(order_id)
+    assert verify_summary_counters() == {}
+
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute("DELETE FROM Inventory WHERE sku = 'SKU002' AND location = 'Warehouse Counter'")
+    conn.commit()
+    rebuild_summary_counters()
+
+# Moves keep LowStock and the low-stock count exact from the quantities they change
+def test_move_maintains_low_stock():
+    sku, a, b = "SKU002", "Warehouse Low A", "Warehouse Low B"
+    rebuild_summary_counters()
+
+    def low():
+        return {i[2] for i in get_low_stock() if i[0] == sku} & {a, b}
+
+    add_inventory(sku, a, 25)
+    move_product(sku, a, b, 8, 1)  # creates b below the threshold of 10
+    assert low() == {b} and verify_summary_counters() == {}
+    move_product(sku, a, b, 5, 1)
+    assert low() == set() and verify_summary_counters() == {}
+    move_product(sku, b, a, 13, 1)
+    assert low() == {b} and verify_summary_counters() == {}
+
+    set_inventory_levels([(sku, a, 0), (sku, b, 0)])
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute("DELETE FROM Logistics WHERE sku = %s AND origin IN (%s, %s)", (sku, a, b))
+    cursor.execute("DELETE FROM Inventory WHERE sku = %s AND location IN (%s, %s)", (sku, a, b))
+    conn.commit()
+    cursor.close()
+    conn.close()
+    rebuild_summary_counters()
+
+# Migrations apply once and the hot queries stay on indexes
+def test_migrations_idempotent_and_indexed():
+    migrate()
+    assert migrate() == []
+    assert check_query_plans() == []
+
+# Concurrent moves conserve stock and never oversell
+def test_concurrent_moves_conserve_stock():
+    sku = "SKU002"
+    locations = ["Warehouse Stress A", "Warehouse Stress B"]
+    for location in locations:
+        add_inventory(sku, location, 50)
+
+    def move(i):
+        origin, destination = locations if i % 2 else locations[::-1]
+        quantity = random.randint(1, 5)
+        try:
+            move_product(sku, origin, destination, quantity, 1)
+            return origin, quantity, None
+        except Exception as e:  # noqa: W0703
+            return origin, quantity, str(e)
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(move, range(2000)))
+
+    # Only oversell attempts may fail; anything else (e.g. pool exhaustion) is a bug
+    assert {error for _, _, error in results if error} <= {"Insufficient stock at origin"}
+    moved_out = {location: 0 for location in locations}
+    for origin, quantity, error in results:
+        if error is None:
+            moved_out[origin] += quantity
+    expected = {
+        locations[0]: 50 - moved_out[locations[0]] + moved_out[locations[1]],
+        locations[1]: 50 - moved_out[locations[1]] + moved_out[locations[0]],
+    }
+    stock = {i[2]: i[3] for i in get_inventory() if i[1] == sku and i[2] in locations}
+    assert stock == expected
+    assert all(q >= 0 for q in stock.values())
+
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute("SELECT COUNT(*) FROM Logistics WHERE sku = %s AND origin IN (%s, %s)", (sku, *locations))
+    assert cursor.fetchone()[0] == sum(error is None for _, _, error in results)
+    cursor.close()
+    conn.close()
+
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute("DELETE FROM Logistics WHERE sku = %s AND origin IN (%s, %s)", (sku, *locations))
+    cursor.execute("DELETE FROM Inventory WHERE sku = %s AND location IN (%s, %s)", (sku, *locations))
+    conn.commit()
+    rebuild_summary_counters()
+
+# Instrumented query functions record calls, rows and connections
+def test_query_metrics():
+    reset_metrics()
+    enable_metrics()
+    try:
+        inventory = get_inventory()
+    finally:
+        enable_metrics(False)
+    recorded = [m for m in get_metrics() if m["function"] == "get_inventory"]
+    assert recorded[0]["calls"] == 1
+    assert recorded[0]["rows"] == len(inventory)
+    assert recorded[0]["connections"] == 1
+    assert 'scms_query_calls_total{page="none",function="get_inventory"} 1' in render_prometheus()
+
+# The headless simulation conserves units between stock, deliveries and backlog
+def test_simulation_runs_from_database():
+    sim = Simulation.from_database(seed=7)
+    start = int(sim.stock.sum())
+    summary = sim.run(30)
+    assert summary["days"] == 30
+    assert summary["fulfilled"] + summary["backlog"] == summary["demand"]
+    received = summary["supplier_units"] - int(sim.pipeline.sum())
+    assert summary["stock_on_hand"] == start + received - summary["fulfilled"]
+    assert (sim.stock >= 0).all()
+
+# Forecasts cover every product and extend past the current period
+def test_forecast_demand_from_orders():
+    result = forecast_demand("day", horizon=3)
+    assert result["skus"] == sorted(p[0] for p in get_all_products())
+    assert result["values"].shape == (len(result["skus"]), 3)
+    assert (result["values"] >= 0).all()
+    assert result["dates"] == sorted(result["dates"]) and len(set(result["dates"])) == 3
+
+# A refresh replaces its own forecasts but keeps the ones entered by hand
+def test_refresh_keeps_manual_forecasts():
+    dates = refresh_forecasts("day", horizon=2)["dates"]
+    add_forecast("SKU001", 777, dates[0])
+    refresh_forecasts("day", horizon=2)
+    forecasts = [(f[0], f[1], str(f[2])) for f in get_forecast()]
+    assert forecasts.count(("SKU001", 777, str(dates[0]))) == 1
+
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute("DELETE FROM DemandForecast WHERE source = 'generated' OR forecast_value = 777")
+    conn.commit()
+    cursor.close()
+    conn.close()
+
+# Routing stays fast on a few thousand locations: only the origins asked about are searched
+def test_route_graph_scales():
+    n = 3000
+    routes = [(f"L{i}", f"L{i + 1}", 1, 1) for i in range(n - 1)]
+    routes += [(f"L{i}", f"L{i + 10}", 12, 1) for i in range(0, n - 10, 7)]
+    routes += [("L0", f"L{n - 1}", 5000, 1)]
+    graph = RouteGraph(routes)
+    route = graph.shortest("L0", f"L{n - 1}")
+    assert route["cost"] == Decimal(n - 1) and len(route["path"]) == n
+    assert graph.shortest("L0", f"L{n - 1}", weight="distance")["distance"] == Decimal(1)
+    assert graph.shortest(f"L{n - 1}", "L0") is None
+    costs = graph.cost_matrix(["L0", "L5"], ["L5", "L0", "L20"])
+    assert costs[0, 0] == 5 and costs[1, 0] == np.inf and costs[1, 2] == 15
+
+def test_replenishment_plan_min_cost():
+    graph = RouteGraph([
+        ("W1", "W3", 1, 10), ("W2", "W3", 5, 10), ("W1", "W4", 4, 10), ("W2", "W4", 1, 10),
+    ])
+    positions = {"SKUX": (10, {"W1": 14, "W2": 20, "W3": 2, "W4": 5})}
+    plan = plan_replenishment(positions, graph)
+    moved = {(t["origin"], t["destination"]): t["quantity"] for t in plan["transfers"]}
+    assert moved == {("W1", "W3"): 4, ("W2", "W3"): 4, ("W2", "W4"): 5}
+    assert plan["total_cost"] == Decimal("29.00")
+    assert plan["unmet"] == []
+
+# Joint planning serves the order with most to lose first; empty stock leaves all orders open
+def test_fulfillment_plan():
+    graph = RouteGraph([
+        ("W1", "H1", 1, 10), ("W2", "H1", 10, 10), ("W1", "H2", 2, 10), ("W2", "H2", 3, 10),
+    ])
+    orders = [
+        (1, "SKUX", 5, "A", "H2", "Pending"),
+        (2, "SKUX", 5, "B", "H1", "Pending"),
+        (3, "SKUX", 5, "C", "H1", "Pending"),
+    ]
+    plan = plan_fulfillment(orders, {("SKUX", "W1"): 5, ("SKUX", "W2"): 5}, graph)
+    assert {a["order_id"]: a["origin"] for a in plan["assignments"]} == {1: "W2", 2: "W1"}
+    assert plan["total_cost"] == Decimal("20.00")
+    assert [(u["order_id"], u["reason"]) for u in plan["unassigned"]] == [(3, "insufficient stock")]
+
+    empty = plan_fulfillment(orders, {}, graph)
+    assert empty["assignments"] == []
+    assert [u["order_id"] for u in empty["unassigned"]] == [1, 2, 3]
+
+# Exports stream the selected rows and columns to CSV and Parquet
+def test_export_orders(tmp_path):
+    place_order("SKU001", 3, "ExportUser", "Retail Hub 1")
+    order_id = get_orders("ExportUser", "User")[0][0]
+
+    path = tmp_path / "orders.csv"
+    written = export_table("Orders", str(path), columns=["order_id", "sku", "quantity"],
+                           min_id=order_id, max_id=order_id, chunk_size=1)
+    assert written == 1
+    assert path.read_text(encoding="utf-8").splitlines() == ["order_id,sku,quantity", f"{order_id},SKU001,3"]
+
+    pq = pytest.importorskip("pyarrow.parquet")
+    path = tmp_path / "orders.parquet"
+    assert export_table("Orders", str(path), fmt="parquet", min_id=order_id, max_id=order_id) == 1
+    table = pq.read_table(str(path))
+    assert table.column("customer_name").to_pylist() == ["ExportUser"]
+
+    with pytest.raises(ValueError):
+        export_table("Orders", str(path), columns=["password"])
+
+    # The CLI tolerates spaces in --columns and leaves no temporary file behind
+    path = tmp_path / "cli.csv"
+    export_main(["Orders", str(path), "--columns", "order_id, sku", "--min-id", str(order_id)])
+    assert path.read_text(encoding="utf-8").splitlines()[0] == "order_id,sku"
+    assert not any(p.name.endswith(".tmp") for p in tmp_path.iterdir())
+    delete_order(order_id)
+
+# The ledger answers point-in-time stock questions for rows changed through db.queries
+def test_inventory_ledger_point_in_time():
+    sku = "SKU001"
+    a, b = ("SKU001", "Warehouse Ledger A"), ("SKU001", "Warehouse Ledger B")
+
+    def now():
+        conn = get_connection()
+        cursor = conn.cursor()
+        cursor.execute("SELECT NOW(6)")
+        moment = cursor.fetchone()[0]
+        cursor.close()
+        conn.close()
+        return moment
+
+    add_inventory(sku, a[1], 30)
+    first = now()
+    take_snapshot()
+    move_product(sku, a[1], b[1], 12, 1)
+    update_inventory(sku, b[1], 20)
+
+    stock = inventory_at()
+    assert (stock.get(a), stock.get(b)) == (18, 20)
+    past = inventory_at(first)
+    assert (past.get(a), past.get(b)) == (30, None)
+    full = inventory_at(use_snapshots=False)
+    assert (full.get(a), full.get(b)) == (18, 20)
+
+    # Zero the rows through the ledger before removing them
+    set_inventory_levels([(sku, a[1], 0), (sku, b[1], 0)])
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute("DELETE FROM Logistics WHERE sku = %s AND origin = %s", (sku, a[1]))
+    cursor.execute("DELETE FROM Inventory WHERE sku = %s AND location IN (%s, %s)", (sku, a[1], b[1]))
+    conn.commit()
+    rebuild_summary_counters()
+
+def test_structured_logs_search_and_archive(tmp_path):
+    sku, location = "SKU002", "Warehouse Audit"
+    set_current_user(2)
+    try:
+        add_inventory(sku, location, 7)
+    finally:
+        set_current_user(None)
+
+    rows, _ = get_logs_page(action_type="inventory.add", entity_type="product", entity_id=sku, limit=5)
+    log_id, created_at, username, action_type, entity_type, entity_id, action = rows[0]
+    assert (username, entity_id) == ("user1", sku) and "Warehouse Audit" in action
+    assert created_at is not None
+    found, _ = get_logs_page(search="warehouse audit", limit=5)
+    assert log_id in [row[0] for row in found]
+
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute("SELECT NOW() + INTERVAL 1 SECOND")
+    cutoff = cursor.fetchone()[0]
+    cursor.close()
+    conn.close()
+    paths = archive_logs(before=cutoff, directory=str(tmp_path), batch_size=100)
+    archived = [entry for path in paths for entry in read_archive(path)]
+    assert log_id in [entry["log_id"] for entry in archived]
+    assert get_logs_page(entity_type="product", entity_id=sku, until=cutoff)[0] == []
+
+    set_inventory_levels([(sku, location, 0)])
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute("DELETE FROM Inventory WHERE sku = %s AND location = %s", (sku, location))
+    conn.commit()
+    rebuild_summary_counters()
+
+def test_scenario_save_and_restore(tmp_path):
+    directory = str(tmp_path)
+    before = sorted(get_all_products())
+    counts = save_scenario("pytest-state", directory)
+    assert counts["Products"] == len(before)
+
+    add_product("SKU_SCN", "Scenario Item", "Only in the modified state", 3)
+    add_inventory("SKU_SCN", "Warehouse A", 4)
+    save_scenario("pytest-modified", directory)
+
+    restore_scenario("pytest-state", directory)
+    assert sorted(get_all_products()) == before
+
+    restore_scenario("pytest-modified", directory)
+    assert "SKU_SCN" in [row[0] for row in get_all_products()]
+    assert ("SKU_SCN", "Warehouse A") in inventory_at()
+
+    restore_scenario("pytest-state", directory)
+    assert "SKU_SCN" not in [row[0] for row in get_all_products()]
+
 # F-010: Reset Simulation
 @pytest.mark.timeout(10)
 def reset_simulation():
@@ -121,3 +593,134 @@ def reset_simulation():
 
     conn.commit()
     print(">>> reset_simulation complete")
+
+# Streaming intake inserts valid orders in batches and counts rejections by kind
+def test_order_intake(tmp_path):
+    user = "IntakeUser"
+    source = tmp_path / "orders.jsonl"
+    records = [
+        {"sku": "sku001", "quantity": 2, "customer_name": user, "customer_location": "Retail Hub 1"},
+        {"sku": "SKU002", "quantity": "3", "customer_name": user, "customer_location": "Retail Hub 2"},
+        {"sku": "SKU001", "quantity": 2.7, "customer_name": user, "customer_location": "Retail Hub 1"},
+        {"sku": "NOSUCHSKU", "quantity": 1, "customer_name": user, "customer_location": "Retail Hub 1"},
+    ]
+    source.write_text("\n".join(json.dumps(r) for r in records) + "\n{not json\n")
+
+    stats = ingest_orders(str(source), batch_size=1)
+    assert stats["received"] == 5 and stats["inserted"] == 2 and stats["rejected"] == 3
+    assert stats["errors"]["quantity must be a whole number"] == 1
+    assert stats["errors"]["unknown SKU"] == 1
+    orders = get_orders(user, "User")
+    assert sorted((o[1], o[2]) for o in orders) == [("SKU001", 2), ("SKU002", 3)]
+
+    for order in orders:
+        delete_order(order[0])
+
+    # A source that cannot be read is an error, not an empty run
+    with pytest.raises(FileNotFoundError):
+        ingest_orders(str(tmp_path / "missing.jsonl"))
+
+    # A batch the database refuses is counted and the rest still go in
+    source.write_text("\n".join(json.dumps(r) for r in [
+        {"sku": "SKU001", "quantity": 1, "customer_name": "x" * 500, "customer_location": "Retail Hub 1"},
+        {"sku": "SKU001", "quantity": 1, "customer_name": user, "customer_location": "Retail Hub 1"},
+    ]) + "\n")
+    stats = ingest_orders(str(source), batch_size=1)
+    assert (stats["inserted"], stats["failed"], stats["failed_batches"]) == (1, 1, 1)
+    for order in get_orders(user, "User"):
+        delete_order(order[0])
+
+# Bulk import upserts products and stock chunk by chunk and reports bad rows by line
+def test_bulk_import_round_trip(tmp_path):
+    one, two = ("IMPTEST1", "Warehouse A"), ("IMPTEST2", "Warehouse B")
+    catalog = tmp_path / "catalog.csv"
+    catalog.write_text(
+        "sku,name,description,threshold,location,quantity\n"
+        "imptest1,Import One,First,5,Warehouse A,3\n"
+        "IMPTEST2,Import Two,,10,Warehouse B,40\n"
+        "IMPTEST3,Bad Row,,5,Warehouse A,lots\n"
+    )
+    report = import_catalog(str(catalog), chunk_size=1)
+    assert (report["rows"], report["products"], report["inventory"]) == (3, 2, 2)
+    assert [line_no for line_no, _ in report["rejects"]] == [4]
+    assert not any(p[0] == "IMPTEST3" for p in get_all_products())
+    assert any((i[0], i[2]) == one for i in get_low_stock())
+    stock = inventory_at()
+    assert (stock.get(one), stock.get(two)) == (3, 40)
+
+    updates = tmp_path / "updates.jsonl"
+    updates.write_text(
+        json.dumps({"sku": "IMPTEST1", "name": "Import One", "threshold": 5,
+                    "location": "Warehouse A", "quantity": 12}) + "\n"
+        "{not json\n"
+        + json.dumps({"sku": "IMPTEST2", "name": "Import Two v2"}) + "\n"
+    )
+    report = import_catalog(str(updates))
+    assert (report["rows"], report["products"], report["inventory"]) == (3, 2, 1)
+    assert [line_no for line_no, _ in report["rejects"]] == [2]
+    assert not any((i[0], i[2]) == one for i in get_low_stock())
+    assert inventory_at().get(one) == 12
+    assert [p[1] for p in get_all_products() if p[0] == "IMPTEST2"] == ["Import Two v2"]
+
+    # Zero the rows through the ledger before removing them
+    set_inventory_levels([(*one, 0), (*two, 0)])
+    delete_product(one[0])
+    delete_product(two[0])
+
+# A short load run reports per-function latencies and cleanup puts the database back
+def test_loadgen_run_and_cleanup(tmp_path):
+    report_before = generate_summary_report()
+    inventory_before = sorted(get_inventory())
+    snapshot(str(tmp_path))
+    report = run_load(duration=1, concurrency=2, seed=7)
+    assert report["failed_workers"] == []
+    assert report["concurrency"] == 2 and report["throughput"] > 0
+    assert set(report["functions"]) <= {"place_order", "get_orders", "get_inventory",
+                                        "move_order_to_customer", "generate_summary_report"}
+    for f in report["functions"].values():
+        assert f["calls"] == 0 or f["p50_ms"] <= f["p95_ms"] <= f["p99_ms"]
+
+    cleanup(str(tmp_path))
+    assert generate_summary_report() == report_before
+    assert sorted(get_inventory()) == inventory_before
+    assert not any(o[3].startswith("loadgen-") for o in get_orders())
+    assert list(tmp_path.iterdir()) == []
+
+# The background log writer batches entries from many threads and writes on size, time and close
+def test_async_log_writer_batches():
+    def logged():
+        conn = get_connection()
+        cursor = conn.cursor()
+        cursor.execute("SELECT COUNT(*) FROM Logs WHERE action_type = 'test.async'")
+        count = cursor.fetchone()[0]
+        cursor.close()
+        conn.close()
+        return count
+
+    configure_log_writer(synchronous=False, batch_size=50, flush_interval=0.2)
+    try:
+        writer = get_log_writer()
+        n = 400
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            list(pool.map(lambda i: write_log(None, f"Async entry {i}", action_type="test.async"), range(n)))
+        flush_logs()
+        assert writer.stats["written"] == n and writer.stats["failed"] == 0
+        assert writer.stats["batches"] < n
+        assert logged() == n
+
+        # Without a flush, the interval trigger writes a lone entry
+        write_log(None, "Async entry on timer", action_type="test.async")
+        time.sleep(1)
+        assert logged() == n + 1
+
+        write_log(None, "Async entry on close", action_type="test.async")
+        writer.close()
+        assert logged() == n + 2
+    finally:
+        configure_log_writer(synchronous=True)
+        conn = get_connection()
+        cursor = conn.cursor()
+        cursor.execute("DELETE FROM Logs WHERE action_type = 'test.async'")
+        conn.commit()
+        cursor.close()
+        conn.close()